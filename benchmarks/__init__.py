@@ -0,0 +1,3 @@
+"""
+Benchmarks du service (serveur Ollama factice et harnais de mesure)
+"""
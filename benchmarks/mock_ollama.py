@@ -0,0 +1,222 @@
+"""
+Serveur Ollama factice et déterministe pour les benchmarks
+
+Simule /api/chat (streaming ou non), /api/generate (chargement), /api/tags
+et /api/ps avec une latence de premier token, un débit de génération et un
+taux d'échec configurables. Les réponses et les échecs injectés dépendent
+uniquement de la graine, du modèle et du prompt : deux exécutions avec les
+mêmes paramètres produisent les mêmes réponses (un échec injecté porte sur
+une tentative : une nouvelle tentative du même prompt peut réussir).
+
+    python -m benchmarks.mock_ollama --port 11500 --latency 0.02 --tokens-per-second 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockSettings:
+    """
+    Comportement du serveur factice
+    """
+    # Délai avant le premier token (prefill), en secondes
+    latency: float = 0.02
+    # Débit de génération
+    tokens_per_second: float = 2000.0
+    # Nombre de tokens de chaque réponse
+    response_tokens: int = 64
+    # Proportion de requêtes /api/chat en échec (0 à 1)
+    failure_rate: float = 0.0
+    # Code HTTP renvoyé pour un échec injecté
+    failure_status: int = 500
+    # Modèles annoncés par /api/tags et /api/ps
+    models: list[str] = field(default_factory=lambda: ["bench-model"])
+    seed: int = 0
+
+
+# Gravités des constats des réponses libres
+SEVERITIES = ("low", "medium", "high", "critical")
+
+# Réponse JSON acceptée par tous les schémas de sortie structurée (champs en trop ignorés)
+STRUCTURED_RESPONSE = {
+    "issues": [],
+    "max_severity": "none",
+    "code": "pass",
+    "changes": [],
+    "verdict": "ACCEPTÉ",
+    "confidence": 0.9,
+    "justification": "Réponse du serveur factice",
+}
+
+
+def create_mock_app(settings: MockSettings) -> FastAPI:
+    """
+    Crée l'application du serveur factice
+    
+    Args:
+        settings: Comportement du serveur
+    
+    Returns:
+        Application FastAPI
+    """
+    app = FastAPI(title="Mock Ollama")
+    app.state.requests = 0
+    # Tentatives par (modèle, prompt) : tirage d'échec propre à chaque tentative
+    attempts: Dict[str, int] = {}
+    
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-mock"}
+    
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": model, "model": model} for model in settings.models]}
+    
+    @app.get("/api/ps")
+    async def ps():
+        expires_at = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+        return {
+            "models": [
+                {"name": model, "model": model, "expires_at": expires_at, "context_length": 8192}
+                for model in settings.models
+            ]
+        }
+    
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        return {"model": body.get("model"), "response": "", "done": True, "done_reason": "load"}
+    
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        messages = body.get("messages") or []
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        key = f"{settings.seed}:{body.get('model')}:{prompt}"
+        attempts[key] = attempts.get(key, 0) + 1
+        rng = random.Random(key)
+        
+        if random.Random(f"{key}:{attempts[key]}").random() < settings.failure_rate:
+            await asyncio.sleep(settings.latency)
+            return JSONResponse({"error": "échec injecté"}, status_code=settings.failure_status)
+        
+        tokens = _response_tokens(rng, settings, body)
+        stats = _stats(prompt, len(tokens), settings)
+        if not body.get("stream", True):
+            await asyncio.sleep(settings.latency + len(tokens) / settings.tokens_per_second)
+            return {
+                "model": body.get("model"),
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "done": True,
+                **stats,
+            }
+        
+        async def stream():
+            await asyncio.sleep(settings.latency)
+            start = time.perf_counter()
+            for index, token in enumerate(tokens):
+                # Cadence calée sur l'horloge : pas de dérive due aux sleeps
+                delay = start + (index + 1) / settings.tokens_per_second - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield json.dumps({"message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+            yield json.dumps({"message": {"role": "assistant", "content": ""}, "done": True, **stats}) + "\n"
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    return app
+
+
+def _response_tokens(rng: random.Random, settings: MockSettings, body: Dict[str, Any]) -> list[str]:
+    """Tokens de la réponse (JSON conforme si un format est imposé)"""
+    if body.get("format"):
+        text = json.dumps(STRUCTURED_RESPONSE, ensure_ascii=False)
+        size = max(1, len(text) // max(1, settings.response_tokens))
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    text = _review_text(rng, settings.response_tokens)
+    size = max(1, -(-len(text) // max(1, settings.response_tokens)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _review_text(rng: random.Random, budget: int) -> str:
+    """
+    Réponse libre à la forme d'une revue : prose, constats (dont un doublon),
+    bloc de code et verdict, d'environ `budget` tokens
+    """
+    def words(count: int) -> str:
+        return " ".join(f"mot{rng.randrange(1000)}" for _ in range(max(1, count)))
+    
+    findings = [
+        f"- [{rng.choice(SEVERITIES)}] ligne {rng.randrange(1, 100)}, {words(5)}"
+        for _ in range(max(1, budget // 24))
+    ]
+    findings.append(findings[0])
+    code = "\n".join(f"x{index} = {rng.randrange(1000)}" for index in range(max(1, budget // 32)))
+    return (
+        f"{words(budget // 4)}\n\n" + "\n".join(findings) + f"\n\n{words(budget // 4)}\n\n"
+        f"```python\n{code}\n```\n\nVerdict : ACCEPTÉ\n"
+    )
+
+
+def _stats(prompt: str, eval_count: int, settings: MockSettings) -> Dict[str, Any]:
+    """Compteurs de fin de réponse, au format d'Ollama (durées en nanosecondes)"""
+    eval_seconds = eval_count / settings.tokens_per_second
+    return {
+        "prompt_eval_count": max(1, len(prompt) // 4),
+        "prompt_eval_duration": int(settings.latency * 1e9),
+        "eval_count": eval_count,
+        "eval_duration": int(eval_seconds * 1e9),
+        "load_duration": 0,
+        "total_duration": int((settings.latency + eval_seconds) * 1e9),
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Serveur Ollama factice pour les benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """Ajoute les options de comportement du serveur factice (partagées avec le harnais)"""
+    defaults = MockSettings()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Délai avant le premier token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--response-tokens", type=int, default=defaults.response_tokens)
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate)
+    parser.add_argument("--failure-status", type=int, default=defaults.failure_status)
+    parser.add_argument("--models", default=",".join(defaults.models), help="Modèles annoncés (séparés par des virgules)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def settings_from_args(args: argparse.Namespace) -> MockSettings:
+    """Construit le comportement du serveur à partir des options"""
+    return MockSettings(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        models=[model for model in args.models.split(",") if model],
+        seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    args = parse_args()
+    uvicorn.run(create_mock_app(settings_from_args(args)), host=args.host, port=args.port, log_level="warning")
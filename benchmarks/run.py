@@ -0,0 +1,441 @@
+"""
+Benchmarks du service contre le serveur Ollama factice
+
+Lance le serveur factice (processus séparé) et le service (dans ce
+processus, sur sa propre boucle d'événements), puis envoie des requêtes à
+/api/challenge, /api/challenge/stream et /api/challenge/batch pour chaque
+combinaison de concurrence et de taille d'entrée. Pour chaque scénario :
+débit, latences p50/p95/p99, erreurs, mémoire (RSS), retard de la boucle
+d'événements du service et tokens du prompt de l'Arbiter (prefill).
+
+    python -m benchmarks.run --concurrency 1,8 --sizes 50,2000 --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --tolerance 0.25
+    python -m benchmarks.run --endpoints challenge --compaction
+
+Avec --compare, le code de sortie vaut 1 si un scénario régresse au-delà de
+la tolérance (latence p95 plus élevée ou débit plus faible).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional
+import httpx
+import uvicorn
+import yaml
+
+from benchmarks.mock_ollama import add_mock_arguments, settings_from_args
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ENDPOINTS = ("challenge", "stream", "batch")
+# Fichiers par requête /api/challenge/batch
+BATCH_FILES = 4
+# Intervalle de la sonde de retard de la boucle d'événements
+LAG_INTERVAL = 0.01
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile par rang le plus proche (0 si aucune valeur)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_code(lines: int, variant: str) -> str:
+    """Code Python déterministe d'environ `lines` lignes, rendu unique par `variant`"""
+    parts = [f"# bench {variant}\n"]
+    index = 0
+    while sum(part.count("\n") for part in parts) < lines:
+        parts.append(
+            f"def function_{index}(values):\n"
+            f"    total = 0\n"
+            f"    for value in values:\n"
+            f"        total += value * {index}\n"
+            f"    return total\n\n\n"
+        )
+        index += 1
+    return "".join(parts)
+
+
+def free_port() -> int:
+    """Port TCP libre sur l'interface locale"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb() -> Optional[float]:
+    """Mémoire résidente courante du processus (Linux), en Mo"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus, en Mo"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def write_config(path: Path, mock_url: str, model: str, concurrency: int, workdir: Path, compaction: bool = False):
+    """Configuration du service pointant sur le serveur factice (cache, préchargement et rechargement désactivés)"""
+    data = yaml.safe_load((PROJECT_ROOT / "config" / "config.yaml").read_text(encoding="utf-8"))
+    data["providers"] = {
+        "ollama_local": {"base_url": mock_url, "timeout": 120, "num_parallel": concurrency}
+    }
+    for role in data["roles"].values():
+        role["model"] = model
+        role.pop("keep_alive", None)
+    settings = data.setdefault("settings", {})
+    settings["cache"] = {"enabled": False}
+    settings["warmup"] = {"enabled": False}
+    settings["reload"] = {"enabled": False}
+    settings["jobs"] = {"enabled": True, "path": str(workdir / "jobs.sqlite3")}
+    settings["reports"] = {**(settings.get("reports") or {}), "path": str(workdir / "reports.sqlite3")}
+    settings["batch"] = {**(settings.get("batch") or {}), "concurrency": concurrency}
+    # Débit par client illimité : toutes les requêtes du benchmark viennent du même client
+    settings["admission"] = {**(settings.get("admission") or {}), "rate_per_minute": 0}
+    settings["compaction"] = {**(settings.get("compaction") or {}), "enabled": compaction}
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+
+
+class ServiceThread:
+    """
+    Service FastAPI exécuté par uvicorn dans un thread dédié
+    
+    La boucle d'événements du service est exposée pour y lancer la sonde de
+    retard.
+    """
+    
+    def __init__(self, config_path: Path, port: int):
+        from src.api.app import create_app
+        
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.server = uvicorn.Server(uvicorn.Config(
+            create_app(str(config_path)), host="127.0.0.1", port=port, log_level="warning", loop="asyncio"
+        ))
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.lag_samples: list[float] = []
+        self._probe: Optional[asyncio.Future] = None
+    
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+    
+    def start(self, timeout: float = 30):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Le service n'a pas démarré")
+            time.sleep(0.05)
+        self._probe = asyncio.run_coroutine_threadsafe(self._lag_probe(), self.loop)
+    
+    def stop(self):
+        if self._probe is not None:
+            self._probe.cancel()
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+    
+    async def _lag_probe(self):
+        """Mesure en continu le retard des réveils de la boucle du service"""
+        while True:
+            start = self.loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lag_samples.append(max(0.0, self.loop.time() - start - LAG_INTERVAL))
+
+
+def arbiter_prompt_tokens(report: Dict[str, Any]) -> Optional[int]:
+    """Tokens des prompts de l'Arbiter comptés par le serveur, tous morceaux confondus (None si inconnus)"""
+    metrics = report.get("metrics") or {}
+    counts = [
+        ((chunk.get("roles") or {}).get("arbiter") or {}).get("prompt_eval_count")
+        for chunk in metrics.get("chunks") or [metrics]
+    ]
+    counts = [count for count in counts if count is not None]
+    return sum(counts) if counts else None
+
+
+def is_incomplete(report: Dict[str, Any]) -> bool:
+    """Indique si un rôle n'a rien produit (échec conservé par preserve_outputs_on_error)"""
+    return not all(report.get(role) for role in ("challenger", "reviewer", "arbiter"))
+
+
+async def send(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    code: str
+) -> tuple[bool, bool, float, Optional[float], list[int]]:
+    """
+    Envoie une requête et mesure sa durée
+    
+    Returns:
+        Tuple (succès HTTP, rapport complet, latence totale, délai du premier
+        événement SSE ou None, tokens du prompt de l'Arbiter par rapport)
+    """
+    start = time.perf_counter()
+    first_event = None
+    complete = False
+    reports = []
+    try:
+        if endpoint == "challenge":
+            response = await client.post("/api/challenge", json={"code": code, "language": "python"})
+            ok = response.status_code == 200
+            reports = [response.json()["report"]] if ok else []
+            complete = ok and not is_incomplete(reports[0])
+        elif endpoint == "batch":
+            files = [{"path": f"file_{i}.py", "code": f"# {i}\n{code}"} for i in range(BATCH_FILES)]
+            response = await client.post("/api/challenge/batch", json={"files": files})
+            ok = response.status_code == 200 and not response.json()["summary"].get("failed")
+            reports = [result["report"] for result in response.json()["results"]] if ok else []
+            complete = ok and not any(is_incomplete(report) for report in reports)
+        else:
+            ok = False
+            event = None
+            async with client.stream("POST", "/api/challenge/stream", json={"code": code, "language": "python"}) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                        if first_event is None:
+                            first_event = time.perf_counter() - start
+                    elif line.startswith("data:") and event == "report":
+                        ok = response.status_code == 200
+                        reports = [json.loads(line[len("data:"):])["report"]]
+                        complete = not is_incomplete(reports[0])
+    except httpx.HTTPError:
+        ok = False
+    prompt_tokens = [tokens for tokens in map(arbiter_prompt_tokens, reports) if tokens is not None]
+    return ok, complete, time.perf_counter() - start, first_event, prompt_tokens
+
+
+async def run_scenario(
+    service: ServiceThread,
+    endpoint: str,
+    concurrency: int,
+    lines: int,
+    requests: int
+) -> Dict[str, Any]:
+    """Exécute un scénario et calcule ses mesures"""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    timeout = httpx.Timeout(600.0)
+    
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{service.port}", limits=limits, timeout=timeout) as client:
+        async def one(index: int):
+            # Code unique par requête : aucune réponse servie par un cache
+            code = make_code(lines, f"{endpoint}-{concurrency}-{lines}-{index}-{time.time_ns()}")
+            async with semaphore:
+                return await send(client, endpoint, code)
+        
+        service.lag_samples.clear()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(index) for index in range(requests)))
+        wall = time.perf_counter() - start
+        lags = list(service.lag_samples)
+    
+    latencies = [latency for ok, _, latency, _, _ in results if ok]
+    first_events = [first for ok, _, _, first, _ in results if ok and first is not None]
+    arbiter_tokens = [tokens for ok, _, _, _, prompt_tokens in results if ok for tokens in prompt_tokens]
+    units = BATCH_FILES if endpoint == "batch" else 1
+    metrics = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "lines": lines,
+        "requests": requests,
+        "errors": sum(1 for ok, _, _, _, _ in results if not ok),
+        "incomplete": sum(1 for ok, complete, _, _, _ in results if ok and not complete),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "pipelines_per_second": round(len(latencies) * units / wall, 3) if wall else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if first_events:
+        metrics["first_event_p50"] = round(percentile(first_events, 50), 4)
+    if arbiter_tokens:
+        metrics["arbiter_prompt_tokens_p50"] = round(percentile(arbiter_tokens, 50))
+    return metrics
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Compare les scénarios communs à une référence
+    
+    Args:
+        results: Résultats de l'exécution courante
+        baseline: Résultats de référence
+        tolerance: Écart relatif toléré (0.25 = 25 %)
+    
+    Returns:
+        Descriptions des régressions (vide si aucune)
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        if reference["latency_p95"] and current["latency_p95"] > reference["latency_p95"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: latence p95 {current['latency_p95']}s > {reference['latency_p95']}s (+{tolerance:.0%} toléré)"
+            )
+        if current["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: débit {current['throughput_rps']} req/s < {reference['throughput_rps']} req/s (-{tolerance:.0%} toléré)"
+            )
+        for key, label in (("errors", "erreur(s)"), ("incomplete", "rapport(s) incomplet(s)")):
+            if current.get(key, 0) > reference.get(key, 0):
+                regressions.append(f"{name}: {current[key]} {label} contre {reference.get(key, 0)}")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Benchmarks du service contre un Ollama factice")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="challenge, stream, batch")
+    parser.add_argument("--concurrency", default="1,4,16", help="Niveaux de concurrence")
+    parser.add_argument("--sizes", default="50,1000", help="Tailles d'entrée (lignes)")
+    parser.add_argument("--requests", type=int, default=32, help="Requêtes par scénario")
+    parser.add_argument("--save", help="Enregistre les résultats (référence JSON)")
+    parser.add_argument("--compare", help="Compare à une référence JSON (code de sortie 1 si régression)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Écart relatif toléré par --compare")
+    parser.add_argument("--compaction", action="store_true", help="Active la compaction des sorties transmises aux rôles aval")
+    parser.add_argument("--verbose", action="store_true", help="Affiche les journaux du service")
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    endpoints = [name for name in args.endpoints.split(",") if name]
+    for name in endpoints:
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Endpoint inconnu: {name} (attendu : {', '.join(ENDPOINTS)})")
+    levels = [int(value) for value in args.concurrency.split(",")]
+    sizes = [int(value) for value in args.sizes.split(",")]
+    mock_settings = settings_from_args(args)
+    out = sys.stdout
+    
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        workdir = Path(workdir)
+        mock_port = free_port()
+        mock = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.mock_ollama", "--port", str(mock_port), *mock_arguments(args)],
+            cwd=PROJECT_ROOT
+        )
+        service = None
+        try:
+            mock_url = f"http://127.0.0.1:{mock_port}"
+            wait_for(f"{mock_url}/api/tags")
+            config_path = workdir / "config.yaml"
+            write_config(config_path, mock_url, mock_settings.models[0], max(levels), workdir, args.compaction)
+            
+            # Les journaux du service (un print par rôle) faussent les mesures
+            logs = open(os.devnull, "w") if not args.verbose else None
+            with contextlib.redirect_stdout(logs) if logs else contextlib.nullcontext():
+                service = ServiceThread(config_path, free_port())
+                service.start()
+                scenarios = {}
+                for endpoint in endpoints:
+                    for lines in sizes:
+                        for concurrency in levels:
+                            name = f"{endpoint}/c{concurrency}/l{lines}"
+                            metrics = asyncio.run(
+                                run_scenario(service, endpoint, concurrency, lines, max(args.requests, concurrency))
+                            )
+                            scenarios[name] = metrics
+                            print(
+                                f"{name:<28} {metrics['throughput_rps']:>8.2f} req/s  "
+                                f"p50 {metrics['latency_p50']:.3f}s  p95 {metrics['latency_p95']:.3f}s  "
+                                f"p99 {metrics['latency_p99']:.3f}s  erreurs {metrics['errors']}/{metrics['incomplete']}  "
+                                f"lag p99 {metrics['loop_lag_p99_ms']}ms  RSS {metrics['rss_mb']}Mo  "
+                                f"arbiter {metrics.get('arbiter_prompt_tokens_p50', '-')} tok",
+                                file=out, flush=True
+                            )
+        finally:
+            if service is not None:
+                service.stop()
+            mock.terminate()
+            mock.wait(timeout=10)
+    
+    results = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mock": asdict(mock_settings),
+            "requests": args.requests,
+            "compaction": args.compaction,
+        },
+        "scenarios": scenarios,
+    }
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Résultats enregistrés dans {args.save}", file=out)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}", file=out)
+        if regressions:
+            return 1
+        print(f"Aucune régression par rapport à {args.compare}", file=out)
+    return 0
+
+
+def mock_arguments(args: argparse.Namespace) -> list[str]:
+    """Options de comportement à transmettre au serveur factice"""
+    return [
+        "--latency", str(args.latency),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--response-tokens", str(args.response_tokens),
+        "--failure-rate", str(args.failure_rate),
+        "--failure-status", str(args.failure_status),
+        "--models", args.models,
+        "--seed", str(args.seed),
+    ]
+
+
+def wait_for(url: str, timeout: float = 30):
+    """Attend qu'une URL réponde"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(url, timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} injoignable")
+            time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
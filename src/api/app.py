@@ -2,36 +2,42 @@
 Application FastAPI principale
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-from src.api.routes import router, set_orchestrator, set_ollama_client
+from typing import Optional
+from src.api.routes import (
+    router, set_orchestrator, get_orchestrator, set_ollama_client, set_job_scheduler, set_model_keeper,
+    get_model_keeper, set_config_reloader, set_admission_controller
+)
 from src.api.middleware import setup_cors
 from src.config.loader import ConfigLoader
 from src.core.orchestrator import PipelineOrchestrator
-from src.core.ollama_client import OllamaClient
+from src.core.batch import resolve_concurrency
+from src.core.jobs import JobScheduler, JobStore
+from src.core.warmup import ModelKeeper
+from src.core.reload import ConfigReloader
+from src.core.admission import AdmissionController
 
 
-def create_app() -> FastAPI:
+CONFIG_PATH = "config/config.yaml"
+
+
+def create_app(config_path: str = CONFIG_PATH) -> FastAPI:
     """
     Crée et configure l'application FastAPI
     
+    Args:
+        config_path: Chemin vers le fichier de configuration
+    
     Returns:
         Application FastAPI configurée
     """
-    app = FastAPI(
-        title="Code Challenger Local",
-        description="Outil local pour challenger et améliorer du code source",
-        version="0.1.0"
-    )
-    
-    # Configuration CORS
-    setup_cors(app)
-    
     # Charger la configuration
     try:
-        config_loader = ConfigLoader("config/config.yaml")
+        config_loader = ConfigLoader(config_path)
         config = config_loader.load()
     except Exception as e:
         print(f"⚠️  Erreur lors du chargement de la configuration: {e}")
@@ -39,15 +45,90 @@ def create_app() -> FastAPI:
         config = None
     
     # Initialiser l'orchestrateur si la config est valide
+    orchestrator = None
     if config:
         orchestrator = PipelineOrchestrator(config)
-        ollama_client = OllamaClient(
-            base_url=config.ollama_base_url,
-            timeout=config.ollama_timeout
-        )
         
         set_orchestrator(orchestrator)
-        set_ollama_client(ollama_client)
+        # Le health check réutilise le pool d'instances de l'orchestrateur
+        set_ollama_client(orchestrator.async_client)
+        
+        # Contrôle d'admission des requêtes interactives (pris en compte au démarrage)
+        set_admission_controller(AdmissionController.from_settings(
+            config.settings, capacity=orchestrator.async_client.capacity
+        ))
+    
+    # File de jobs persistante (POST /api/jobs)
+    job_scheduler = None
+    if config:
+        jobs_settings = config.settings.get("jobs") or {}
+        if jobs_settings.get("enabled", True):
+            retention_days = jobs_settings.get("retention_days", 7)
+            job_scheduler = JobScheduler(
+                store=JobStore(jobs_settings.get("path", ".cache/jobs.sqlite3")),
+                get_orchestrator=get_orchestrator,
+                max_concurrent=jobs_settings.get("max_concurrent") or resolve_concurrency(
+                    config.settings, capacity=orchestrator.async_client.capacity
+                ),
+                retention_seconds=retention_days * 86400 if retention_days else None
+            )
+            set_job_scheduler(job_scheduler)
+    
+    # Préchargement des modèles et maintien en mémoire
+    model_keeper = None
+    if orchestrator is not None:
+        model_keeper = ModelKeeper.from_config(config, orchestrator.async_client)
+        if model_keeper is not None:
+            set_model_keeper(model_keeper)
+    
+    # Rechargement à chaud : POST /api/admin/reload et surveillance du fichier
+    config_reloader = None
+    if orchestrator is not None:
+        def publish(new_orchestrator: PipelineOrchestrator, new_keeper: Optional[ModelKeeper]):
+            set_orchestrator(new_orchestrator)
+            set_ollama_client(new_orchestrator.async_client)
+            set_model_keeper(new_keeper)
+        
+        config_reloader = ConfigReloader(config_path, orchestrator, model_keeper, on_swap=publish)
+        set_config_reloader(config_reloader)
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Health checks périodiques des instances Ollama
+        if orchestrator is not None:
+            await orchestrator.async_client.start()
+        # Le préchargement tourne en tâche de fond : le serveur répond pendant
+        # le chargement des modèles (voir /api/health)
+        if model_keeper is not None:
+            await model_keeper.start()
+        if job_scheduler is not None:
+            await job_scheduler.start()
+        if config_reloader is not None:
+            await config_reloader.start()
+        yield
+        # Après un rechargement, l'orchestrateur et le gardien courants ont remplacé ceux du démarrage
+        if config_reloader is not None:
+            await config_reloader.stop()
+        if get_model_keeper() is not None:
+            await get_model_keeper().stop()
+        if job_scheduler is not None:
+            await job_scheduler.stop()
+            job_scheduler.store.close()
+        # Fermer proprement les connexions HTTP vers Ollama et l'historique des rapports
+        if get_orchestrator() is not None:
+            await get_orchestrator().aclose()
+            if get_orchestrator().reports is not None:
+                get_orchestrator().reports.close()
+    
+    app = FastAPI(
+        title="Code Challenger Local",
+        description="Outil local pour challenger et améliorer du code source",
+        version="0.1.0",
+        lifespan=lifespan
+    )
+    
+    # Configuration CORS
+    setup_cors(app)
     
     # Enregistrer les routes API
     app.include_router(router, prefix="/api", tags=["api"])
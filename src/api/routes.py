@@ -2,13 +2,25 @@
 Routes API pour Code Challenger Local
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 from src.core.orchestrator import PipelineOrchestrator
 from src.core.models import Context, Report
-from src.core.ollama_client import OllamaClient
-from src.utils.errors import PipelineError, OllamaError
+from src.core.ollama_pool import OllamaPool
+from src.core.batch import BatchItem, run_batch, summarize, resolve_concurrency, extract_archive, detect_language
+from src.core.jobs import JobScheduler, JobNotFoundError, MIN_PRIORITY, MAX_PRIORITY
+from src.core.warmup import ModelKeeper
+from src.core.reload import ConfigReloader
+from src.core.reports import ReportStore, ReportQueryError
+from src.core.admission import AdmissionController, AdmissionRejected, Ticket
+from src.core.metrics import REGISTRY
+from src.utils.errors import PipelineError, OllamaError, ConfigError
 
 
 router = APIRouter()
@@ -27,15 +39,62 @@ class ChallengeResponse(BaseModel):
     report: Dict[str, Any]
 
 
+class IncrementalRequest(BaseModel):
+    """Requête de ré-analyse d'une nouvelle version d'un code"""
+    code: str
+    language: Optional[str] = "python"
+    context: Optional[Dict[str, Any]] = None
+    previous_job_id: Optional[str] = None
+    previous_code: Optional[str] = None
+
+
+class BatchFile(BaseModel):
+    """Fichier d'un lot"""
+    path: str
+    code: str
+    language: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    """Requête pour lancer un challenge sur un lot de fichiers"""
+    files: List[BatchFile]
+    language: Optional[str] = None
+    concurrency: Optional[int] = None
+
+
+class BatchResponse(BaseModel):
+    """Réponse d'un challenge sur un lot"""
+    status: str
+    summary: Dict[str, Any]
+    results: List[Dict[str, Any]]
+
+
+class JobRequest(BaseModel):
+    """Requête de soumission d'un job"""
+    code: str
+    language: Optional[str] = "python"
+    context: Optional[Dict[str, Any]] = None
+    priority: int = Field(0, ge=MIN_PRIORITY, le=MAX_PRIORITY)
+    previous_job_id: Optional[str] = None
+
+
 class HealthResponse(BaseModel):
     """Réponse du health check"""
     status: str
     ollama_available: bool
+    resident_models: List[str] = []
+    missing_models: List[str] = []
+    endpoints: List[Dict[str, Any]] = []
+    admission: Optional[Dict[str, Any]] = None
 
 
 # Variable globale pour l'orchestrateur (sera initialisée dans app.py)
 _orchestrator: Optional[PipelineOrchestrator] = None
-_ollama_client: Optional[OllamaClient] = None
+_ollama_client: Optional[OllamaPool] = None
+_job_scheduler: Optional[JobScheduler] = None
+_model_keeper: Optional[ModelKeeper] = None
+_config_reloader: Optional[ConfigReloader] = None
+_admission: Optional[AdmissionController] = None
 
 
 def set_orchestrator(orchestrator: PipelineOrchestrator):
@@ -44,22 +103,128 @@ def set_orchestrator(orchestrator: PipelineOrchestrator):
     _orchestrator = orchestrator
 
 
-def set_ollama_client(client: OllamaClient):
-    """Définit le client Ollama global"""
+def get_orchestrator() -> Optional[PipelineOrchestrator]:
+    """Retourne l'orchestrateur global courant"""
+    return _orchestrator
+
+
+def set_job_scheduler(scheduler: JobScheduler):
+    """Définit le planificateur de jobs global"""
+    global _job_scheduler
+    _job_scheduler = scheduler
+
+
+def set_model_keeper(keeper: Optional[ModelKeeper]):
+    """Définit le gardien des modèles global"""
+    global _model_keeper
+    _model_keeper = keeper
+
+
+def get_model_keeper() -> Optional[ModelKeeper]:
+    """Retourne le gardien des modèles global courant"""
+    return _model_keeper
+
+
+def set_config_reloader(reloader: ConfigReloader):
+    """Définit le rechargement de configuration global"""
+    global _config_reloader
+    _config_reloader = reloader
+
+
+def set_ollama_client(client: OllamaPool):
+    """Définit le pool d'instances Ollama global"""
     global _ollama_client
     _ollama_client = client
 
 
+def set_admission_controller(controller: Optional[AdmissionController]):
+    """Définit le contrôle d'admission global (None = désactivé)"""
+    global _admission
+    _admission = controller
+
+
+def _rejection(error: AdmissionRejected) -> HTTPException:
+    """Convertit un refus d'admission en réponse 429/503 avec l'en-tête Retry-After"""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+async def _acquire(request: Request, weight: int = 1, cost: float = 1.0) -> Optional[Ticket]:
+    """
+    Admet une requête auprès du contrôle d'admission
+    
+    Args:
+        request: Requête HTTP (identification du client)
+        weight: Pipelines simultanés de la requête
+        cost: Jetons consommés dans le seau du client
+    
+    Returns:
+        Ticket à rendre avec _release(), ou None si le contrôle est désactivé
+    
+    Raises:
+        HTTPException: 429 ou 503 (avec Retry-After) si la requête est refusée
+    """
+    if _admission is None:
+        return None
+    try:
+        return await _admission.acquire(_client_id(request), weight, cost)
+    except AdmissionRejected as e:
+        raise _rejection(e) from e
+
+
+def _release(ticket: Optional[Ticket]):
+    """Rend les places d'une requête admise"""
+    if _admission is not None and ticket is not None:
+        _admission.release(ticket)
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """
+    Flux dont la place d'admission est rendue quand la réponse se termine
+    
+    La place est rendue même si le corps n'est jamais parcouru (client
+    déconnecté avant le premier envoi) : le finally du générateur ne
+    s'exécute pas dans ce cas, ni une tâche de fond après ClientDisconnect.
+    """
+    
+    def __init__(self, content, ticket: Optional[Ticket], **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _release(self.ticket)
+
+
+@asynccontextmanager
+async def _admitted(request: Request, weight: int = 1, cost: float = 1.0):
+    """Admet une requête pour la durée du bloc (voir _acquire)"""
+    ticket = await _acquire(request, weight, cost)
+    try:
+        yield ticket
+    finally:
+        _release(ticket)
+
+
 @router.post("/challenge", response_model=ChallengeResponse)
-async def challenge_code(request: ChallengeRequest):
+async def challenge_code(request: ChallengeRequest, http_request: Request):
     """
     Lance le pipeline de challenge sur le code fourni
     
     Args:
         request: Requête contenant le code et le contexte
+        http_request: Requête HTTP (identification du client pour l'admission)
         
     Returns:
         Rapport complet du pipeline
+    
+    Raises:
+        HTTPException: 429 ou 503 avec Retry-After si la requête n'est pas admise
     """
     import time
     start_time = time.time()
@@ -80,9 +245,10 @@ async def challenge_code(request: ChallengeRequest):
             constraints=request.context
         )
         
-        print(f"[API] Démarrage du pipeline...")
-        # Exécuter le pipeline
-        report: Report = _orchestrator.run_pipeline(request.code, context)
+        async with _admitted(http_request):
+            print(f"[API] Démarrage du pipeline...")
+            # Exécuter le pipeline (asynchrone : ne bloque pas le worker)
+            report: Report = await _orchestrator.run_pipeline_async(request.code, context)
         
         duration = time.time() - start_time
         print(f"[API] Pipeline terminé en {duration:.2f}s")
@@ -92,6 +258,8 @@ async def challenge_code(request: ChallengeRequest):
             report=report.to_dict()
         )
         
+    except HTTPException:
+        raise
     except PipelineError as e:
         raise HTTPException(
             status_code=500,
@@ -104,21 +272,516 @@ async def challenge_code(request: ChallengeRequest):
         ) from e
 
 
+@router.post("/challenge/incremental", response_model=ChallengeResponse)
+async def challenge_incremental(request: IncrementalRequest, http_request: Request):
+    """
+    Ré-analyse une nouvelle version d'un code : seules les fonctions et
+    classes modifiées passent par les rôles, les autres réutilisent les
+    résultats en cache
+    
+    La version précédente est celle d'un job (previous_job_id) ou fournie
+    directement (previous_code) ; elle sert à signaler les unités modifiées.
+    
+    Args:
+        request: Nouvelle version du code, langage, contexte et version précédente
+        http_request: Requête HTTP (identification du client pour l'admission)
+        
+    Returns:
+        Rapport fusionné (report.metrics.incremental : unités ré-analysées et réutilisées)
+    """
+    if _orchestrator is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Orchestrateur non initialisé"
+        )
+    
+    previous_code = request.previous_code
+    if request.previous_job_id is not None:
+        try:
+            previous_code = _require_job_scheduler().get(request.previous_job_id).code
+        except JobNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+    
+    context = Context(
+        language=request.language or "python",
+        constraints=request.context
+    )
+    try:
+        async with _admitted(http_request):
+            report = await _orchestrator.run_incremental_async(request.code, context, previous_code)
+    except PipelineError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de l'exécution du pipeline: {str(e)}"
+        ) from e
+    
+    return ChallengeResponse(
+        status="success",
+        report=report.to_dict()
+    )
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    """
+    Formate un événement du pipeline au format Server-Sent Events
+    
+    Args:
+        event: Événement (dictionnaire avec une clé "type")
+        
+    Returns:
+        Bloc SSE prêt à être envoyé
+    """
+    payload = json.dumps(event, ensure_ascii=False)
+    return f"event: {event['type']}\ndata: {payload}\n\n"
+
+
+@router.post("/challenge/stream")
+async def challenge_code_stream(request: ChallengeRequest, http_request: Request):
+    """
+    Lance le pipeline de challenge et diffuse la progression en Server-Sent Events
+    
+    Événements émis : role_start, token, role_end, role_error, puis report
+    (rapport final) ou error. L'admission est décidée avant l'ouverture du
+    flux (429 ou 503 avec Retry-After) ; la place est rendue à sa fermeture.
+    
+    Args:
+        request: Requête contenant le code et le contexte
+        http_request: Requête HTTP (identification du client pour l'admission)
+        
+    Returns:
+        Flux text/event-stream
+    """
+    print(f"[API] Requête streaming reçue - Langage: {request.language}, Code length: {len(request.code)}")
+    
+    if _orchestrator is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Orchestrateur non initialisé"
+        )
+    
+    context = Context(
+        language=request.language or "python",
+        constraints=request.context
+    )
+    orchestrator = _orchestrator
+    ticket = await _acquire(http_request)
+    
+    async def event_source():
+        try:
+            async for event in orchestrator.run_pipeline_stream(request.code, context):
+                yield _format_sse(event)
+        except PipelineError as e:
+            yield _format_sse({
+                "type": "error",
+                "message": f"Erreur lors de l'exécution du pipeline: {str(e)}"
+            })
+        except Exception as e:
+            yield _format_sse({"type": "error", "message": f"Erreur inattendue: {str(e)}"})
+    
+    return _AdmittedStreamingResponse(
+        event_source(),
+        ticket,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+async def _run_batch_request(
+    request: Request,
+    items: List[BatchItem],
+    concurrency: Optional[int]
+) -> BatchResponse:
+    """
+    Exécute un lot de fichiers et construit la réponse agrégée
+    
+    Le lot occupe autant de places d'admission que de pipelines simultanés
+    et consomme un jeton par fichier (au plus la réserve du client).
+    
+    Args:
+        request: Requête HTTP (identification du client pour l'admission)
+        items: Fichiers à analyser
+        concurrency: Concurrence demandée par le client (bornée par la configuration)
+        
+    Returns:
+        Résultats par fichier et synthèse des verdicts
+    """
+    if _orchestrator is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Orchestrateur non initialisé"
+        )
+    
+    settings = _orchestrator.config.settings
+    max_files = (settings.get("batch") or {}).get("max_files", 500)
+    if not items:
+        raise HTTPException(status_code=400, detail="Aucun fichier à analyser")
+    if len(items) > max_files:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Trop de fichiers: {len(items)} (maximum {max_files})"
+        )
+    
+    limit = resolve_concurrency(settings, concurrency, capacity=_orchestrator.async_client.capacity)
+    limit = min(limit, len(items))
+    print(f"[API] Lot reçu - {len(items)} fichier(s), concurrence: {limit}")
+    start_time = time.time()
+    
+    async with _admitted(request, weight=limit, cost=len(items)) as ticket:
+        if ticket is not None:
+            limit = ticket.weight
+        results = await run_batch(_orchestrator, items, concurrency=limit)
+    
+    summary = summarize(results)
+    summary["concurrency"] = limit
+    summary["duration"] = round(time.time() - start_time, 3)
+    print(f"[API] Lot terminé en {summary['duration']:.2f}s")
+    
+    return BatchResponse(
+        status="success",
+        summary=summary,
+        results=[result.to_dict() for result in results]
+    )
+
+
+@router.post("/challenge/batch", response_model=BatchResponse)
+async def challenge_batch(request: BatchRequest, http_request: Request):
+    """
+    Lance le pipeline sur une liste de fichiers avec une concurrence bornée
+    
+    Args:
+        request: Fichiers à analyser, langage par défaut et concurrence souhaitée
+        http_request: Requête HTTP (identification du client pour l'admission)
+        
+    Returns:
+        Rapport par fichier et synthèse des verdicts
+    """
+    items = [
+        BatchItem(
+            path=f.path,
+            code=f.code,
+            language=f.language or request.language or detect_language(f.path)
+        )
+        for f in request.files
+    ]
+    return await _run_batch_request(http_request, items, request.concurrency)
+
+
+@router.post("/challenge/batch/archive", response_model=BatchResponse)
+async def challenge_batch_archive(request: Request, concurrency: Optional[int] = None):
+    """
+    Lance le pipeline sur les fichiers source d'une archive zip ou tar
+    
+    L'archive est envoyée brute dans le corps de la requête
+    (application/zip, application/x-tar, application/gzip...).
+    
+    Args:
+        request: Requête HTTP dont le corps contient l'archive
+        concurrency: Concurrence souhaitée (bornée par la configuration)
+        
+    Returns:
+        Rapport par fichier et synthèse des verdicts
+    """
+    if _orchestrator is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Orchestrateur non initialisé"
+        )
+    
+    batch_settings = _orchestrator.config.settings.get("batch") or {}
+    data = await request.body()
+    try:
+        items = extract_archive(
+            data,
+            max_files=batch_settings.get("max_files", 500),
+            max_file_bytes=batch_settings.get("max_file_bytes", 1_000_000)
+        )
+    except PipelineError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    
+    return await _run_batch_request(request, items, concurrency)
+
+
+def _client_id(request: Request) -> str:
+    """Identifie le client (en-tête X-Client-Id, sinon adresse IP)"""
+    header = request.headers.get("X-Client-Id")
+    if header:
+        return header
+    return request.client.host if request.client else "anonymous"
+
+
+def _require_job_scheduler() -> JobScheduler:
+    """Retourne le planificateur de jobs ou lève une erreur 503"""
+    if _job_scheduler is None:
+        raise HTTPException(
+            status_code=503,
+            detail="File de jobs non disponible"
+        )
+    return _job_scheduler
+
+
+def _job_response(scheduler: JobScheduler, job_id: str) -> Dict[str, Any]:
+    """Construit la représentation API d'un job"""
+    try:
+        job = scheduler.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    data = job.to_dict()
+    data["queue_position"] = scheduler.position(job_id)
+    return data
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(job_request: JobRequest, request: Request):
+    """
+    Soumet un challenge à la file de jobs et retourne immédiatement son identifiant
+    
+    Args:
+        job_request: Code, langage, contexte, priorité et, pour une analyse
+            incrémentale, job de la version précédente
+        request: Requête HTTP (identification du client)
+        
+    Returns:
+        Identifiant et état initial du job
+    
+    Raises:
+        HTTPException: 429 avec Retry-After si le client a dépassé son débit
+    """
+    scheduler = _require_job_scheduler()
+    if _admission is not None:
+        # La file de jobs borne elle-même sa concurrence : seul le débit est limité
+        try:
+            _admission.check_rate(_client_id(request))
+        except AdmissionRejected as e:
+            raise _rejection(e) from e
+    if job_request.previous_job_id is not None:
+        try:
+            scheduler.get(job_request.previous_job_id)
+        except JobNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+    job = await scheduler.submit(
+        code=job_request.code,
+        language=job_request.language or "python",
+        constraints=job_request.context,
+        priority=job_request.priority,
+        client_id=_client_id(request),
+        previous_job_id=job_request.previous_job_id
+    )
+    return _job_response(scheduler, job.id)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Retourne l'état d'un job et les sorties partielles de chaque rôle
+    
+    Args:
+        job_id: Identifiant du job
+        
+    Returns:
+        État du job (et rapport final une fois terminé)
+    """
+    return _job_response(_require_job_scheduler(), job_id)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Annule un job en attente ou en cours d'exécution
+    
+    Args:
+        job_id: Identifiant du job
+        
+    Returns:
+        État du job après annulation
+    """
+    scheduler = _require_job_scheduler()
+    try:
+        scheduler.cancel(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return _job_response(scheduler, job_id)
+
+
+@router.post("/admin/reload")
+async def reload_config():
+    """
+    Recharge config/config.yaml sans redémarrer le serveur
+    
+    Les pipelines en cours se terminent avec la configuration avec laquelle
+    ils ont démarré ; les nouvelles requêtes utilisent la nouvelle.
+    
+    Returns:
+        Résultat du rechargement (sections modifiées, modèles préchargés)
+    """
+    if _config_reloader is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Rechargement de la configuration non disponible"
+        )
+    try:
+        return await _config_reloader.reload()
+    except ConfigError as e:
+        raise HTTPException(status_code=400, detail=f"Configuration invalide: {e}") from e
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Retourne les compteurs du cache de résultats
+    
+    Returns:
+        Nombre d'entrées et hits/misses par espace de noms
+    """
+    if _orchestrator is None or _orchestrator.cache is None:
+        return {"enabled": False}
+    return _orchestrator.cache.stats()
+
+
+@router.get("/reports")
+async def list_reports(
+    verdict: Optional[str] = None,
+    language: Optional[str] = None,
+    q: Optional[str] = None,
+    code_hash: Optional[str] = None,
+    model: Optional[str] = None,
+    min_severity: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=ReportStore.MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Recherche dans l'historique des rapports, du plus récent au plus ancien
+    
+    Exemple : /api/reports?verdict=REFUSÉ&language=python&q=sql+injection
+    
+    Returns:
+        Total des rapports correspondants et page de métadonnées
+    """
+    store = _require_report_store()
+    try:
+        return await asyncio.to_thread(
+            store.query,
+            verdict=verdict,
+            language=language,
+            q=q,
+            code_hash=code_hash,
+            model=model,
+            min_severity=min_severity,
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset
+        )
+    except ReportQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get("/reports/stats")
+async def report_stats(days: int = Query(30, ge=1, le=3650)):
+    """
+    Tendances de l'historique : verdicts et durée moyenne par jour, catégories fréquentes
+    
+    Args:
+        days: Nombre de jours couverts
+    
+    Returns:
+        Statistiques de la période
+    """
+    return await asyncio.to_thread(_require_report_store().stats, days)
+
+
+@router.get("/reports/{report_id}")
+async def get_report(report_id: str):
+    """
+    Retourne un rapport de l'historique avec ses constats
+    
+    Args:
+        report_id: Identifiant du rapport (metrics.report_id)
+    
+    Returns:
+        Métadonnées, rapport, constats et code analysé (absent une fois compacté)
+    """
+    result = await asyncio.to_thread(_require_report_store().get, report_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Rapport inconnu: {report_id}")
+    return result
+
+
+@router.post("/admin/reports/retention")
+async def apply_report_retention():
+    """
+    Applique immédiatement la rétention et la compaction de l'historique
+    
+    Returns:
+        Nombre de rapports supprimés et compactés
+    """
+    return await asyncio.to_thread(_require_report_store().apply_retention)
+
+
+def _require_report_store() -> ReportStore:
+    """Retourne l'historique des rapports ou lève une erreur 503"""
+    if _orchestrator is None or _orchestrator.reports is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Historique des rapports désactivé (settings.reports.enabled)"
+        )
+    return _orchestrator.reports
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Expose les métriques au format texte Prometheus
+    
+    Durées par étape et par rôle (rendu, attente HTTP, premier token,
+    génération, chargement, prefill, décodage), tokens évalués et générés,
+    débit de décodage et durée des pipelines.
+    
+    Returns:
+        Métriques au format d'exposition Prometheus 0.0.4
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Vérifie la santé de l'API et la disponibilité d'Ollama
     
+    Si le préchargement est actif, indique aussi les modèles chargés en
+    mémoire et les modèles configurés qui ne le sont pas (démarrage à froid).
+    L'état de chaque instance Ollama du pool est détaillé dans endpoints,
+    celui du contrôle d'admission (places occupées, file d'attente) dans admission.
+    Les informations proviennent de l'instantané des health checks de fond :
+    la réponse ne contacte Ollama que si cet instantané a expiré.
+    
     Returns:
         Statut de santé
     """
     ollama_available = False
     
+    endpoints = []
+    running = None
     if _ollama_client is not None:
-        ollama_available = _ollama_client.health_check()
+        snapshot = await _ollama_client.health_snapshot()
+        running = snapshot.running
+        ollama_available = _ollama_client.available()
+        endpoints = _ollama_client.status()
+    
+    models_status = {}
+    if _model_keeper is not None and ollama_available:
+        models_status = _model_keeper.status(running)
     
     return HealthResponse(
         status="ok",
-        ollama_available=ollama_available
+        ollama_available=ollama_available,
+        resident_models=models_status.get("resident_models", []),
+        missing_models=models_status.get("missing_models", []),
+        endpoints=endpoints,
+        admission=_admission.stats() if _admission is not None else None
     )
 
@@ -0,0 +1,400 @@
+"""
+Audit en ligne de commande (CI) : analyse des fichiers d'un chemin, d'un glob ou d'un diff git, sans serveur web
+
+    python -m src.cli src/ "scripts/**/*.py" --json rapport.json
+    python -m src.cli --git-diff origin/main...HEAD --sarif resultats.sarif
+
+Le code de sortie vaut 0 si aucun fichier n'est bloquant, 1 si un verdict
+atteint --fail-on (REFUSÉ par défaut), 2 en cas d'erreur (configuration,
+Ollama indisponible, fichier dont le pipeline a échoué).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, TextIO
+from src.config.loader import ConfigLoader
+from src.core.batch import (
+    BatchItem, BatchResult, LANGUAGE_BY_EXTENSION, detect_language, resolve_concurrency, run_batch, summarize
+)
+from src.core.models import Verdict, VERDICT_SEVERITY
+from src.core.orchestrator import PipelineOrchestrator
+from src.core.reports import extract_findings
+from src.utils.errors import CodeChallengerError, PipelineError
+
+
+CONFIG_PATH = "config/config.yaml"
+
+# Codes de sortie
+EXIT_OK = 0
+EXIT_BLOCKING = 1
+EXIT_ERROR = 2
+
+# Verdict à partir duquel l'audit échoue (--fail-on)
+FAIL_ON = {
+    "refused": Verdict.REFUSE,
+    "reserves": Verdict.ACCEPTE_AVEC_RESERVES,
+    "never": None,
+}
+
+# Répertoires ignorés lors du parcours d'un dossier
+IGNORED_DIRS = {".git", ".hg", ".svn", ".cache", ".venv", "venv", "node_modules", "__pycache__", "dist", "build"}
+
+# Niveau SARIF d'un constat selon sa gravité, et d'un verdict
+SARIF_LEVELS = {"critical": "error", "high": "error", "medium": "warning", "low": "note", "none": "note"}
+SARIF_VERDICT_LEVELS = {Verdict.REFUSE: "error", Verdict.ACCEPTE_AVEC_RESERVES: "warning"}
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def git_changed_files(diff_range: str, cwd: str = ".") -> list[str]:
+    """
+    Fichiers modifiés d'un diff git (hors fichiers supprimés)
+    
+    Args:
+        diff_range: Plage passée à git diff (ex : "origin/main...HEAD", "HEAD")
+        cwd: Répertoire du dépôt
+    
+    Returns:
+        Chemins relatifs au répertoire courant
+    
+    Raises:
+        PipelineError: Si la commande git échoue
+    """
+    try:
+        root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        names = subprocess.run(
+            ["git", "diff", "--name-only", "--diff-filter=ACMR", *diff_range.split()],
+            cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = (getattr(e, "stderr", "") or str(e)).strip().splitlines()
+        raise PipelineError(f"git diff {diff_range} en échec: {detail[0] if detail else e}") from e
+    return [os.path.relpath(os.path.join(root, name), cwd) for name in names if name]
+
+
+def collect_files(
+    patterns: list[str],
+    diff_range: Optional[str] = None,
+    max_files: int = 500,
+    max_file_bytes: int = 1_000_000
+) -> list[BatchItem]:
+    """
+    Rassemble les fichiers à analyser
+    
+    Un motif peut être un fichier, un dossier (parcouru récursivement, hors
+    IGNORED_DIRS) ou un glob ("**" récursif). Avec un diff git, seuls les
+    fichiers modifiés sont retenus (et, si des motifs sont donnés, ceux qui
+    s'y trouvent). Seuls les fichiers d'extension reconnue, décodables en
+    UTF-8 et non vides sont analysés ; les fichiers trop volumineux sont
+    ignorés.
+    
+    Args:
+        patterns: Fichiers, dossiers ou globs
+        diff_range: Plage git diff (None = pas de filtre git)
+        max_files: Nombre maximal de fichiers
+        max_file_bytes: Taille maximale d'un fichier
+    
+    Returns:
+        Fichiers à analyser, triés par chemin
+    
+    Raises:
+        PipelineError: Si git échoue ou si le nombre de fichiers dépasse max_files
+    """
+    paths: set[str] = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                for directory, dirnames, filenames in os.walk(match):
+                    dirnames[:] = [name for name in dirnames if name not in IGNORED_DIRS]
+                    paths.update(os.path.join(directory, name) for name in filenames)
+            elif os.path.isfile(match):
+                paths.add(match)
+            else:
+                print(f"[CLI] ⚠️ Aucun fichier pour {pattern}", file=sys.stderr)
+    
+    if diff_range is not None:
+        changed = {os.path.normpath(path) for path in git_changed_files(diff_range)}
+        if patterns:
+            paths = {path for path in paths if os.path.normpath(path) in changed}
+        else:
+            paths = changed
+    
+    items = []
+    for path in sorted(os.path.normpath(path) for path in paths):
+        if Path(path).suffix.lower() not in LANGUAGE_BY_EXTENSION or not os.path.isfile(path):
+            continue
+        if os.path.getsize(path) > max_file_bytes:
+            print(f"[CLI] ⚠️ Fichier ignoré (plus de {max_file_bytes} octets): {path}", file=sys.stderr)
+            continue
+        try:
+            code = Path(path).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[CLI] ⚠️ Fichier illisible ignoré: {path} ({e})", file=sys.stderr)
+            continue
+        if code.strip():
+            items.append(BatchItem(path=Path(path).as_posix(), code=code, language=detect_language(path)))
+    
+    if len(items) > max_files:
+        raise PipelineError(f"Trop de fichiers: {len(items)} (maximum {max_files})")
+    return items
+
+
+def to_sarif(results: list[BatchResult]) -> Dict[str, Any]:
+    """
+    Résultats au format SARIF 2.1.0 (annotations de revue de code en CI)
+    
+    Chaque constat devient un résultat de la règle "finding" (niveau selon
+    sa gravité, ligne si elle est connue) ; un verdict REFUSÉ ou ACCEPTÉ
+    AVEC RÉSERVES devient un résultat de la règle "verdict". Les fichiers en
+    échec sont signalés dans les notifications de l'exécution.
+    
+    Args:
+        results: Résultats par fichier
+    
+    Returns:
+        Document SARIF
+    """
+    sarif_results = []
+    notifications = []
+    for result in results:
+        location = {"physicalLocation": {"artifactLocation": {"uri": result.path}}}
+        if result.report is None:
+            notifications.append({
+                "level": "error",
+                "message": {"text": f"Analyse en échec: {result.error}"},
+                "locations": [location],
+            })
+            continue
+        
+        level = SARIF_VERDICT_LEVELS.get(result.report.verdict)
+        if level is not None:
+            justification = result.report.arbiter.strip().splitlines()
+            sarif_results.append({
+                "ruleId": "verdict",
+                "level": level,
+                "message": {"text": f"Verdict : {result.report.verdict.value}"
+                            + (f" — {justification[0][:500]}" if justification else "")},
+                "locations": [location],
+            })
+        for finding in extract_findings(result.report):
+            finding_location = location
+            if finding["line"]:
+                finding_location = {
+                    "physicalLocation": {**location["physicalLocation"], "region": {"startLine": finding["line"]}}
+                }
+            sarif_results.append({
+                "ruleId": "finding",
+                "level": SARIF_LEVELS.get(finding["severity"], "warning"),
+                "message": {"text": finding["description"]},
+                "locations": [finding_location],
+                "properties": {
+                    key: finding[key] for key in ("role", "severity", "category") if finding[key]
+                },
+            })
+    
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "code-challenger-local",
+                "rules": [
+                    {"id": "verdict", "shortDescription": {"text": "Verdict de l'Arbiter"}},
+                    {"id": "finding", "shortDescription": {"text": "Constat relevé par le pipeline"}},
+                ],
+            }},
+            "invocations": [{
+                "executionSuccessful": not notifications,
+                "toolExecutionNotifications": notifications,
+            }],
+            "results": sarif_results,
+        }],
+    }
+
+
+def exit_code(summary: Dict[str, Any], results: list[BatchResult], fail_on: Optional[Verdict]) -> int:
+    """
+    Code de sortie de l'audit
+    
+    Args:
+        summary: Synthèse du lot (summarize)
+        results: Résultats par fichier
+        fail_on: Verdict à partir duquel l'audit échoue (None = jamais)
+    
+    Returns:
+        EXIT_ERROR si un fichier a échoué, EXIT_BLOCKING si un verdict
+        atteint fail_on, sinon EXIT_OK
+    """
+    if summary["failed"]:
+        return EXIT_ERROR
+    if fail_on is not None:
+        threshold = VERDICT_SEVERITY.index(fail_on)
+        if any(
+            VERDICT_SEVERITY.index(result.report.verdict) >= threshold
+            for result in results if result.report is not None
+        ):
+            return EXIT_BLOCKING
+    return EXIT_OK
+
+
+async def audit(
+    orchestrator: PipelineOrchestrator,
+    items: list[BatchItem],
+    concurrency: int,
+    progress: Optional[TextIO] = None
+) -> list[BatchResult]:
+    """
+    Exécute le pipeline sur chaque fichier et affiche la progression
+    
+    Args:
+        orchestrator: Orchestrateur utilisé pour chaque fichier
+        items: Fichiers à analyser
+        concurrency: Nombre maximal de pipelines simultanés
+        progress: Flux de la progression (None = silencieux)
+    
+    Returns:
+        Résultats dans l'ordre des fichiers
+    
+    Raises:
+        PipelineError: Si aucune instance Ollama n'est disponible
+    """
+    if not await orchestrator.async_client.health_check():
+        raise PipelineError("Ollama n'est pas disponible (voir providers dans la configuration)")
+    
+    done = 0
+    
+    def on_result(result: BatchResult):
+        nonlocal done
+        done += 1
+        if progress is None:
+            return
+        status = result.report.verdict.value if result.report is not None else f"ÉCHEC ({result.error})"
+        cached = " [cache]" if result.report is not None and result.report.metrics.get("cached") else ""
+        print(f"[{done}/{len(items)}] {result.path} : {status} ({result.duration:.1f}s){cached}", file=progress, flush=True)
+    
+    return await run_batch(orchestrator, items, concurrency=concurrency, on_result=on_result)
+
+
+def write_output(path: str, data: Dict[str, Any], stdout: TextIO):
+    """Écrit un document JSON dans un fichier ("-" = sortie standard)"""
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(text, file=stdout)
+    else:
+        Path(path).write_text(text + "\n", encoding="utf-8")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Options de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Audite des fichiers avec le pipeline Challenger → Reviewer → Arbiter, sans serveur web"
+    )
+    parser.add_argument("paths", nargs="*", help="Fichiers, dossiers ou globs (\"src/**/*.py\")")
+    parser.add_argument(
+        "--git-diff", nargs="?", const="HEAD", metavar="PLAGE",
+        help="Fichiers modifiés d'une plage git diff (ex : origin/main...HEAD ; sans valeur : HEAD)"
+    )
+    parser.add_argument("--config", default=CONFIG_PATH, help="Fichier de configuration")
+    parser.add_argument("--concurrency", type=int, help="Pipelines simultanés (borné par settings.batch.concurrency)")
+    parser.add_argument("--json", metavar="FICHIER", help="Écrit les rapports en JSON (\"-\" = sortie standard)")
+    parser.add_argument("--sarif", metavar="FICHIER", help="Écrit les constats au format SARIF (\"-\" = sortie standard)")
+    parser.add_argument(
+        "--fail-on", choices=list(FAIL_ON), default="refused",
+        help="Verdict à partir duquel le code de sortie vaut 1 (défaut : refused)"
+    )
+    parser.add_argument("--cache", metavar="FICHIER", help="Cache de résultats persistant (remplace settings.cache.path)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache de résultats")
+    parser.add_argument("--quiet", action="store_true", help="N'affiche pas la progression")
+    parser.add_argument("--verbose", action="store_true", help="Affiche les journaux du pipeline (sur la sortie d'erreur)")
+    args = parser.parse_args(argv)
+    if not args.paths and args.git_diff is None:
+        parser.error("indiquer des fichiers, dossiers ou globs, ou --git-diff")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    stdout = sys.stdout
+    progress = None if args.quiet else sys.stderr
+    
+    try:
+        config = ConfigLoader(args.config).load()
+    except CodeChallengerError as e:
+        print(f"[CLI] ❌ Configuration invalide: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    cache = dict(config.settings.get("cache") or {})
+    if args.cache:
+        cache.update(enabled=True, path=args.cache)
+    if args.no_cache:
+        cache["enabled"] = False
+    config.settings["cache"] = cache
+    
+    batch = config.settings.get("batch") or {}
+    try:
+        items = collect_files(
+            args.paths, args.git_diff, batch.get("max_files", 500), batch.get("max_file_bytes", 1_000_000)
+        )
+    except CodeChallengerError as e:
+        print(f"[CLI] ❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+    if not items:
+        print("[CLI] Aucun fichier à analyser", file=sys.stderr)
+    
+    # Les journaux du pipeline (print) ne doivent pas se mêler au JSON écrit sur la sortie standard
+    logs = sys.stderr if args.verbose else open(os.devnull, "w")
+    start = time.time()
+    with contextlib.redirect_stdout(logs):
+        orchestrator = PipelineOrchestrator(config)
+        concurrency = resolve_concurrency(config.settings, args.concurrency, orchestrator.async_client.capacity)
+        
+        async def run() -> list[BatchResult]:
+            try:
+                return await audit(orchestrator, items, concurrency, progress) if items else []
+            finally:
+                await orchestrator.aclose()
+                for store in (orchestrator.cache, orchestrator.reports):
+                    if store is not None:
+                        store.close()
+        
+        try:
+            results = asyncio.run(run())
+        except CodeChallengerError as e:
+            print(f"[CLI] ❌ {e}", file=sys.stderr)
+            return EXIT_ERROR
+        finally:
+            if logs is not sys.stderr:
+                logs.close()
+    
+    summary = summarize(results)
+    summary["concurrency"] = concurrency
+    summary["duration"] = round(time.time() - start, 3)
+    if args.json:
+        write_output(args.json, {"summary": summary, "results": [result.to_dict() for result in results]}, stdout)
+    if args.sarif:
+        write_output(args.sarif, to_sarif(results), stdout)
+    
+    code = exit_code(summary, results, FAIL_ON[args.fail_on])
+    if progress is not None:
+        verdicts = ", ".join(f"{name}: {count}" for name, count in summary["verdicts"].items() if count)
+        print(
+            f"[CLI] {summary['total']} fichier(s) en {summary['duration']:.1f}s "
+            f"({verdicts or 'aucun verdict'}, échecs: {summary['failed']}) → code de sortie {code}",
+            file=progress
+        )
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,16 @@
 Chargeur de configuration YAML
 """
 
+import os
 import yaml
 from pathlib import Path
 from typing import Dict, Any
-from src.core.models import PipelineConfig, RoleConfig
+from src.core.models import PipelineConfig, RoleConfig, EndpointConfig, default_role_inputs
+from src.core.gating import validate_gating
+from src.core.compaction import validate_compaction
+from src.core.structured import structured_roles
+from src.core.ensemble import build_ensemble
+from src.config.template_engine import CompiledTemplate, BASE_PLACEHOLDERS, compile_template
 from src.utils.errors import ConfigError
 
 
@@ -61,13 +67,11 @@ class ConfigLoader:
         if "providers" not in data:
             raise ConfigError("Section 'providers' manquante dans la configuration")
         
-        providers = data["providers"]
-        if "ollama_local" not in providers:
-            raise ConfigError("Section 'providers.ollama_local' manquante")
+        endpoints = self._build_endpoints(data["providers"])
         
-        ollama_config = providers["ollama_local"]
-        base_url = ollama_config.get("base_url", "http://127.0.0.1:11434")
-        ollama_timeout = ollama_config.get("timeout", 300)
+        # Le premier endpoint (ollama_local en tête s'il existe) sert de référence
+        base_url = endpoints[0].base_url
+        ollama_timeout = endpoints[0].timeout
         
         # Validation roles
         if "roles" not in data:
@@ -78,26 +82,22 @@ class ConfigLoader:
             if "model" not in role_data:
                 raise ConfigError(f"Modèle manquant pour le rôle '{role_name}'")
             
+            timeout = role_data.get("timeout", ollama_timeout)
             roles_config[role_name] = RoleConfig(
                 model=role_data["model"],
                 temperature=role_data.get("temperature", 0.7),
                 top_p=role_data.get("top_p", 0.9),
                 num_ctx=role_data.get("num_ctx", 4096),
-                timeout=role_data.get("timeout", ollama_timeout)
+                timeout=timeout,
+                keep_alive=role_data.get("keep_alive"),
+                ensemble=build_ensemble(role_name, role_data.get("ensemble"), role_data["model"], timeout)
             )
         
         # Validation pipeline
         if "pipeline" not in data:
             raise ConfigError("Section 'pipeline' manquante dans la configuration")
         
-        pipeline = data["pipeline"]
-        if not isinstance(pipeline, list):
-            raise ConfigError("La section 'pipeline' doit être une liste")
-        
-        # Vérifier que tous les rôles du pipeline existent
-        for role in pipeline:
-            if role not in roles_config:
-                raise ConfigError(f"Rôle '{role}' du pipeline non défini dans 'roles'")
+        pipeline, inputs = self._build_pipeline_graph(data["pipeline"], roles_config)
         
         # Validation templates
         if "templates" not in data:
@@ -110,8 +110,13 @@ class ConfigLoader:
             if role not in templates:
                 raise ConfigError(f"Template manquant pour le rôle '{role}'")
         
+        compiled_templates = self._compile_templates(templates, pipeline, inputs)
+        
         # Settings
         settings = data.get("settings", {})
+        validate_gating(settings, pipeline)
+        validate_compaction(settings, pipeline)
+        structured_roles(settings, pipeline)
         
         return PipelineConfig(
             ollama_base_url=base_url,
@@ -119,6 +124,164 @@ class ConfigLoader:
             roles=roles_config,
             pipeline=pipeline,
             templates=templates,
-            settings=settings
+            settings=settings,
+            inputs=inputs,
+            endpoints=endpoints,
+            compiled_templates=compiled_templates
         )
+    
+    def _compile_templates(
+        self,
+        templates: Dict[str, Any],
+        pipeline: list[str],
+        inputs: Dict[str, Dict[str, list[str]]]
+    ) -> Dict[str, CompiledTemplate]:
+        """
+        Compile les templates des rôles du pipeline et vérifie leurs placeholders
+        
+        Chaque placeholder doit être fourni à tous les rôles (CODE, LANGUAGE...)
+        ou alimenté par un rôle amont (inputs du rôle).
+        
+        Args:
+            templates: Section 'templates' brute
+            pipeline: Rôles du pipeline
+            inputs: Placeholders amont par rôle
+            
+        Returns:
+            Dictionnaire rôle → template compilé
+            
+        Raises:
+            ConfigError: Si un template n'est pas une chaîne ou utilise un placeholder inconnu
+        """
+        compiled_templates = {}
+        for role in pipeline:
+            if not isinstance(templates[role], str):
+                raise ConfigError(f"Le template du rôle '{role}' doit être une chaîne")
+            compiled = compile_template(templates[role])
+            available = set(BASE_PLACEHOLDERS) | set(inputs[role])
+            unknown = sorted(compiled.placeholders - available)
+            if unknown:
+                raise ConfigError(
+                    f"Placeholder(s) inconnu(s) dans le template du rôle '{role}': "
+                    f"{', '.join('{{' + name + '}}' for name in unknown)} "
+                    f"(disponibles : {', '.join(sorted(available))})"
+                )
+            compiled_templates[role] = compiled
+        return compiled_templates
+    
+    def _build_endpoints(self, providers: Any) -> list[EndpointConfig]:
+        """
+        Construit le pool d'instances Ollama à partir de la section providers
+        
+        Chaque entrée de providers est une instance Ollama (base_url, timeout,
+        models optionnel, num_parallel optionnel). L'entrée ollama_local est
+        placée en tête.
+        
+        Args:
+            providers: Section 'providers' brute
+            
+        Returns:
+            Instances Ollama du pool
+            
+        Raises:
+            ConfigError: Si aucune instance n'est définie
+        """
+        if not isinstance(providers, dict) or not providers:
+            raise ConfigError("Section 'providers' vide : au moins une instance Ollama est requise")
+        
+        try:
+            default_parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+        except ValueError:
+            default_parallel = 1
+        
+        names = sorted(providers, key=lambda name: name != "ollama_local")
+        endpoints = []
+        for name in names:
+            provider = providers[name] or {}
+            if not isinstance(provider, dict):
+                raise ConfigError(f"Configuration invalide pour le provider '{name}'")
+            models = provider.get("models")
+            endpoints.append(EndpointConfig(
+                name=name,
+                base_url=provider.get("base_url", "http://127.0.0.1:11434"),
+                timeout=provider.get("timeout", 300),
+                models=list(models) if models else None,
+                num_parallel=max(1, int(provider.get("num_parallel") or default_parallel))
+            ))
+        return endpoints
+    
+    def _build_pipeline_graph(
+        self,
+        entries: Any,
+        roles_config: Dict[str, RoleConfig]
+    ) -> tuple[list[str], Dict[str, Dict[str, list[str]]]]:
+        """
+        Valide le graphe de dépendances du pipeline
+        
+        Chaque entrée est soit un nom de rôle (câblage historique : Reviewer ←
+        Challenger, Arbiter ← Challenger et Reviewer), soit un dictionnaire
+        {role, inputs} où inputs associe chaque placeholder consommé au rôle
+        (ou à la liste de rôles) qui le produit :
+        
+            - role: reviewer
+              inputs:
+                CRITIQUES: [challenger, challenger_securite]
+        
+        Args:
+            entries: Section 'pipeline' brute
+            roles_config: Rôles définis
+            
+        Returns:
+            Tuple (rôles dans un ordre topologique, placeholders amont par rôle)
+            
+        Raises:
+            ConfigError: Si un rôle est inconnu, dupliqué ou si le graphe contient un cycle
+        """
+        if not isinstance(entries, list):
+            raise ConfigError("La section 'pipeline' doit être une liste")
+        
+        declared: list[str] = []
+        explicit: Dict[str, Dict[str, list[str]]] = {}
+        for entry in entries:
+            if isinstance(entry, dict):
+                role = entry.get("role")
+                raw_inputs = entry.get("inputs") or {}
+                if not isinstance(raw_inputs, dict):
+                    raise ConfigError(f"'inputs' du rôle '{role}' doit associer des placeholders à des rôles")
+                explicit[role] = {
+                    placeholder: [sources] if isinstance(sources, str) else list(sources or [])
+                    for placeholder, sources in raw_inputs.items()
+                }
+            else:
+                role = entry
+            
+            # Vérifier que tous les rôles du pipeline existent
+            if role not in roles_config:
+                raise ConfigError(f"Rôle '{role}' du pipeline non défini dans 'roles'")
+            if role in declared:
+                raise ConfigError(f"Rôle '{role}' présent plusieurs fois dans le pipeline")
+            declared.append(role)
+        
+        inputs: Dict[str, Dict[str, list[str]]] = {}
+        for role in declared:
+            inputs[role] = explicit[role] if role in explicit else default_role_inputs(role, declared)
+            for sources in inputs[role].values():
+                for source in sources:
+                    if source not in declared:
+                        raise ConfigError(f"Le rôle '{role}' dépend de '{source}', absent du pipeline")
+        
+        # Tri topologique stable (ordre de déclaration à dépendances égales)
+        ordered: list[str] = []
+        remaining = list(declared)
+        while remaining:
+            ready = [
+                role for role in remaining
+                if all(source in ordered for sources in inputs[role].values() for source in sources)
+            ]
+            if not ready:
+                raise ConfigError(f"Cycle de dépendances dans le pipeline: {', '.join(remaining)}")
+            ordered.extend(ready)
+            remaining = [role for role in remaining if role not in ready]
+        
+        return ordered, inputs
 
@@ -3,10 +3,72 @@ Moteur de templates pour remplacer les placeholders
 """
 
 import re
-from typing import Dict, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Union
 from src.utils.errors import TemplateError
 
 
+# Placeholders fournis à tous les rôles (les autres sont alimentés par les rôles amont)
+BASE_PLACEHOLDERS = ("CODE", "LANGUAGE", "PROJECT_NAME", "RUNTIME", "CONSTRAINTS")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    Template découpé en segments : textes fixes et placeholders en alternance
+    
+    literals compte toujours un élément de plus que names : le rendu
+    intercale la valeur de chaque placeholder entre deux textes fixes.
+    """
+    literals: tuple[str, ...]
+    names: tuple[str, ...]
+    # Placeholders utilisés par le template (sans doublon)
+    placeholders: frozenset[str]
+    
+    @property
+    def static_text(self) -> str:
+        """Texte fixe du template (placeholders retirés)"""
+        return "".join(self.literals)
+    
+    def render(self, context: Dict[str, Any]) -> str:
+        """
+        Remplace les placeholders en une seule concaténation
+        
+        Args:
+            context: Dictionnaire de valeurs pour remplacer les placeholders
+        
+        Returns:
+            Template rendu (un placeholder absent du contexte est conservé tel quel)
+        """
+        parts = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            parts.append(str(context[name]) if name in context else "{{" + name + "}}")
+            parts.append(literal)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Compile un template (résultat mis en cache par texte de template)
+    
+    Args:
+        template: Template avec placeholders {{PLACEHOLDER}}
+    
+    Returns:
+        Template compilé
+    """
+    # split avec un groupe capturant : textes fixes aux indices pairs, noms aux indices impairs
+    pieces = TemplateEngine.PLACEHOLDER_PATTERN.split(template)
+    names = tuple(pieces[1::2])
+    return CompiledTemplate(
+        literals=tuple(pieces[0::2]),
+        names=names,
+        placeholders=frozenset(names)
+    )
+
+
 class TemplateEngine:
     """
     Moteur de templates pour remplacer les placeholders {{PLACEHOLDER}}
@@ -15,31 +77,36 @@ class TemplateEngine:
     # Pattern pour trouver les placeholders {{PLACEHOLDER}}
     PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
     
-    def render(self, template: str, context: Dict[str, Any]) -> str:
+    def compile(self, template: str) -> CompiledTemplate:
         """
-        Remplace les placeholders dans un template
+        Compile un template en segments (compilation mise en cache)
         
         Args:
             template: Template avec placeholders {{PLACEHOLDER}}
+        
+        Returns:
+            Template compilé
+        """
+        return compile_template(template)
+    
+    def render(self, template: Union[str, CompiledTemplate], context: Dict[str, Any]) -> str:
+        """
+        Remplace les placeholders dans un template
+        
+        Args:
+            template: Template avec placeholders {{PLACEHOLDER}}, ou template compilé
             context: Dictionnaire de valeurs pour remplacer les placeholders
-            
+        
         Returns:
             Template avec placeholders remplacés
-            
+        
         Raises:
-            TemplateError: Si un placeholder requis n'est pas fourni
+            TemplateError: Si le rendu échoue
         """
-        def replace_placeholder(match):
-            placeholder_name = match.group(1)
-            if placeholder_name in context:
-                return str(context[placeholder_name])
-            else:
-                # Avertissement mais on continue (placeholder optionnel)
-                return match.group(0)  # Garde le placeholder tel quel
-        
         try:
-            result = self.PLACEHOLDER_PATTERN.sub(replace_placeholder, template)
-            return result
+            if isinstance(template, str):
+                template = compile_template(template)
+            return template.render(context)
         except Exception as e:
             raise TemplateError(f"Erreur lors du rendu du template: {e}") from e
     
@@ -49,9 +116,8 @@ class TemplateEngine:
         
         Args:
             template: Template à analyser
-            
+        
         Returns:
             Liste des noms de placeholders trouvés
         """
-        return self.PLACEHOLDER_PATTERN.findall(template)
-
+        return list(compile_template(template).names)
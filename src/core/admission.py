@@ -0,0 +1,323 @@
+"""
+Contrôle d'admission de l'API : concurrence bornée, file d'attente et limite de débit par client
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, AsyncIterator
+from src.core.metrics import REGISTRY, DURATION_BUCKETS
+from src.utils.errors import CodeChallengerError
+
+
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "code_challenger_admission_active",
+    "Places de pipeline occupées par les requêtes admises"
+)
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "code_challenger_admission_queue_depth",
+    "Requêtes en attente d'admission"
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "code_challenger_admission_wait_seconds",
+    "Attente des requêtes admises avant le démarrage de leur pipeline",
+    (),
+    DURATION_BUCKETS
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "code_challenger_admission_rejected_total",
+    "Requêtes refusées par le contrôle d'admission (rate_limited, queue_full, overloaded, wait_timeout)",
+    ("reason",)
+)
+
+
+class AdmissionRejected(CodeChallengerError):
+    """Requête refusée : débit du client dépassé (429) ou serveur saturé (503)"""
+    
+    def __init__(self, message: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `rate` jetons par seconde, au plus `burst` en réserve
+    """
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Prélève `cost` jetons s'ils sont disponibles
+        
+        Args:
+            cost: Nombre de jetons demandés (borné par la réserve maximale)
+        
+        Returns:
+            0 si les jetons ont été prélevés, sinon délai (secondes) avant qu'ils le soient
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        cost = min(cost, self.burst)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+    
+    @property
+    def full(self) -> bool:
+        """Indique si la réserve est pleine (client inactif)"""
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.burst
+
+
+@dataclass
+class Ticket:
+    """Admission accordée : places occupées et date d'admission"""
+    weight: int
+    admitted_at: float
+
+
+class AdmissionController:
+    """
+    Borne le nombre de pipelines interactifs simultanés et le débit de chaque client
+    
+    Une requête occupe une place (un lot autant de places que de pipelines
+    simultanés). Sans place libre, elle attend dans une file bornée, par
+    ordre d'arrivée. Elle est refusée immédiatement (503 et Retry-After) si
+    la file est pleine ou si l'attente estimée (durée moyenne d'occupation
+    d'une place × places demandées devant elle) dépasse max_wait_seconds,
+    et au bout de max_wait_seconds si aucune place ne s'est libérée : sous
+    surcharge, les pipelines admis s'exécutent à pleine vitesse au lieu de
+    ralentir tous ensemble jusqu'au timeout des rôles.
+    
+    Chaque client (en-tête X-Client-Id, sinon adresse IP) dispose d'un seau
+    à jetons de rate_per_minute jetons par minute (burst en réserve) ; une
+    requête sans jeton disponible est refusée (429 et Retry-After).
+    """
+    
+    # Nombre de clients suivis au-delà duquel les seaux inactifs sont oubliés
+    MAX_CLIENTS = 1024
+    
+    # Poids de la dernière mesure dans la durée moyenne d'occupation
+    EWMA_ALPHA = 0.2
+    
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int = 16,
+        max_wait_seconds: float = 60,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[float] = None
+    ):
+        """
+        Initialise le contrôle d'admission
+        
+        Args:
+            max_concurrent: Places de pipeline simultanées
+            max_queue: Requêtes en attente au-delà desquelles les suivantes sont refusées
+            max_wait_seconds: Attente maximale d'une requête dans la file
+            rate_per_minute: Requêtes par minute et par client (None ou 0 = illimité)
+            burst: Requêtes consécutives autorisées par client (par défaut : rate_per_minute / 6, au moins 1)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self.rate = rate_per_minute / 60 if rate_per_minute else None
+        self.burst = burst or max(1.0, (rate_per_minute or 0) / 6)
+        self.active = 0
+        self.service_seconds: Optional[float] = None
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], capacity: int) -> Optional["AdmissionController"]:
+        """
+        Construit le contrôle d'admission à partir de la section settings.admission
+        
+        Args:
+            settings: Section settings de la configuration
+            capacity: Capacité du pool d'instances Ollama (places par défaut)
+        
+        Returns:
+            Contrôle configuré, ou None s'il est désactivé
+        """
+        admission = settings.get("admission") or {}
+        if not admission.get("enabled", False):
+            return None
+        return cls(
+            max_concurrent=admission.get("max_concurrent") or capacity,
+            max_queue=admission.get("max_queue", 16),
+            max_wait_seconds=admission.get("max_wait_seconds", 60),
+            rate_per_minute=admission.get("rate_per_minute"),
+            burst=admission.get("burst")
+        )
+    
+    @property
+    def queue_depth(self) -> int:
+        """Requêtes en attente d'une place"""
+        return sum(1 for _, future in self._waiters if not future.done())
+    
+    def check_rate(self, client_id: str, cost: float = 1.0):
+        """
+        Prélève les jetons d'une requête dans le seau du client
+        
+        Args:
+            client_id: Identifiant du client
+            cost: Jetons consommés (nombre de fichiers d'un lot, par exemple)
+        
+        Raises:
+            AdmissionRejected: 429 si le client a dépassé son débit
+        """
+        if self.rate is None:
+            return
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_CLIENTS:
+                self._buckets = {key: value for key, value in self._buckets.items() if not value.full}
+            bucket = self._buckets[client_id] = TokenBucket(self.rate, self.burst)
+        delay = bucket.take(cost)
+        if delay > 0:
+            raise self._reject(
+                f"Limite de débit atteinte pour le client {client_id}", 429, delay, "rate_limited"
+            )
+    
+    async def acquire(self, client_id: str, weight: int = 1, cost: float = 1.0) -> Ticket:
+        """
+        Admet une requête : vérifie le débit du client puis attend une place
+        
+        Args:
+            client_id: Identifiant du client
+            weight: Places demandées (pipelines simultanés de la requête)
+            cost: Jetons consommés dans le seau du client
+        
+        Returns:
+            Ticket à rendre avec release() à la fin du traitement
+        
+        Raises:
+            AdmissionRejected: 429 (débit du client) ou 503 (file pleine,
+                attente estimée ou effective trop longue)
+        """
+        weight = min(max(1, weight), self.max_concurrent)
+        self.check_rate(client_id, cost)
+        start = time.monotonic()
+        
+        if not self._waiters and self.active + weight <= self.max_concurrent:
+            self._occupy(weight)
+        else:
+            if self.queue_depth >= self.max_queue:
+                raise self._reject("File d'attente pleine", 503, self._estimated_wait(weight), "queue_full")
+            estimated = self._estimated_wait(weight)
+            if self.service_seconds is not None and estimated > self.max_wait_seconds:
+                raise self._reject(
+                    f"Serveur saturé (attente estimée {estimated:.0f}s)", 503, estimated, "overloaded"
+                )
+            await self._wait(weight)
+        
+        wait = time.monotonic() - start
+        ADMISSION_WAIT.observe(wait)
+        return Ticket(weight=weight, admitted_at=time.monotonic())
+    
+    def release(self, ticket: Ticket):
+        """
+        Rend les places d'une requête terminée et admet les suivantes
+        
+        Args:
+            ticket: Ticket obtenu par acquire()
+        """
+        duration = time.monotonic() - ticket.admitted_at
+        if self.service_seconds is None:
+            self.service_seconds = duration
+        else:
+            self.service_seconds += self.EWMA_ALPHA * (duration - self.service_seconds)
+        self.active -= ticket.weight
+        ADMISSION_ACTIVE.set(self.active)
+        self._grant()
+    
+    @asynccontextmanager
+    async def admit(self, client_id: str, weight: int = 1, cost: float = 1.0) -> AsyncIterator[Ticket]:
+        """Admet une requête pour la durée du bloc (voir acquire)"""
+        ticket = await self.acquire(client_id, weight, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        État courant
+        
+        Returns:
+            Places occupées et disponibles, file d'attente, durée moyenne d'occupation
+        """
+        return {
+            "enabled": True,
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "service_seconds": round(self.service_seconds, 3) if self.service_seconds is not None else None,
+            "clients": len(self._buckets),
+        }
+    
+    async def _wait(self, weight: int):
+        """Attend une place dans la file (au plus max_wait_seconds)"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((weight, future))
+        ADMISSION_QUEUE_DEPTH.set(self.queue_depth)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                raise self._reject(
+                    f"Aucune place libérée en {self.max_wait_seconds}s", 503, self._estimated_wait(weight), "wait_timeout"
+                )
+        except asyncio.CancelledError:
+            # Client parti : place rendue si elle venait d'être accordée
+            if future.done() and not future.cancelled():
+                self.active -= weight
+                ADMISSION_ACTIVE.set(self.active)
+            future.cancel()
+            raise
+        finally:
+            self._grant()
+    
+    def _grant(self):
+        """Accorde les places libres aux requêtes en attente, par ordre d'arrivée"""
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.active + weight > self.max_concurrent:
+                break
+            self._waiters.popleft()
+            self._occupy(weight)
+            future.set_result(True)
+        ADMISSION_QUEUE_DEPTH.set(self.queue_depth)
+    
+    def _occupy(self, weight: int):
+        """Occupe des places"""
+        self.active += weight
+        ADMISSION_ACTIVE.set(self.active)
+    
+    def _estimated_wait(self, weight: int) -> float:
+        """Attente estimée d'une nouvelle requête : places demandées devant elle × durée moyenne d'occupation"""
+        queued = sum(w for w, future in self._waiters if not future.done()) + weight
+        return (self.service_seconds or 1.0) * queued / self.max_concurrent
+    
+    def _reject(self, message: str, status_code: int, retry_after: float, reason: str) -> AdmissionRejected:
+        """Compte un refus et construit l'exception correspondante"""
+        ADMISSION_REJECTED.inc(reason=reason)
+        print(f"[Admission] Requête refusée ({reason}): {message}")
+        return AdmissionRejected(message, status_code, max(1, math.ceil(retry_after)), reason)
@@ -0,0 +1,257 @@
+"""
+Exécution du pipeline sur un lot de fichiers avec une concurrence bornée
+"""
+
+import asyncio
+import io
+import os
+import tarfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Dict, Any, Optional, Callable, TYPE_CHECKING
+from src.core.models import Context, Report, Verdict, VERDICT_SEVERITY, worst_verdict
+from src.utils.errors import PipelineError
+
+if TYPE_CHECKING:
+    from src.core.orchestrator import PipelineOrchestrator
+
+
+# Correspondance extension → langage (valeurs du sélecteur de l'interface)
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".js": "javascript",
+    ".mjs": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".java": "java",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".cxx": "cpp",
+    ".hpp": "cpp",
+    ".go": "go",
+    ".rs": "rust",
+    ".rb": "ruby",
+    ".php": "php",
+    ".cs": "csharp",
+    ".kt": "kotlin",
+    ".swift": "swift",
+    ".scala": "scala",
+    ".sh": "bash",
+    ".sql": "sql",
+}
+
+@dataclass
+class BatchItem:
+    """
+    Fichier à analyser dans un lot
+    """
+    path: str
+    code: str
+    language: str = "python"
+
+
+@dataclass
+class BatchResult:
+    """
+    Résultat de l'analyse d'un fichier du lot
+    """
+    path: str
+    language: str
+    report: Optional[Report] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertit le résultat en dictionnaire pour l'API"""
+        data: Dict[str, Any] = {
+            "path": self.path,
+            "language": self.language,
+            "status": "success" if self.report is not None else "error",
+            "duration": round(self.duration, 3),
+        }
+        if self.report is not None:
+            data["report"] = self.report.to_dict()
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+def detect_language(path: str, default: str = "python") -> str:
+    """
+    Déduit le langage d'un fichier à partir de son extension
+    
+    Args:
+        path: Chemin du fichier
+        default: Langage retourné si l'extension est inconnue
+    
+    Returns:
+        Nom du langage
+    """
+    return LANGUAGE_BY_EXTENSION.get(PurePosixPath(path).suffix.lower(), default)
+
+
+def resolve_concurrency(
+    settings: Dict[str, Any],
+    requested: Optional[int] = None,
+    capacity: Optional[int] = None
+) -> int:
+    """
+    Détermine le nombre de pipelines exécutés simultanément
+    
+    La limite vient de settings.batch.concurrency ou, à défaut, de la
+    capacité du pool d'instances Ollama (somme de leurs num_parallel), puis
+    de la variable d'environnement OLLAMA_NUM_PARALLEL (nombre de requêtes
+    qu'Ollama traite en parallèle par modèle). Une valeur demandée par le
+    client peut réduire cette limite, pas la dépasser.
+    
+    Args:
+        settings: Section settings de la configuration
+        requested: Concurrence demandée par l'appelant (optionnelle)
+        capacity: Capacité totale du pool d'instances (optionnelle)
+    
+    Returns:
+        Concurrence effective (au moins 1)
+    """
+    configured = (settings.get("batch") or {}).get("concurrency") or capacity
+    if not configured:
+        try:
+            configured = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+        except ValueError:
+            configured = 1
+    limit = max(1, int(configured))
+    if requested:
+        limit = min(limit, max(1, requested))
+    return limit
+
+
+def extract_archive(
+    data: bytes,
+    max_files: int = 500,
+    max_file_bytes: int = 1_000_000
+) -> list[BatchItem]:
+    """
+    Extrait les fichiers source d'une archive zip ou tar (éventuellement compressée)
+    
+    Seuls les fichiers dont l'extension est reconnue sont retenus ; les
+    fichiers trop volumineux ou non décodables en UTF-8 sont ignorés.
+    
+    Args:
+        data: Contenu brut de l'archive
+        max_files: Nombre maximal de fichiers acceptés
+        max_file_bytes: Taille maximale d'un fichier
+    
+    Returns:
+        Liste des fichiers à analyser, triée par chemin
+    
+    Raises:
+        PipelineError: Si l'archive est illisible ou contient trop de fichiers
+    """
+    entries: list[tuple[str, bytes]] = []
+    
+    try:
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.file_size <= max_file_bytes:
+                        entries.append((info.filename, archive.read(info)))
+        else:
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+                for member in archive.getmembers():
+                    if member.isfile() and member.size <= max_file_bytes:
+                        extracted = archive.extractfile(member)
+                        if extracted is not None:
+                            entries.append((member.name, extracted.read()))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise PipelineError(f"Archive illisible (zip ou tar attendu): {e}") from e
+    
+    items = []
+    for name, raw in entries:
+        if PurePosixPath(name).suffix.lower() not in LANGUAGE_BY_EXTENSION:
+            continue
+        try:
+            code = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        if code.strip():
+            items.append(BatchItem(path=name, code=code, language=detect_language(name)))
+    
+    if len(items) > max_files:
+        raise PipelineError(f"Trop de fichiers dans l'archive: {len(items)} (maximum {max_files})")
+    
+    return sorted(items, key=lambda item: item.path)
+
+
+async def run_batch(
+    orchestrator: "PipelineOrchestrator",
+    items: list[BatchItem],
+    concurrency: int = 1,
+    on_result: Optional[Callable[[BatchResult], None]] = None
+) -> list[BatchResult]:
+    """
+    Exécute le pipeline sur chaque fichier avec au plus `concurrency` pipelines simultanés
+    
+    L'échec d'un fichier n'interrompt pas le lot : il est reporté dans son résultat.
+    
+    Args:
+        orchestrator: Orchestrateur utilisé pour chaque fichier
+        items: Fichiers à analyser
+        concurrency: Nombre maximal de pipelines simultanés
+        on_result: Callback optionnel appelé à la fin de chaque fichier
+    
+    Returns:
+        Résultats dans l'ordre des fichiers fournis
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def process(item: BatchItem) -> BatchResult:
+        async with semaphore:
+            start_time = time.time()
+            print(f"[Batch] Démarrage: {item.path} ({item.language})")
+            try:
+                report = await orchestrator.run_pipeline_async(
+                    item.code,
+                    Context(language=item.language)
+                )
+                result = BatchResult(path=item.path, language=item.language, report=report)
+            except Exception as e:
+                print(f"[Batch] ⚠️ Échec: {item.path}: {e}")
+                result = BatchResult(path=item.path, language=item.language, error=str(e))
+            result.duration = time.time() - start_time
+            if on_result is not None:
+                on_result(result)
+            return result
+    
+    return list(await asyncio.gather(*(process(item) for item in items)))
+
+
+def summarize(results: list[BatchResult]) -> Dict[str, Any]:
+    """
+    Agrège les verdicts d'un lot
+    
+    Args:
+        results: Résultats par fichier
+    
+    Returns:
+        Comptes par verdict, échecs et verdict global (le plus sévère)
+    """
+    verdicts = {verdict.value: 0 for verdict in VERDICT_SEVERITY}
+    reports = [result.report for result in results if result.report is not None]
+    failed = len(results) - len(reports)
+    
+    for report in reports:
+        verdicts[report.verdict.value] += 1
+    
+    return {
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "verdicts": verdicts,
+        "overall_verdict": worst_verdict(r.verdict for r in reports).value if reports else None,
+        "refused": [r.path for r in results if r.report is not None and r.report.verdict == Verdict.REFUSE],
+        "files_duration": round(sum(r.duration for r in results), 3),
+    }
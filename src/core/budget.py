@@ -0,0 +1,333 @@
+"""
+Budget de contexte des rôles : num_ctx ajusté à chaque appel et sorties amont condensées
+"""
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from src.core.metrics import REGISTRY
+from src.utils.tokens import estimate_tokens
+
+
+# Tailles de contexte proposées à Ollama : peu de valeurs distinctes pour
+# qu'il réutilise ses allocations (un changement de num_ctx recharge le modèle)
+DEFAULT_BUCKETS = (1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+# Correction maximale appliquée à l'estimation locale
+MAX_CORRECTION = 2.0
+
+# Ligne conservée par la condensation : titre, puce ou élément numéroté
+KEPT_LINE_PATTERN = re.compile(r"^\s*(?:#+\s|[-*•]\s|\d+[.)]\s)")
+
+# Mention ajoutée à une sortie réduite
+OMITTED_MARKER = "[… {count} ligne(s) omise(s) pour tenir dans le contexte du modèle]"
+
+CONTEXT_SIZE = REGISTRY.counter(
+    "code_challenger_context_calls_total",
+    "Appels à Ollama par modèle et taille de contexte (num_ctx) choisie",
+    ("model", "num_ctx")
+)
+CONTEXT_TRIMMED = REGISTRY.counter(
+    "code_challenger_context_trimmed_total",
+    "Sorties amont condensées ou tronquées pour tenir dans le contexte d'un rôle",
+    ("role", "placeholder")
+)
+CONTEXT_OVERFLOW = REGISTRY.counter(
+    "code_challenger_context_overflow_total",
+    "Prompts dépassant le contexte maximal d'un rôle malgré la condensation",
+    ("role",)
+)
+
+
+@dataclass
+class ContextNeed:
+    """Besoin en contexte d'un appel : prompt estimé et réserve pour la réponse"""
+    prompt_tokens: int
+    output_tokens: int
+
+
+class ContextBudget:
+    """
+    Ajuste num_ctx à la taille de chaque prompt et condense les sorties amont
+    
+    Le nombre de tokens d'un prompt est estimé localement (estimate_tokens),
+    puis corrigé par modèle d'après les compteurs prompt_eval_count
+    d'Ollama : la correction ne fait qu'augmenter, une estimation trop
+    basse n'est observée qu'une fois. num_ctx est la plus petite taille de
+    buckets couvrant le prompt, la réserve de réponse et la marge, dans la
+    limite du contexte maximal du rôle (roles.<rôle>.num_ctx, ou
+    max_num_ctx s'il est plus grand).
+    
+    Pour chaque modèle, num_ctx ne diminue pas d'un appel à l'autre : Ollama
+    recharge un modèle dont le contexte change, et un contexte plus grand
+    que nécessaire coûte moins cher qu'un rechargement. Il est réduit au
+    plus grand besoin récent après shrink_after_calls appels consécutifs
+    qui tiennent dans un contexte plus petit, et n'est plus imposé après
+    shrink_after_seconds sans appel (le modèle a pu être déchargé).
+    
+    Si le prompt d'un rôle dépasse son contexte maximal, les sorties des
+    rôles amont (CRITIQUES...) sont condensées (titres et constats
+    conservés) puis tronquées avec une mention explicite, au lieu d'être
+    tronquées silencieusement par Ollama.
+    """
+    
+    def __init__(
+        self,
+        buckets: tuple[int, ...] = DEFAULT_BUCKETS,
+        reserve_tokens: int = 1024,
+        margin: float = 0.1,
+        max_num_ctx: Optional[int] = None,
+        shrink_after_calls: Optional[int] = 20,
+        shrink_after_seconds: Optional[float] = 300
+    ):
+        """
+        Initialise le budget
+        
+        Args:
+            buckets: Tailles de contexte possibles
+            reserve_tokens: Tokens réservés à la réponse du modèle
+            margin: Marge relative ajoutée à l'estimation du prompt
+            max_num_ctx: Contexte maximal (None = num_ctx de chaque rôle)
+            shrink_after_calls: Appels consécutifs sous le contexte courant
+                avant de le réduire (None = jamais)
+            shrink_after_seconds: Inactivité d'un modèle après laquelle son
+                contexte courant n'est plus imposé (None = jamais)
+        """
+        self.buckets = tuple(sorted(set(buckets)))
+        self.reserve_tokens = reserve_tokens
+        self.margin = margin
+        self.max_num_ctx = max_num_ctx
+        self._corrections: Dict[str, float] = {}
+        self.shrink_after_calls = shrink_after_calls
+        self.shrink_after_seconds = shrink_after_seconds
+        self._sizes: Dict[str, int] = {}
+        # Par modèle : appels consécutifs sous le contexte courant et plus grand besoin parmi eux
+        self._below: Dict[str, tuple[int, int]] = {}
+        self._last_call: Dict[str, float] = {}
+    
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> Optional["ContextBudget"]:
+        """
+        Construit le budget à partir de la section settings.context_budget
+        
+        Args:
+            settings: Section settings de la configuration
+        
+        Returns:
+            Budget configuré, ou None s'il est désactivé
+        """
+        budget = settings.get("context_budget") or {}
+        if not budget.get("enabled", False):
+            return None
+        return cls(
+            buckets=tuple(budget.get("buckets") or DEFAULT_BUCKETS),
+            reserve_tokens=budget.get("reserve_tokens", 1024),
+            margin=budget.get("margin", 0.1),
+            max_num_ctx=budget.get("max_num_ctx"),
+            shrink_after_calls=budget.get("shrink_after_calls", 20),
+            shrink_after_seconds=budget.get("shrink_after_seconds", 300)
+        )
+    
+    def limit(self, configured: int) -> int:
+        """Contexte maximal d'un rôle dont le num_ctx configuré est donné"""
+        return max(configured, self.max_num_ctx or 0)
+    
+    def initial_num_ctx(self, configured: int, base_tokens: int = 0) -> int:
+        """
+        Contexte avec lequel précharger un modèle
+        
+        Args:
+            configured: num_ctx configuré du rôle
+            base_tokens: Tokens du texte fixe du template du rôle
+        
+        Returns:
+            Plus petit bucket couvrant le template et la réserve de réponse
+        """
+        return self._bucket(self.required("", ContextNeed(base_tokens, self.reserve_tokens)), self.limit(configured))
+    
+    def estimate(self, model: str, text: str) -> int:
+        """
+        Estime le nombre de tokens d'un texte pour un modèle
+        
+        Args:
+            model: Modèle destinataire
+            text: Texte à estimer
+        
+        Returns:
+            Estimation locale corrigée d'après les compteurs d'Ollama
+        """
+        return math.ceil(estimate_tokens(text) * self._corrections.get(model, 1.0))
+    
+    def required(self, model: str, need: ContextNeed) -> int:
+        """Tokens nécessaires à un appel (prompt corrigé, marge et réserve de réponse)"""
+        prompt_tokens = need.prompt_tokens * self._corrections.get(model, 1.0)
+        return math.ceil(prompt_tokens * (1 + self.margin)) + need.output_tokens
+    
+    def num_ctx(self, model: str, need: ContextNeed, configured: int) -> int:
+        """
+        Choisit le num_ctx d'un appel
+        
+        Args:
+            model: Modèle appelé
+            need: Besoin estimé de l'appel
+            configured: num_ctx configuré du rôle
+        
+        Returns:
+            Taille de contexte à transmettre à Ollama
+        """
+        limit = self.limit(configured)
+        needed = self._bucket(self.required(model, need), limit)
+        current = self._sizes.get(model, 0)
+        now = time.monotonic()
+        last_call = self._last_call.get(model)
+        self._last_call[model] = now
+        if (
+            current and last_call is not None and self.shrink_after_seconds is not None
+            and now - last_call >= self.shrink_after_seconds
+        ):
+            # Modèle inactif : probablement déchargé, aucun rechargement à éviter
+            current = 0
+        
+        if needed < current:
+            count, peak = self._below.get(model, (0, 0))
+            count, peak = count + 1, max(peak, needed)
+            if self.shrink_after_calls is not None and count >= self.shrink_after_calls:
+                print(f"[Budget] Contexte de {model} réduit de {current} à {peak} tokens")
+                current, count, peak = peak, 0, 0
+            self._below[model] = (count, peak)
+        else:
+            self._below.pop(model, None)
+        
+        size = min(max(needed, current), limit)
+        self._sizes[model] = max(size, current)
+        CONTEXT_SIZE.inc(model=model, num_ctx=str(size))
+        return size
+    
+    def observe(self, model: str, need: ContextNeed, prompt_eval_count: Optional[int]):
+        """
+        Corrige l'estimation d'un modèle d'après le nombre de tokens compté par Ollama
+        
+        Un prompt dont une partie est déjà dans le cache KV d'Ollama est
+        compté en moins : seule une sous-estimation est prise en compte.
+        
+        Args:
+            model: Modèle appelé
+            need: Besoin estimé de l'appel
+            prompt_eval_count: Tokens du prompt comptés par Ollama (None si inconnu)
+        """
+        if not prompt_eval_count or not need.prompt_tokens:
+            return
+        ratio = prompt_eval_count / need.prompt_tokens
+        if ratio > self._corrections.get(model, 1.0):
+            self._corrections[model] = min(ratio, MAX_CORRECTION)
+            print(f"[Budget] Estimation corrigée pour {model}: x{self._corrections[model]:.2f}")
+    
+    def fit(
+        self,
+        role_name: str,
+        model: str,
+        need: ContextNeed,
+        outputs: Dict[str, str],
+        configured: int
+    ) -> Optional[Dict[str, str]]:
+        """
+        Réduit les sorties amont d'un prompt trop grand pour le contexte maximal du rôle
+        
+        La place disponible est répartie équitablement entre les sorties :
+        les plus courtes sont conservées entières, les autres condensées au
+        même budget.
+        
+        Args:
+            role_name: Nom du rôle
+            model: Modèle du rôle
+            need: Besoin estimé du prompt rendu
+            outputs: Sorties amont du prompt, par placeholder
+            configured: num_ctx configuré du rôle
+        
+        Returns:
+            Sorties réduites par placeholder (seulement celles modifiées), ou
+            None si le prompt tient dans le contexte ou le dépasse même sans
+            sorties amont (dépassement compté et signalé)
+        """
+        limit = self.limit(configured)
+        excess = self.required(model, need) - limit
+        if excess <= 0:
+            return None
+        
+        sizes = {name: self.estimate(model, text) for name, text in outputs.items() if text}
+        available = sum(sizes.values()) - math.ceil(excess / (1 + self.margin))
+        if available <= 0:
+            CONTEXT_OVERFLOW.inc(role=role_name)
+            # Condenser les sorties amont ne suffirait pas : elles sont conservées
+            print(
+                f"[Budget] ⚠️ Le prompt du rôle {role_name} dépasse son contexte maximal ({limit} tokens) "
+                f"même sans sorties amont : Ollama le tronquera"
+            )
+            return None
+        
+        # Répartition équitable : part égale, redistribuée par les sorties plus courtes
+        shares: Dict[str, int] = {}
+        remaining = dict(sorted(sizes.items(), key=lambda item: item[1]))
+        while remaining:
+            share = available // len(remaining)
+            name, size = next(iter(remaining.items()))
+            if size > share:
+                shares.update({other: share for other in remaining})
+                break
+            shares[name] = size
+            available -= size
+            del remaining[name]
+        
+        trimmed = {}
+        for name, share in shares.items():
+            if share < sizes[name]:
+                trimmed[name] = condense(outputs[name], share, self._corrections.get(model, 1.0))
+                CONTEXT_TRIMMED.inc(role=role_name, placeholder=name)
+                print(f"[Budget] Sortie {name} réduite de {sizes[name]} à ~{share} tokens pour le rôle {role_name}")
+        return trimmed
+    
+    def _bucket(self, tokens: int, limit: int) -> int:
+        """Plus petit bucket couvrant tokens, borné par limit"""
+        for size in self.buckets:
+            if size >= tokens:
+                return min(size, limit)
+        return limit
+
+
+def condense(text: str, max_tokens: int, correction: float = 1.0) -> str:
+    """
+    Réduit une sortie de rôle à un budget de tokens
+    
+    Les titres et les constats (puces, éléments numérotés) sont conservés en
+    priorité ; le reste est tronqué à une frontière de ligne. Les lignes
+    retirées sont signalées dans le texte.
+    
+    Args:
+        text: Sortie à réduire
+        max_tokens: Budget en tokens
+        correction: Correction de l'estimation du modèle destinataire
+    
+    Returns:
+        Sortie réduite
+    """
+    lines = text.splitlines()
+    kept = [line for line in lines if KEPT_LINE_PATTERN.match(line)]
+    if len(kept) >= 3:
+        lines = kept
+    
+    selected = []
+    # Place réservée à la mention des lignes omises
+    tokens = math.ceil(estimate_tokens(OMITTED_MARKER.format(count=len(lines))) * correction)
+    for line in lines:
+        line_tokens = math.ceil((estimate_tokens(line) + 1) * correction)
+        if tokens + line_tokens > max_tokens:
+            break
+        selected.append(line)
+        tokens += line_tokens
+    
+    omitted = len(text.splitlines()) - len(selected)
+    if omitted:
+        selected.append(OMITTED_MARKER.format(count=omitted))
+    return "\n".join(selected)
@@ -0,0 +1,223 @@
+"""
+Cache de résultats adressé par contenu (SQLite)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class ResultCache:
+    """
+    Cache clé/valeur persistant pour les complétions de rôles et les rapports
+    
+    Les clés sont des empreintes SHA-256 des paramètres qui déterminent le
+    résultat (rôle, modèle, prompt rendu, temperature, top_p, num_ctx...).
+    L'éviction combine une durée de vie (TTL) et un nombre maximal
+    d'entrées (les moins récemment utilisées sont supprimées en premier).
+    """
+    
+    # Nombre d'écritures entre deux purges des entrées expirées
+    PURGE_INTERVAL = 100
+    
+    def __init__(
+        self,
+        path: str = ".cache/results.sqlite3",
+        ttl_seconds: Optional[float] = 86400,
+        max_entries: Optional[int] = 5000
+    ):
+        """
+        Initialise le cache
+        
+        Args:
+            path: Chemin du fichier SQLite (":memory:" pour un cache non persistant)
+            ttl_seconds: Durée de vie d'une entrée (None ou 0 = illimitée)
+            max_entries: Nombre maximal d'entrées (None ou 0 = illimité)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds or None
+        self.max_entries = max_entries or None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)"
+        )
+        self._conn.commit()
+    
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> Optional["ResultCache"]:
+        """
+        Construit le cache à partir de la section settings.cache
+        
+        Args:
+            settings: Section settings de la configuration
+        
+        Returns:
+            Cache configuré, ou None si le cache est désactivé
+        """
+        cache_settings = settings.get("cache") or {}
+        if not cache_settings.get("enabled", False):
+            return None
+        return cls(
+            path=cache_settings.get("path", ".cache/results.sqlite3"),
+            ttl_seconds=cache_settings.get("ttl_seconds", 86400),
+            max_entries=cache_settings.get("max_entries", 5000)
+        )
+    
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        """
+        Calcule la clé d'une entrée à partir des paramètres qui la déterminent
+        
+        Args:
+            namespace: Espace de noms ("chat", "report"...)
+            *parts: Valeurs sérialisables en JSON
+        
+        Returns:
+            Clé de la forme "<namespace>:<sha256>"
+        """
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Lit une entrée du cache
+        
+        Args:
+            key: Clé calculée par make_key
+        
+        Returns:
+            Valeur stockée, ou None si absente ou expirée
+        """
+        namespace = key.split(":", 1)[0]
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+            
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._count(namespace, "hits")
+            return row[0]
+    
+    def set(self, key: str, value: str):
+        """
+        Enregistre une entrée dans le cache
+        
+        Args:
+            key: Clé calculée par make_key
+            value: Valeur à stocker
+        """
+        namespace = key.split(":", 1)[0]
+        now = time.time()
+        
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries (key, namespace, value, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, namespace, value, now, now)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self._purge_expired(now)
+            self._evict_overflow()
+            self._conn.commit()
+    
+    def clear(self):
+        """Supprime toutes les entrées et remet les compteurs à zéro"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+            self._stats = {}
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs de hits/misses par espace de noms
+        
+        Returns:
+            Statistiques du cache
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+        
+        hits = sum(counts.get("hits", 0) for counts in namespaces.values())
+        misses = sum(counts.get("misses", 0) for counts in namespaces.values())
+        return {
+            "enabled": True,
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "namespaces": namespaces,
+        }
+    
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
+    
+    def _count(self, namespace: str, counter: str):
+        """Incrémente un compteur (appelé sous verrou)"""
+        counts = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counts[counter] += 1
+    
+    def _purge_expired(self, now: float):
+        """Supprime les entrées expirées (appelé sous verrou)"""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+    
+    def _evict_overflow(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_entries (appelé sous verrou)"""
+        if not self.max_entries:
+            return
+        count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
@@ -0,0 +1,400 @@
+"""
+Découpage des fichiers volumineux en morceaux compatibles avec num_ctx
+"""
+
+import ast
+import re
+from dataclasses import dataclass
+from typing import Optional, Callable
+from src.core.ensemble import SINGLE_ANSWER_ROLES
+from src.core.models import Report, Verdict, worst_verdict
+from src.core.reports import FINDING_LINE_PATTERN
+from src.core.structured import SEVERITY_LEVELS, merge_outputs
+from src.utils.tokens import estimate_tokens
+
+
+# Début d'un bloc de premier niveau pour les langages autres que Python
+TOP_LEVEL_START = re.compile(
+    r"^(?:export\s+|public\s+|private\s+|protected\s+|internal\s+|static\s+|async\s+|pub(?:\([^)]*\))?\s+)*"
+    r"(?:def|class|func|fn|function|impl|struct|enum|interface|trait|type|module|object|namespace)\b"
+)
+
+# En-tête d'un morceau dans une sortie fusionnée (voir chunk_header)
+CHUNK_HEADER_PATTERN = re.compile(r"^### Partie \d+/\d+ \(lignes (\d+)-(\d+)\)$", re.MULTILINE)
+
+
+@dataclass
+class CodeChunk:
+    """
+    Morceau contigu d'un fichier source
+    """
+    index: int
+    start_line: int
+    end_line: int
+    code: str
+
+
+def split_code(code: str, language: str, max_tokens: int) -> list[CodeChunk]:
+    """
+    Découpe un code source en morceaux d'au plus `max_tokens` tokens estimés
+    
+    Les coupures se font aux frontières de fonctions et de classes : via le
+    module `ast` pour Python, via une heuristique sur les blocs de premier
+    niveau pour les autres langages (ou si le code Python ne se parse pas).
+    Un bloc trop grand à lui seul est découpé aux frontières de ses méthodes,
+    puis ligne par ligne en dernier recours. La concaténation des morceaux
+    redonne le code d'origine.
+    
+    Args:
+        code: Code source complet
+        language: Langage du code
+        max_tokens: Budget de tokens par morceau
+    
+    Returns:
+        Liste des morceaux, dans l'ordre du fichier (un seul si le code tient)
+    """
+    lines = code.splitlines(keepends=True)
+    if not lines or estimate_tokens(code) <= max_tokens:
+        return [CodeChunk(index=0, start_line=1, end_line=max(1, len(lines)), code=code)]
+    
+    boundaries: Optional[list[int]] = None
+    if language.lower() == "python":
+        boundaries = _python_boundaries(code)
+    if boundaries is None:
+        boundaries = _generic_boundaries(lines)
+    
+    segments = _segments_from_boundaries(boundaries, len(lines))
+    chunks: list[CodeChunk] = []
+    current_start: Optional[int] = None
+    current_end = 0
+    current_tokens = 0
+    
+    def flush():
+        nonlocal current_start, current_tokens
+        if current_start is not None:
+            chunks.append(_make_chunk(len(chunks), lines, current_start, current_end))
+        current_start = None
+        current_tokens = 0
+    
+    for start, end in segments:
+        for piece_start, piece_end in _fit_segment(lines, start, end, max_tokens, language):
+            tokens = estimate_tokens("".join(lines[piece_start:piece_end]))
+            if current_start is not None and current_tokens + tokens > max_tokens:
+                flush()
+            if current_start is None:
+                current_start = piece_start
+            current_end = piece_end
+            current_tokens += tokens
+    flush()
+    
+    return chunks
+
+
+def split_units(code: str, language: str, max_tokens: int) -> list[CodeChunk]:
+    """
+    Découpe un code source en unités d'analyse incrémentale
+    
+    Contrairement à split_code, les unités ne sont pas regroupées pour
+    remplir le budget : chaque fonction ou classe de premier niveau forme sa
+    propre unité (les instructions consécutives hors définitions sont
+    regroupées), de sorte qu'une modification ne touche que l'unité qui la
+    contient. Une unité trop grande est redécoupée comme dans split_code.
+    
+    Args:
+        code: Code source complet
+        language: Langage du code
+        max_tokens: Budget de tokens par unité
+    
+    Returns:
+        Liste des unités, dans l'ordre du fichier
+    """
+    lines = code.splitlines(keepends=True)
+    if not lines:
+        return [CodeChunk(index=0, start_line=1, end_line=1, code=code)]
+    
+    boundaries: Optional[list[int]] = None
+    if language.lower() == "python":
+        boundaries = _python_unit_boundaries(code)
+    if boundaries is None:
+        boundaries = _generic_boundaries(lines)
+    
+    units: list[CodeChunk] = []
+    for start, end in _segments_from_boundaries(boundaries, len(lines)):
+        for piece_start, piece_end in _fit_segment(lines, start, end, max_tokens, language):
+            units.append(_make_chunk(len(units), lines, piece_start, piece_end))
+    return units
+
+
+def chunk_header(index: int, total: int, start_line: int, end_line: int) -> str:
+    """En-tête de la sortie d'un morceau dans une sortie fusionnée (index à partir de 0)"""
+    return f"### Partie {index + 1}/{total} (lignes {start_line}-{end_line})"
+
+
+def merge_reports(chunks: list[CodeChunk], reports: list[Report]) -> Report:
+    """
+    Fusionne les rapports de chaque morceau en un rapport unique
+    
+    Les sorties texte (rôles additionnels compris) sont concaténées avec un
+    en-tête par morceau, le code final est la concaténation des codes finaux
+    et le verdict retenu est le plus sévère. Les sorties structurées sont
+    fusionnées rôle par rôle, lignes des problèmes rapportées au fichier.
+    
+    Args:
+        chunks: Morceaux analysés
+        reports: Rapport de chaque morceau (même ordre)
+    
+    Returns:
+        Rapport fusionné
+    """
+    total = len(chunks)
+    
+    def join(output_of: Callable[[Report], str]) -> str:
+        sections = []
+        for chunk, report in zip(chunks, reports):
+            text = output_of(report)
+            if text:
+                header = chunk_header(chunk.index, total, chunk.start_line, chunk.end_line)
+                sections.append(f"{header}\n{text}")
+        return "\n\n".join(sections)
+    
+    code_final = "\n".join(report.code_final.rstrip("\n") for report in reports)
+    
+    # Rôles additionnels (graphe de pipeline personnalisé), dans l'ordre d'apparition
+    extra_roles = list(dict.fromkeys(name for report in reports for name in report.outputs))
+    structured_roles = list(dict.fromkeys(name for report in reports for name in report.structured))
+    
+    return Report(
+        challenger=join(lambda report: report.challenger),
+        reviewer=join(lambda report: report.reviewer),
+        arbiter=join(lambda report: report.arbiter),
+        verdict=worst_verdict(report.verdict for report in reports),
+        code_final=code_final,
+        outputs={
+            role_name: join(lambda report: report.outputs.get(role_name, ""))
+            for role_name in extra_roles
+        },
+        structured={
+            role_name: merge_outputs([
+                (chunk.start_line - 1, report.structured[role_name])
+                for chunk, report in zip(chunks, reports)
+                if role_name in report.structured
+            ])
+            for role_name in structured_roles
+        }
+    )
+
+
+def derive_unit_report(previous: Report, unit: CodeChunk, previous_start: int) -> Report:
+    """
+    Rapport d'une unité inchangée, extrait du rapport de la version précédente
+    
+    Seuls les constats localisés dans l'unité (puces "ligne N" des sorties
+    libres, problèmes des sorties structurées) sont conservés, leurs lignes
+    rapportées à l'unité. Le Reviewer et l'Arbiter n'ayant rien à modifier
+    dans une unité inchangée, leurs sorties restent vides et le code final
+    est celui de l'unité. Le verdict précédent n'est retenu que si l'unité
+    contient des constats.
+    
+    Args:
+        previous: Rapport de la version précédente (découpé ou non)
+        unit: Unité inchangée de la nouvelle version
+        previous_start: Première ligne de l'unité dans la version précédente
+    
+    Returns:
+        Rapport de l'unité (metrics : cached et derived)
+    """
+    previous_end = previous_start + unit.end_line - unit.start_line
+    
+    def findings(text: str) -> str:
+        # Lignes des sorties d'un rapport découpé : relatives à leur morceau
+        sections = [(0, text)]
+        headers = list(CHUNK_HEADER_PATTERN.finditer(text))
+        if headers:
+            sections = [
+                (int(header.group(1)) - 1, text[header.end():following.start() if following else len(text)])
+                for header, following in zip(headers, headers[1:] + [None])
+            ]
+        kept = []
+        for offset, section in sections:
+            for line in section.splitlines():
+                match = FINDING_LINE_PATTERN.match(line)
+                if match is None or not match.group("line"):
+                    continue
+                number = offset + int(match.group("line"))
+                if previous_start <= number <= previous_end:
+                    start, end = match.span("line")
+                    kept.append(f"{line[:start]}{number - previous_start + 1}{line[end:]}")
+        return "\n".join(kept)
+    
+    structured = {}
+    for role_name, data in previous.structured.items():
+        if "issues" in data:
+            issues = [
+                {**issue, "line": issue["line"] - previous_start + 1}
+                for issue in data["issues"]
+                if issue.get("line") and previous_start <= issue["line"] <= previous_end
+            ]
+            structured[role_name] = {
+                "issues": issues,
+                "max_severity": max(
+                    (issue["severity"] for issue in issues), key=SEVERITY_LEVELS.index, default=SEVERITY_LEVELS[0]
+                ),
+            }
+        elif "code" in data:
+            structured[role_name] = {"code": unit.code, "changes": []}
+    
+    outputs = {
+        role_name: findings(text)
+        for role_name, text in previous.outputs.items()
+        if role_name not in SINGLE_ANSWER_ROLES
+    }
+    challenger = findings(previous.challenger)
+    has_findings = bool(challenger) or any(outputs.values()) or any(
+        data.get("issues") for data in structured.values()
+    )
+    return Report(
+        challenger=challenger,
+        reviewer="",
+        arbiter="",
+        verdict=previous.verdict if has_findings else Verdict.ACCEPTE,
+        code_final=unit.code,
+        metrics={"cached": True, "derived": True},
+        outputs=outputs,
+        structured=structured
+    )
+
+
+def _python_boundaries(code: str) -> Optional[list[int]]:
+    """
+    Lignes (indices 0-based) où commence chaque instruction de premier niveau
+    
+    Les décorateurs sont rattachés à leur fonction ou classe. Retourne None
+    si le code ne se parse pas.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    return [_node_start(node) for node in tree.body]
+
+
+def _python_unit_boundaries(code: str) -> Optional[list[int]]:
+    """
+    Début de chaque définition de premier niveau et de chaque suite d'autres instructions
+    
+    Retourne None si le code ne se parse pas.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    boundaries = []
+    previous_is_definition = True
+    for node in tree.body:
+        is_definition = isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        if is_definition or previous_is_definition:
+            boundaries.append(_node_start(node))
+        previous_is_definition = is_definition
+    return boundaries
+
+
+def _node_start(node: ast.AST) -> int:
+    """Première ligne (0-based) d'un nœud, décorateurs compris"""
+    decorators = getattr(node, "decorator_list", [])
+    return min([node.lineno] + [d.lineno for d in decorators]) - 1
+
+
+def _generic_boundaries(lines: list[str]) -> list[int]:
+    """
+    Début des blocs de premier niveau pour un langage quelconque
+    
+    Un bloc commence sur une ligne non indentée qui ressemble à une
+    déclaration (fonction, classe...) ou qui suit une ligne vide.
+    """
+    boundaries = [0]
+    previous_blank = False
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            previous_blank = True
+            continue
+        at_top_level = not line[0].isspace()
+        if index > 0 and at_top_level and (previous_blank or TOP_LEVEL_START.match(stripped)):
+            if stripped not in ("}", "};", "end"):
+                boundaries.append(index)
+        previous_blank = False
+    return boundaries
+
+
+def _segments_from_boundaries(boundaries: list[int], line_count: int) -> list[tuple[int, int]]:
+    """
+    Transforme des débuts de blocs en intervalles [début, fin) couvrant tout le fichier
+    
+    Les lignes précédant le premier bloc (commentaires d'en-tête) sont
+    rattachées au premier segment.
+    """
+    starts = sorted(set(b for b in boundaries if 0 < b < line_count))
+    starts = [0] + starts
+    ends = starts[1:] + [line_count]
+    return list(zip(starts, ends))
+
+
+def _fit_segment(
+    lines: list[str],
+    start: int,
+    end: int,
+    max_tokens: int,
+    language: str
+) -> list[tuple[int, int]]:
+    """
+    Redécoupe un segment trop grand (méthodes d'une classe, puis lignes)
+    
+    Returns:
+        Intervalles [début, fin) couvrant le segment
+    """
+    text = "".join(lines[start:end])
+    if estimate_tokens(text) <= max_tokens:
+        return [(start, end)]
+    
+    # Classe Python : couper aux frontières des méthodes
+    if language.lower() == "python":
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None and len(tree.body) == 1 and isinstance(tree.body[0], ast.ClassDef):
+            inner = [start + _node_start(node) for node in tree.body[0].body]
+            inner = [b for b in inner if start < b < end]
+            if inner:
+                pieces = []
+                for piece_start, piece_end in zip([start] + inner, inner + [end]):
+                    pieces.extend(_split_lines(lines, piece_start, piece_end, max_tokens))
+                return pieces
+    
+    return _split_lines(lines, start, end, max_tokens)
+
+
+def _split_lines(lines: list[str], start: int, end: int, max_tokens: int) -> list[tuple[int, int]]:
+    """Découpe un intervalle ligne par ligne pour respecter le budget"""
+    pieces = []
+    piece_start = start
+    tokens = 0
+    for index in range(start, end):
+        line_tokens = estimate_tokens(lines[index])
+        if index > piece_start and tokens + line_tokens > max_tokens:
+            pieces.append((piece_start, index))
+            piece_start = index
+            tokens = 0
+        tokens += line_tokens
+    pieces.append((piece_start, end))
+    return pieces
+
+
+def _make_chunk(index: int, lines: list[str], start: int, end: int) -> CodeChunk:
+    """Construit un morceau à partir d'un intervalle de lignes [début, fin)"""
+    return CodeChunk(
+        index=index,
+        start_line=start + 1,
+        end_line=end,
+        code="".join(lines[start:end])
+    )
@@ -0,0 +1,269 @@
+"""
+Compaction des sorties transmises aux rôles aval : constats dédupliqués et classés, code seul
+"""
+
+import re
+from typing import Dict, Any, Optional
+from src.core.gating import normalize_severity
+from src.core.metrics import REGISTRY
+from src.core.models import PipelineConfig
+from src.core.structured import SEVERITY_LEVELS
+from src.utils.errors import ConfigError
+from src.utils.tokens import estimate_tokens
+
+
+# Modes de compaction : constats (sortie du Challenger) ou code (sortie du Reviewer)
+COMPACTION_MODES = ("findings", "code")
+
+# Modes par défaut des rôles standards
+DEFAULT_ROLES = {"challenger": "findings", "reviewer": "code"}
+
+# Constat : puce ou élément numéroté
+FINDING_PATTERN = re.compile(r"^(\s*)(?:[-*•+]|\d+[.)])\s+(.*\S)\s*$")
+
+# Bloc de code délimité (le langage est conservé)
+FENCE_PATTERN = re.compile(r"```([\w+-]*)[^\n]*\n(.*?)```", re.DOTALL)
+
+# Mots de gravité, du plus précis au plus général (en français ou en anglais)
+SEVERITY_PATTERN = re.compile(
+    r"\b(critical|critique|bloquante?|high|haute|élevée?|grave|majeure?|importante?|"
+    r"medium|moyenne?|modérée?|low|faible|mineure?)\b",
+    re.IGNORECASE
+)
+
+# Synonymes propres aux réponses libres (en plus de SEVERITY_ALIASES)
+SEVERITY_WORDS = {
+    "bloquant": "critical",
+    "bloquante": "critical",
+    "élevé": "high",
+    "grave": "high",
+    "majeur": "high",
+    "important": "high",
+    "importante": "high",
+    "moyen": "medium",
+    "modéré": "medium",
+    "mineur": "low",
+}
+
+# Mention ajoutée quand des constats sont écartés
+OMITTED_FINDINGS = "[… {count} constat(s) de moindre gravité omis]"
+
+COMPACTION_TOKENS = REGISTRY.counter(
+    "code_challenger_compaction_tokens_total",
+    "Tokens estimés des sorties transmises aux rôles aval, avant (raw) et après (compact) compaction",
+    ("role", "kind")
+)
+
+
+class OutputCompactor:
+    """
+    Réduit la sortie d'un rôle avant de la transmettre aux rôles aval
+    
+    En mode "findings" (Challenger), seuls les constats (puces, éléments
+    numérotés, avec leurs lignes de continuation) sont conservés : les
+    doublons sont retirés, les constats classés par gravité décroissante
+    (ordre d'origine à gravité égale) et limités à max_findings. En mode
+    "code" (Reviewer), seuls le code amélioré (dernier bloc, ou tous les
+    blocs d'un diff) et la liste des modifications sont conservés : la
+    prose disparaît du prompt de l'Arbiter.
+    
+    La sortie rendue d'une sortie structurée suit le même format que les
+    réponses libres et passe par les mêmes règles. Une sortie dont rien
+    n'est extrait est transmise telle quelle. Le rapport conserve toujours
+    les sorties complètes.
+    """
+    
+    def __init__(self, config: PipelineConfig):
+        """
+        Initialise la compaction pour une exécution du pipeline
+        
+        Args:
+            config: Configuration du pipeline (settings.compaction)
+        """
+        settings = config.settings.get("compaction") or {}
+        self.enabled = bool(settings.get("enabled", False))
+        roles = settings.get("roles") or DEFAULT_ROLES
+        self.roles: Dict[str, str] = {
+            role: mode for role, mode in roles.items() if role in config.pipeline
+        } if self.enabled else {}
+        self.max_findings = settings.get("max_findings", 25)
+        self._compacted: Dict[str, tuple[str, str]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+    
+    def apply(self, role_name: str, output: str) -> str:
+        """
+        Sortie d'un rôle telle que transmise aux rôles aval
+        
+        Args:
+            role_name: Rôle qui a produit la sortie
+            output: Sortie complète du rôle
+        
+        Returns:
+            Sortie compactée (la sortie complète si le rôle n'est pas concerné
+            ou si rien n'en est extrait)
+        """
+        mode = self.roles.get(role_name)
+        if mode is None or not output:
+            return output
+        cached = self._compacted.get(role_name)
+        if cached is not None and cached[0] == output:
+            return cached[1]
+        
+        if mode == "findings":
+            compacted, items = compact_findings(output, self.max_findings)
+        else:
+            compacted, items = compact_code(output, self.max_findings)
+        raw_tokens = estimate_tokens(output)
+        compact_tokens = estimate_tokens(compacted) if compacted else raw_tokens
+        if not compacted or compact_tokens >= raw_tokens:
+            compacted, compact_tokens, items = output, raw_tokens, 0
+        
+        self._compacted[role_name] = (output, compacted)
+        self._stats[role_name] = {
+            "mode": mode,
+            "raw_tokens": raw_tokens,
+            "compact_tokens": compact_tokens,
+            "items": items,
+        }
+        COMPACTION_TOKENS.inc(raw_tokens, role=role_name, kind="raw")
+        COMPACTION_TOKENS.inc(compact_tokens, role=role_name, kind="compact")
+        print(f"[Compaction] Sortie du rôle {role_name} : ~{raw_tokens} → ~{compact_tokens} tokens ({items} élément(s))")
+        return compacted
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Compaction effectuée, pour le rapport
+        
+        Returns:
+            Par rôle : mode, tokens estimés avant et après, éléments conservés
+        """
+        return dict(self._stats)
+
+
+def compact_findings(text: str, max_findings: int = 25) -> tuple[str, int]:
+    """
+    Extrait les constats d'une critique, dédupliqués et classés par gravité
+    
+    Args:
+        text: Sortie du rôle
+        max_findings: Nombre maximal de constats conservés
+    
+    Returns:
+        Tuple (liste numérotée des constats, nombre de constats conservés) ;
+        ("", 0) si aucun constat n'est trouvé
+    """
+    findings: list[list[str]] = []
+    current: Optional[list[str]] = None
+    indent = 0
+    for line in FENCE_PATTERN.sub("", text).splitlines():
+        if not line.strip():
+            continue
+        match = FINDING_PATTERN.match(line)
+        if match and (current is None or len(match.group(1)) <= indent):
+            indent = len(match.group(1))
+            current = [match.group(2)]
+            findings.append(current)
+        elif current is not None and (match or line[:1].isspace()):
+            # Continuation ou sous-puce du constat courant
+            current.append(match.group(2) if match else line.strip())
+        else:
+            current = None
+    
+    seen = set()
+    ranked = []
+    for position, parts in enumerate(findings):
+        finding = " ".join(parts)
+        key = _dedup_key(finding)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        ranked.append((-_severity_rank(finding), position, finding))
+    if not ranked:
+        return "", 0
+    
+    ranked.sort()
+    kept = [finding for _, _, finding in ranked[:max_findings]]
+    lines = [f"{index}. {finding}" for index, finding in enumerate(kept, 1)]
+    if len(ranked) > len(kept):
+        lines.append(OMITTED_FINDINGS.format(count=len(ranked) - len(kept)))
+    return "\n".join(lines), len(kept)
+
+
+def compact_code(text: str, max_changes: int = 25) -> tuple[str, int]:
+    """
+    Réduit la sortie du Reviewer à son code et à la liste de ses modifications
+    
+    Args:
+        text: Sortie du rôle
+        max_changes: Nombre maximal de modifications conservées
+    
+    Returns:
+        Tuple (code suivi des modifications, nombre de modifications
+        conservées) ; ("", 0) si la sortie ne contient aucun bloc de code
+    """
+    blocks = FENCE_PATTERN.findall(text)
+    if not blocks:
+        return "", 0
+    if all(language.lower() in ("diff", "patch") for language, _ in blocks):
+        kept_blocks = blocks
+    else:
+        kept_blocks = blocks[-1:]
+    parts = [f"```{language}\n{body.rstrip()}\n```" for language, body in kept_blocks]
+    
+    changes = []
+    seen = set()
+    for line in FENCE_PATTERN.sub("", text).splitlines():
+        match = FINDING_PATTERN.match(line)
+        if not match:
+            continue
+        key = _dedup_key(match.group(2))
+        if key and key not in seen:
+            seen.add(key)
+            changes.append(f"- {match.group(2)}")
+    if changes:
+        parts.append("\n".join(changes[:max_changes]))
+    return "\n\n".join(parts), len(changes[:max_changes])
+
+
+def validate_compaction(settings: Dict[str, Any], pipeline: list[str]):
+    """
+    Vérifie la section settings.compaction
+    
+    Args:
+        settings: Section settings de la configuration
+        pipeline: Rôles du pipeline
+    
+    Raises:
+        ConfigError: Si un rôle ou un mode de compaction est invalide
+    """
+    compaction = settings.get("compaction") or {}
+    if not compaction.get("enabled", False):
+        return
+    roles = compaction.get("roles")
+    if roles is not None and not isinstance(roles, dict):
+        raise ConfigError("compaction.roles doit associer un rôle à un mode (findings ou code)")
+    for role, mode in (roles or {}).items():
+        if role not in pipeline:
+            raise ConfigError(f"Rôle de compaction '{role}' absent du pipeline")
+        if mode not in COMPACTION_MODES:
+            raise ConfigError(
+                f"Mode de compaction invalide pour {role}: '{mode}' (attendu : {', '.join(COMPACTION_MODES)})"
+            )
+    max_findings = compaction.get("max_findings", 25)
+    if not isinstance(max_findings, int) or max_findings < 1:
+        raise ConfigError(f"compaction.max_findings doit être un entier positif (reçu : {max_findings})")
+
+
+def _severity_rank(finding: str) -> int:
+    """Rang de gravité d'un constat (0 si aucune gravité n'y figure)"""
+    match = SEVERITY_PATTERN.search(finding)
+    if match is None:
+        return 0
+    word = match.group(1).lower()
+    severity = normalize_severity(SEVERITY_WORDS.get(word, word))
+    return SEVERITY_LEVELS.index(severity) if severity else 0
+
+
+def _dedup_key(text: str) -> str:
+    """Clé de dédoublonnage : minuscules, ponctuation et espaces ignorés"""
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
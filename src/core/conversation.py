@@ -0,0 +1,169 @@
+"""
+Mode conversation : enchaîner les rôles d'un même modèle dans un seul échange
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional
+from src.core.models import RoleConfig, ChatResult
+from src.config.template_engine import TemplateEngine, compile_template
+from src.utils.tokens import estimate_tokens
+
+
+# Texte substitué au code original lorsqu'il figure déjà dans la conversation
+CODE_REFERENCE = "(code original : voir le premier message de cette conversation)"
+
+# Texte substitué aux sorties de rôles déjà présentes dans la conversation
+OUTPUT_REFERENCE = "(sortie de {roles} : voir les réponses précédentes de cette conversation)"
+
+
+@dataclass
+class _Thread:
+    """
+    Historique d'une conversation avec un modèle (et une taille de contexte)
+    """
+    messages: list[Dict[str, str]] = field(default_factory=list)
+    # Rôles dont la réponse figure dans la conversation
+    roles: set[str] = field(default_factory=set)
+    has_code: bool = False
+
+
+class ConversationTracker:
+    """
+    Construit une conversation multi-tours par modèle au fil du pipeline
+    
+    Lorsque plusieurs rôles partagent le même modèle et le même num_ctx,
+    chaque rôle ajoute un message à la conversation au lieu d'envoyer un
+    prompt autonome qui répète le code et les sorties précédentes. Le début
+    de la conversation étant identique d'un tour à l'autre, Ollama réutilise
+    son cache KV et n'évalue que le nouveau message (prefill payé une fois).
+    """
+    
+    def __init__(self, settings: Dict[str, Any]):
+        """
+        Initialise le suivi des conversations
+        
+        Args:
+            settings: Section settings.conversation de la configuration
+        """
+        self.enabled = bool(settings.get("enabled", False))
+        self.keep_alive: Optional[str] = settings.get("keep_alive") if self.enabled else None
+        self._threads: Dict[tuple[str, int], _Thread] = {}
+        self._turns: list[Dict[str, Any]] = []
+    
+    def prepare_turn(
+        self,
+        role_config: RoleConfig,
+        template: str,
+        role_context: Dict[str, Any],
+        role_inputs: Dict[str, list[str]],
+        template_engine: TemplateEngine
+    ) -> tuple[Optional[list[Dict[str, str]]], str]:
+        """
+        Prépare le tour d'un rôle dans la conversation de son modèle
+        
+        Un placeholder alimenté par des rôles amont n'est remplacé par une
+        référence que si toutes leurs réponses figurent dans la conversation.
+        
+        Args:
+            role_config: Configuration du rôle
+            template: Template du rôle
+            role_context: Contexte des templates du rôle (sorties amont comprises)
+            role_inputs: Placeholders alimentés par les rôles amont
+            template_engine: Moteur de rendu
+        
+        Returns:
+            Tuple (historique à envoyer, prompt du tour) ; (None, "") si le
+            rôle ouvre une nouvelle conversation ou si le mode est désactivé
+        """
+        if not self.enabled:
+            return None, ""
+        
+        thread = self._threads.get(self._key(role_config))
+        if thread is None or not thread.messages:
+            return None, ""
+        
+        context = dict(role_context)
+        if thread.has_code and "CODE" in context:
+            context["CODE"] = CODE_REFERENCE
+        for placeholder, sources in role_inputs.items():
+            if placeholder in context and sources and all(source in thread.roles for source in sources):
+                context[placeholder] = OUTPUT_REFERENCE.format(roles=", ".join(sources))
+        return list(thread.messages), template_engine.render(template, context)
+    
+    def record_turn(
+        self,
+        role_name: str,
+        role_config: RoleConfig,
+        template: str,
+        prompt: str,
+        turn_prompt: str,
+        history: Optional[list[Dict[str, str]]],
+        result: ChatResult
+    ):
+        """
+        Ajoute l'échange d'un rôle à la conversation et mesure le prefill évité
+        
+        Args:
+            role_name: Nom du rôle
+            role_config: Configuration du rôle
+            template: Template du rôle
+            prompt: Prompt autonome (tel qu'envoyé hors mode conversation)
+            turn_prompt: Prompt réellement envoyé ("" si nouvelle conversation)
+            history: Historique envoyé avec le tour (None si nouvelle conversation)
+            result: Réponse du modèle
+        
+        Si la conversation a avancé pendant l'appel (rôles exécutés en
+        parallèle sur le même modèle), l'échange n'y est pas ajouté : seul
+        l'historique réellement vu par le modèle reste réutilisable.
+        """
+        if not self.enabled:
+            return
+        
+        thread = self._threads.setdefault(self._key(role_config), _Thread())
+        continued = history is not None
+        sent_prompt = turn_prompt if continued else prompt
+        
+        standalone_tokens = estimate_tokens(prompt)
+        if result.prompt_eval_count is not None:
+            evaluated_tokens = result.prompt_eval_count
+        else:
+            evaluated_tokens = estimate_tokens(sent_prompt)
+        saved = max(0, standalone_tokens - evaluated_tokens) if continued else 0
+        
+        self._turns.append({
+            "role": role_name,
+            "model": role_config.model,
+            "history_messages": len(history or []),
+            "standalone_prompt_tokens": standalone_tokens,
+            "prompt_eval_count": result.prompt_eval_count,
+            "prefill_tokens_saved": saved,
+        })
+        
+        if len(thread.messages) != len(history or []):
+            return
+        if "CODE" in compile_template(template).placeholders:
+            thread.has_code = True
+        thread.messages.append({"role": "user", "content": sent_prompt})
+        thread.messages.append({"role": "assistant", "content": result.content})
+        thread.roles.add(role_name)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Synthèse du prefill de la conversation pour le rapport
+        
+        Returns:
+            Tokens de prompt autonomes, évalués et évités, et détail par tour
+        """
+        standalone = sum(turn["standalone_prompt_tokens"] for turn in self._turns)
+        saved = sum(turn["prefill_tokens_saved"] for turn in self._turns)
+        return {
+            "keep_alive": self.keep_alive,
+            "prefill_tokens_standalone": standalone,
+            "prefill_tokens_saved": saved,
+            "turns": list(self._turns),
+        }
+    
+    @staticmethod
+    def _key(role_config: RoleConfig) -> tuple[str, int]:
+        """Une conversation par couple (modèle, num_ctx) : Ollama recharge le modèle si num_ctx change"""
+        return role_config.model, role_config.num_ctx
@@ -0,0 +1,286 @@
+"""
+Exécution d'un rôle par plusieurs modèles en parallèle (ensemble)
+"""
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import replace
+from typing import Dict, Any, Optional, Callable, Awaitable
+from src.core.models import ChatResult, RoleConfig, EnsembleConfig, EnsembleMember
+from src.core.metrics import REGISTRY
+from src.core.structured import SEVERITY_LEVELS
+from src.utils.errors import ConfigError, OllamaError
+
+# Modes d'exécution : première réponse valide ou fusion des constats
+ENSEMBLE_MODES = ("first", "merge")
+
+# Rôles dont la sortie n'est pas une liste de constats (fusion impossible)
+SINGLE_ANSWER_ROLES = ("reviewer", "arbiter")
+
+# Ligne de constat d'une sortie libre : puce ou élément numéroté
+FINDING_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S")
+
+ENSEMBLE_OUTCOMES = REGISTRY.counter(
+    "code_challenger_ensemble_outcomes_total",
+    "Issue de chaque modèle d'un ensemble (won, merged, cancelled, invalid, timeout, error)",
+    ("role", "model", "outcome")
+)
+
+# Appel d'un modèle candidat (configuration du rôle réduite à ce modèle)
+MemberCall = Callable[[RoleConfig], Awaitable[ChatResult]]
+
+
+def build_ensemble(role_name: str, data: Any, model: str, timeout: int) -> Optional[EnsembleConfig]:
+    """
+    Construit l'ensemble d'un rôle à partir de la section roles.<rôle>.ensemble
+    
+    Le modèle du rôle est toujours le premier candidat. Chaque modèle
+    supplémentaire est un nom, ou un dictionnaire {model, timeout} ; le
+    timeout par défaut est ensemble.timeout, à défaut celui du rôle.
+    
+    Args:
+        role_name: Nom du rôle
+        data: Section ensemble (None = modèle unique)
+        model: Modèle du rôle
+        timeout: Timeout du rôle
+    
+    Returns:
+        Ensemble configuré, ou None si aucun modèle supplémentaire n'est déclaré
+    
+    Raises:
+        ConfigError: Si le mode, un modèle ou un timeout est invalide
+    """
+    if not data:
+        return None
+    if not isinstance(data, dict):
+        raise ConfigError(f"roles.{role_name}.ensemble doit être un dictionnaire")
+    mode = data.get("mode", "first")
+    if mode not in ENSEMBLE_MODES:
+        raise ConfigError(
+            f"Mode d'ensemble invalide pour le rôle '{role_name}': '{mode}' (attendu : {', '.join(ENSEMBLE_MODES)})"
+        )
+    default_timeout = data.get("timeout", timeout)
+    
+    members = [EnsembleMember(model=model, timeout=default_timeout)]
+    for entry in data.get("models") or []:
+        if isinstance(entry, str):
+            entry = {"model": entry}
+        if not isinstance(entry, dict) or not entry.get("model"):
+            raise ConfigError(f"Modèle d'ensemble invalide pour le rôle '{role_name}': {entry!r}")
+        if any(member.model == entry["model"] for member in members):
+            continue
+        members.append(EnsembleMember(model=entry["model"], timeout=entry.get("timeout", default_timeout)))
+    
+    for member in members:
+        if not isinstance(member.timeout, (int, float)) or member.timeout <= 0:
+            raise ConfigError(f"Timeout d'ensemble invalide pour '{member.model}' (rôle '{role_name}')")
+    if len(members) < 2:
+        return None
+    return EnsembleConfig(members=members, mode=mode)
+
+
+def merges_findings(role_name: str, ensemble: EnsembleConfig, output_kind: Optional[str]) -> bool:
+    """Indique si les réponses des modèles sont fusionnées (mode merge sur un rôle produisant des constats)"""
+    if ensemble.mode != "merge":
+        return False
+    if output_kind is not None:
+        return output_kind == "challenger"
+    return role_name not in SINGLE_ANSWER_ROLES
+
+
+async def run_ensemble(
+    role_name: str,
+    role_config: RoleConfig,
+    call: MemberCall,
+    output_kind: Optional[str] = None
+) -> ChatResult:
+    """
+    Exécute un rôle avec tous les modèles de son ensemble en parallèle
+    
+    Chaque modèle dispose de son propre délai. En mode "first", la première
+    réponse valide est retenue et les appels encore en cours sont annulés
+    (Ollama interrompt la génération à la fermeture de la connexion) ; à
+    terminaison simultanée, l'ordre de préférence départage. En mode
+    "merge", toutes les réponses valides sont attendues et leurs constats
+    fusionnés sans doublon.
+    
+    Args:
+        role_name: Nom du rôle
+        role_config: Configuration du rôle (avec son ensemble)
+        call: Appel d'un modèle, à partir de la configuration réduite à ce modèle
+        output_kind: Type de sortie structurée du rôle (None = texte libre)
+    
+    Returns:
+        Réponse retenue ou fusionnée, avec l'issue de chaque modèle dans ensemble
+    
+    Raises:
+        OllamaError: Si aucun modèle ne produit de réponse valide
+    """
+    ensemble = role_config.ensemble
+    merge = merges_findings(role_name, ensemble, output_kind)
+    start = time.perf_counter()
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    
+    async def attempt(member: EnsembleMember) -> ChatResult:
+        member_config = replace(role_config, model=member.model, timeout=member.timeout, ensemble=None)
+        return await asyncio.wait_for(call(member_config), member.timeout)
+    
+    tasks = {asyncio.create_task(attempt(member)): member for member in ensemble.members}
+    order = {member.model: index for index, member in enumerate(ensemble.members)}
+    results: Dict[str, ChatResult] = {}
+    pending = set(tasks)
+    try:
+        while pending and not (results and not merge):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: order[tasks[task].model]):
+                model = tasks[task].model
+                outcome, result = _outcome(task)
+                outcomes[model] = {"outcome": outcome, "seconds": round(time.perf_counter() - start, 3)}
+                if result is not None and (merge or not results):
+                    results[model] = result
+                elif result is not None:
+                    # Terminé en même temps que le modèle retenu, moins prioritaire
+                    outcomes[model]["outcome"] = "cancelled"
+    finally:
+        for task in pending:
+            task.cancel()
+            outcomes[tasks[task].model] = {"outcome": "cancelled", "seconds": round(time.perf_counter() - start, 3)}
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    if not results:
+        for model, info in outcomes.items():
+            ENSEMBLE_OUTCOMES.inc(role=role_name, model=model, outcome=info["outcome"])
+        details = ", ".join(f"{model}: {info['outcome']}" for model, info in outcomes.items())
+        raise OllamaError(f"Aucune réponse valide de l'ensemble du rôle {role_name} ({details})")
+    
+    ranked = sorted(results, key=order.get)
+    winner = None if merge and len(ranked) > 1 else ranked[0]
+    for model in results:
+        outcomes[model]["outcome"] = "won" if model == winner else "merged"
+    for model, info in outcomes.items():
+        ENSEMBLE_OUTCOMES.inc(role=role_name, model=model, outcome=info["outcome"])
+    
+    if winner is not None:
+        result = results[winner]
+    else:
+        result = _merge_results([(model, results[model]) for model in ranked], output_kind)
+    result.ensemble = {
+        "mode": ensemble.mode,
+        "winner": winner,
+        "models": {member.model: outcomes.get(member.model) for member in ensemble.members},
+    }
+    print(
+        f"[Ensemble] Rôle {role_name} : "
+        + (f"réponse de {winner}" if winner else f"constats fusionnés de {', '.join(ranked)}")
+        + f" ({round(time.perf_counter() - start, 2)}s)"
+    )
+    return result
+
+
+def _outcome(task: asyncio.Task) -> tuple[str, Optional[ChatResult]]:
+    """Issue d'un appel terminé : (ok, invalid, timeout ou error ; réponse si valide)"""
+    if task.cancelled():
+        return "cancelled", None
+    error = task.exception()
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout", None
+    if error is not None:
+        print(f"[Ensemble] ⚠️ Échec d'un modèle: {error}")
+        return "error", None
+    result = task.result()
+    if not result.content.strip():
+        return "invalid", None
+    return "ok", result
+
+
+def _merge_results(results: list[tuple[str, ChatResult]], output_kind: Optional[str]) -> ChatResult:
+    """Fusionne les réponses valides (par ordre de préférence) en une seule"""
+    first = results[0][1]
+    if output_kind is not None:
+        merged = merge_issues([result.structured for _, result in results])
+        content = json.dumps(merged, ensure_ascii=False)
+    else:
+        merged = None
+        content = merge_findings([(model, result.content) for model, result in results])
+    
+    def total(name: str) -> Optional[int]:
+        values = [getattr(result, name) for _, result in results if getattr(result, name) is not None]
+        return sum(values) if values else None
+    
+    return ChatResult(
+        content=content,
+        prompt_eval_count=total("prompt_eval_count"),
+        eval_count=total("eval_count"),
+        prompt_eval_duration=total("prompt_eval_duration"),
+        eval_duration=total("eval_duration"),
+        load_duration=total("load_duration"),
+        total_duration=total("total_duration"),
+        cached=all(result.cached for _, result in results),
+        http_wait=first.http_wait,
+        structured=merged
+    )
+
+
+def merge_issues(outputs: list[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fusionne les sorties structurées Challenger de plusieurs modèles
+    
+    Un problème déjà signalé par un modèle précédent (même ligne, même
+    description à la casse et aux espaces près) n'est pas répété.
+    
+    Args:
+        outputs: Sorties structurées par ordre de préférence
+    
+    Returns:
+        Sortie structurée fusionnée
+    """
+    issues = []
+    seen = set()
+    for data in outputs:
+        for issue in data["issues"]:
+            key = (issue.get("line"), _normalize(issue["description"]))
+            if key not in seen:
+                seen.add(key)
+                issues.append(issue)
+    return {
+        "issues": issues,
+        "max_severity": max((data["max_severity"] for data in outputs), key=SEVERITY_LEVELS.index),
+    }
+
+
+def merge_findings(outputs: list[tuple[str, str]]) -> str:
+    """
+    Fusionne les critiques libres de plusieurs modèles
+    
+    La réponse du modèle préféré est conservée telle quelle ; les constats
+    (puces ou éléments numérotés) des autres modèles qui n'y figurent pas
+    déjà sont ajoutés dans une section par modèle.
+    
+    Args:
+        outputs: Couples (modèle, réponse) par ordre de préférence
+    
+    Returns:
+        Critique fusionnée
+    """
+    _, content = outputs[0]
+    seen = {_normalize(line) for line in content.splitlines()}
+    sections = [content.rstrip()]
+    for model, other in outputs[1:]:
+        additions = []
+        for line in other.splitlines():
+            key = _normalize(line)
+            if FINDING_PATTERN.match(line) and key not in seen:
+                seen.add(key)
+                additions.append(line.rstrip())
+        if additions:
+            sections.append(f"Constats supplémentaires ({model}) :\n" + "\n".join(additions))
+    return "\n\n".join(sections)
+
+
+def _normalize(text: str) -> str:
+    """Texte comparable : sans marqueur de liste, en minuscules, espaces réduits"""
+    text = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s+", "", text)
+    return " ".join(text.lower().split())
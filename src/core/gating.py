@@ -0,0 +1,233 @@
+"""
+Court-circuit du pipeline selon la gravité des critiques du Challenger
+"""
+
+import json
+import re
+from dataclasses import replace
+from typing import Dict, Any, Optional
+from src.core.models import PipelineConfig, RoleConfig
+from src.core.metrics import REGISTRY
+from src.core.structured import SEVERITY_LEVELS, structured_roles
+from src.utils.errors import ConfigError
+
+# Synonymes acceptés dans la synthèse du modèle
+SEVERITY_ALIASES = {
+    "aucune": "none",
+    "aucun": "none",
+    "faible": "low",
+    "mineure": "low",
+    "moyenne": "medium",
+    "modérée": "medium",
+    "haute": "high",
+    "élevée": "high",
+    "majeure": "high",
+    "critique": "critical",
+}
+
+# Consigne ajoutée au prompt du rôle qui décide du court-circuit
+GATING_INSTRUCTION = """
+Termine ta réponse par un bloc JSON résumant la gravité maximale des problèmes identifiés :
+
+```json
+{"severity": "none|low|medium|high|critical", "issues": <nombre de problèmes>}
+```"""
+
+# Bloc JSON de synthèse (éventuellement entouré d'un bloc ```json)
+SUMMARY_PATTERN = re.compile(r'(?:```(?:json)?\s*)?(\{[^{}]*"severity"[^{}]*\})(?:\s*```)?', re.IGNORECASE)
+
+GATE_DECISIONS = REGISTRY.counter(
+    "code_challenger_gate_decisions_total",
+    "Décisions du court-circuit (skip, fast, full, unknown)",
+    ("decision",)
+)
+
+
+def normalize_severity(value: Any) -> Optional[str]:
+    """
+    Ramène une gravité à l'un des SEVERITY_LEVELS
+    
+    Args:
+        value: Gravité brute ("high", "Élevée"...)
+    
+    Returns:
+        Niveau normalisé, ou None s'il est inconnu
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.strip().lower()
+    text = SEVERITY_ALIASES.get(text, text)
+    return text if text in SEVERITY_LEVELS else None
+
+
+def parse_severity(output: str) -> tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Extrait le bloc JSON de synthèse placé en fin de réponse
+    
+    Args:
+        output: Réponse du modèle
+    
+    Returns:
+        Tuple (réponse sans le bloc de synthèse, synthèse avec "severity"
+        normalisée) ; la synthèse vaut None si le bloc est absent ou illisible
+    """
+    matches = list(SUMMARY_PATTERN.finditer(output))
+    if not matches:
+        return output, None
+    match = matches[-1]
+    try:
+        summary = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return output, None
+    severity = normalize_severity(summary.get("severity"))
+    if severity is None:
+        return output, None
+    summary["severity"] = severity
+    cleaned = (output[:match.start()] + output[match.end():]).strip()
+    return cleaned, summary
+
+
+class PipelineGate:
+    """
+    Décide, d'après la synthèse du rôle de référence, du sort des rôles aval
+    
+    Le rôle de référence (le Challenger par défaut) termine sa réponse par un
+    bloc JSON donnant la gravité maximale des problèmes trouvés. En dessous
+    de `skip_below`, les rôles qui en dépendent (Reviewer, Arbiter) ne sont
+    pas exécutés : le verdict est ACCEPTÉ et le code final est le code
+    original. En dessous de `fast_below`, ils sont exécutés avec
+    `fast_model`. Sans synthèse lisible, le pipeline complet s'exécute.
+    
+    En sortie structurée, la gravité est lue dans le champ max_severity du
+    Challenger et aucune consigne n'est ajoutée à son prompt.
+    """
+    
+    def __init__(self, config: PipelineConfig):
+        """
+        Initialise la décision pour une exécution du pipeline
+        
+        Args:
+            config: Configuration du pipeline (settings.gating)
+        """
+        settings = config.settings.get("gating") or {}
+        self.enabled = bool(settings.get("enabled", False)) and settings.get("role", "challenger") in config.pipeline
+        self.role = settings.get("role", "challenger")
+        self.skip_below = normalize_severity(settings.get("skip_below", "medium"))
+        self.fast_below = normalize_severity(settings.get("fast_below")) if settings.get("fast_model") else None
+        self.fast_model: Optional[str] = settings.get("fast_model") or None
+        self.dependents = dependent_roles(config, self.role) if self.enabled else set()
+        self.structured = self.role in structured_roles(config.settings, config.pipeline)
+        self.summary: Optional[Dict[str, Any]] = None
+        self.decision: Optional[str] = None
+    
+    def instruct(self, role_name: str, prompt: str) -> str:
+        """Ajoute la consigne de synthèse au prompt du rôle de référence"""
+        if not self.enabled or role_name != self.role or not prompt or self.structured:
+            return prompt
+        return prompt + "\n" + GATING_INSTRUCTION
+    
+    def record(self, role_name: str, output: str, structured: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Lit la synthèse du rôle de référence et fixe la décision
+        
+        Args:
+            role_name: Nom du rôle qui vient de terminer
+            output: Réponse du rôle
+            structured: Sortie structurée du rôle (mode sortie structurée)
+        
+        Returns:
+            Réponse sans le bloc de synthèse
+        """
+        if not self.enabled or role_name != self.role:
+            return output
+        
+        if structured is not None and "max_severity" in structured:
+            cleaned = output
+            self.summary = {"severity": structured["max_severity"], "issues": len(structured.get("issues", []))}
+        else:
+            cleaned, self.summary = parse_severity(output)
+        if self.summary is None:
+            self.decision = "unknown"
+        else:
+            rank = SEVERITY_LEVELS.index(self.summary["severity"])
+            if self.skip_below and rank < SEVERITY_LEVELS.index(self.skip_below):
+                self.decision = "skip"
+            elif self.fast_below and rank < SEVERITY_LEVELS.index(self.fast_below):
+                self.decision = "fast"
+            else:
+                self.decision = "full"
+        GATE_DECISIONS.inc(decision=self.decision)
+        severity = self.summary["severity"] if self.summary else "illisible"
+        print(f"[Gating] Gravité {severity} → {self.decision}")
+        return cleaned
+    
+    def skips(self, role_name: str) -> bool:
+        """Indique si un rôle est court-circuité"""
+        return self.decision == "skip" and role_name in self.dependents
+    
+    def route(self, role_name: str, role_config: RoleConfig) -> RoleConfig:
+        """Configuration effective d'un rôle (modèle rapide si la gravité est faible)"""
+        if self.decision == "fast" and role_name in self.dependents:
+            return replace(role_config, model=self.fast_model, ensemble=None)
+        return role_config
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Décision pour le rapport
+        
+        Returns:
+            Rôle de référence, gravité, décision et rôles court-circuités
+        """
+        return {
+            "role": self.role,
+            "severity": self.summary["severity"] if self.summary else None,
+            "issues": self.summary.get("issues") if self.summary else None,
+            "decision": self.decision,
+            "skipped": sorted(self.dependents) if self.decision == "skip" else [],
+            "fast_model": self.fast_model if self.decision == "fast" else None,
+        }
+
+
+def dependent_roles(config: PipelineConfig, role_name: str) -> set[str]:
+    """
+    Rôles qui dépendent (directement ou non) d'un rôle
+    
+    Args:
+        config: Configuration du pipeline
+        role_name: Rôle amont
+    
+    Returns:
+        Noms des rôles aval
+    """
+    dependents: set[str] = set()
+    for candidate in config.pipeline:
+        upstream = config.upstream(candidate)
+        if role_name in upstream or dependents.intersection(upstream):
+            dependents.add(candidate)
+    return dependents
+
+
+def validate_gating(settings: Dict[str, Any], pipeline: list[str]):
+    """
+    Vérifie la section settings.gating
+    
+    Args:
+        settings: Section settings de la configuration
+        pipeline: Rôles du pipeline
+    
+    Raises:
+        ConfigError: Si le rôle de référence ou une gravité est invalide
+    """
+    gating = settings.get("gating") or {}
+    if not gating.get("enabled", False):
+        return
+    role = gating.get("role", "challenger")
+    if role not in pipeline:
+        raise ConfigError(f"Rôle de court-circuit '{role}' absent du pipeline")
+    for key in ("skip_below", "fast_below"):
+        if gating.get(key) is not None and normalize_severity(gating[key]) is None:
+            raise ConfigError(
+                f"Gravité invalide pour gating.{key}: '{gating[key]}' (attendu : {', '.join(SEVERITY_LEVELS)})"
+            )
+    if gating.get("fast_below") and not gating.get("fast_model"):
+        raise ConfigError("gating.fast_below nécessite gating.fast_model")
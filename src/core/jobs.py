@@ -0,0 +1,580 @@
+"""
+File de jobs asynchrone persistante pour les pipelines longs
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, TYPE_CHECKING
+from src.core.chunking import chunk_header
+from src.core.models import Context
+from src.utils.errors import CodeChallengerError
+
+if TYPE_CHECKING:
+    from src.core.orchestrator import PipelineOrchestrator
+
+
+class JobStatus(str, Enum):
+    """État d'un job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# États à partir desquels un job n'évolue plus
+FINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+# Niveaux de priorité acceptés (les valeurs élevées passent en premier)
+MIN_PRIORITY = -10
+MAX_PRIORITY = 10
+
+
+class JobNotFoundError(CodeChallengerError):
+    """Job inconnu"""
+    pass
+
+
+@dataclass
+class Job:
+    """
+    Job de challenge soumis à la file
+    """
+    id: str
+    code: str
+    language: str = "python"
+    constraints: Optional[Dict[str, Any]] = None
+    priority: int = 0
+    client_id: str = "anonymous"
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    current_role: Optional[str] = None
+    outputs: Dict[str, str] = field(default_factory=dict)
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Job dont ce job ré-analyse une nouvelle version (analyse incrémentale)
+    previous_job_id: Optional[str] = None
+    # Sorties partielles d'un code découpé : rôle → morceau → texte (non persistées,
+    # fusionnées dans outputs à la lecture) et lignes de chaque morceau
+    chunk_outputs: Dict[str, Dict[int, str]] = field(default_factory=dict, repr=False)
+    chunk_ranges: list[list[int]] = field(default_factory=list, repr=False)
+    
+    def current_outputs(self) -> Dict[str, str]:
+        """
+        Sorties partielles courantes
+        
+        Les morceaux d'un code découpé s'exécutent en parallèle : leurs
+        sorties sont accumulées séparément puis assemblées dans l'ordre des
+        morceaux, chacune précédée de son en-tête (comme le rapport fusionné).
+        
+        Returns:
+            Sortie partielle de chaque rôle
+        """
+        outputs = dict(self.outputs)
+        total = len(self.chunk_ranges)
+        for role, parts in self.chunk_outputs.items():
+            sections = []
+            for index, text in sorted(parts.items()):
+                if not text:
+                    continue
+                start, end = self.chunk_ranges[index] if index < total else (0, 0)
+                sections.append(f"{chunk_header(index, total, start, end)}\n{text}")
+            outputs[role] = "\n\n".join(sections)
+        return outputs
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertit le job en dictionnaire pour l'API (sans le code soumis)"""
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "language": self.language,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "current_role": self.current_role,
+            "outputs": self.current_outputs(),
+            "report": self.report,
+            "error": self.error,
+            "previous_job_id": self.previous_job_id,
+        }
+
+
+class JobStore:
+    """
+    Persistance SQLite des jobs (survit aux redémarrages du serveur)
+    """
+    
+    def __init__(self, path: str = ".cache/jobs.sqlite3"):
+        """
+        Initialise le stockage
+        
+        Args:
+            path: Chemin du fichier SQLite (":memory:" pour un stockage non persistant)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                client_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._conn.commit()
+    
+    def save(self, job: Job):
+        """
+        Enregistre (ou met à jour) un job
+        
+        Args:
+            job: Job à enregistrer
+        """
+        data = {
+            "code": job.code,
+            "language": job.language,
+            "constraints": job.constraints,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "current_role": job.current_role,
+            "outputs": job.current_outputs(),
+            "report": job.report,
+            "error": job.error,
+            "previous_job_id": job.previous_job_id,
+        }
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO jobs (id, status, priority, client_id, created_at, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job.id,
+                    job.status.value,
+                    job.priority,
+                    job.client_id,
+                    job.created_at,
+                    json.dumps(data, ensure_ascii=False),
+                )
+            )
+            self._conn.commit()
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Charge un job
+        
+        Args:
+            job_id: Identifiant du job
+        
+        Returns:
+            Job chargé, ou None s'il est inconnu
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, priority, client_id, created_at, data FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+    
+    def list_unfinished(self) -> list[Job]:
+        """
+        Retourne les jobs en attente ou interrompus en cours d'exécution
+        
+        Returns:
+            Jobs à replanifier, du plus ancien au plus récent
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT id, status, priority, client_id, created_at, data FROM jobs
+                WHERE status IN (?, ?) ORDER BY created_at ASC
+                """,
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+    
+    def purge_finished(self, older_than: float):
+        """
+        Supprime les jobs terminés depuis plus de `older_than` secondes
+        
+        L'âge est compté depuis la fin du job (finished_at), pas depuis sa
+        création : un job long ou resté en file est conservé aussi longtemps
+        qu'un autre une fois terminé.
+        
+        Args:
+            older_than: Temps minimal (en secondes) écoulé depuis la fin des jobs à supprimer
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                DELETE FROM jobs WHERE status IN (?, ?, ?)
+                AND COALESCE(json_extract(data, '$.finished_at'), created_at) < ?
+                """,
+                (
+                    JobStatus.COMPLETED.value,
+                    JobStatus.FAILED.value,
+                    JobStatus.CANCELLED.value,
+                    time.time() - older_than,
+                )
+            )
+            self._conn.commit()
+    
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def _row_to_job(row: tuple) -> Job:
+        """Reconstruit un job à partir d'une ligne SQLite"""
+        job_id, status, priority, client_id, created_at, raw = row
+        data = json.loads(raw)
+        return Job(
+            id=job_id,
+            code=data["code"],
+            language=data.get("language", "python"),
+            constraints=data.get("constraints"),
+            priority=priority,
+            client_id=client_id,
+            status=JobStatus(status),
+            created_at=created_at,
+            started_at=data.get("started_at"),
+            finished_at=data.get("finished_at"),
+            current_role=data.get("current_role"),
+            outputs=data.get("outputs") or {},
+            report=data.get("report"),
+            error=data.get("error"),
+            previous_job_id=data.get("previous_job_id"),
+        )
+
+
+class JobScheduler:
+    """
+    Planificateur de jobs avec priorités et équité entre clients
+    
+    Les jobs sont servis par priorité décroissante, bornée à
+    [MIN_PRIORITY, MAX_PRIORITY]. Dans chaque niveau de priorité, chaque
+    client reçoit un temps virtuel qui avance d'une unité par job soumis :
+    un client qui soumet cent jobs d'un coup ne bloque pas les autres, ses
+    jobs sont entrelacés avec ceux des autres clients du même niveau.
+    """
+    
+    def __init__(
+        self,
+        store: JobStore,
+        get_orchestrator: Callable[[], Optional["PipelineOrchestrator"]],
+        max_concurrent: int = 1,
+        retention_seconds: Optional[float] = 7 * 86400
+    ):
+        """
+        Initialise le planificateur
+        
+        Args:
+            store: Stockage persistant des jobs
+            get_orchestrator: Retourne l'orchestrateur à utiliser pour un nouveau job
+            max_concurrent: Nombre de jobs exécutés simultanément
+            retention_seconds: Durée de conservation des jobs terminés (None = illimitée)
+        """
+        self.store = store
+        self.get_orchestrator = get_orchestrator
+        self.max_concurrent = max(1, max_concurrent)
+        self.retention_seconds = retention_seconds
+        
+        self._queue: list[tuple[int, float, int, str]] = []
+        self._sequence = itertools.count()
+        # Temps virtuel par (client, priorité) et plancher par priorité
+        self._client_vtime: Dict[tuple[str, int], float] = {}
+        self._vtime_floor: Dict[int, float] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Condition] = None
+    
+    async def start(self):
+        """Replanifie les jobs persistés non terminés et démarre les workers"""
+        self._wakeup = asyncio.Condition()
+        
+        if self.retention_seconds:
+            self.store.purge_finished(self.retention_seconds)
+        
+        for job in self.store.list_unfinished():
+            # Un job interrompu par un arrêt du serveur repart de zéro
+            job.status = JobStatus.QUEUED
+            job.current_role = None
+            job.outputs = {}
+            job.chunk_outputs = {}
+            self.store.save(job)
+            self._enqueue(job)
+        if self._queue:
+            print(f"[Jobs] {len(self._queue)} job(s) replanifié(s) après redémarrage")
+        
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.max_concurrent)
+        ]
+    
+    async def stop(self):
+        """Arrête les workers ; les jobs en cours retournent dans la file persistée"""
+        for task in self._tasks.values():
+            task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        for job in self._jobs.values():
+            if job.status == JobStatus.RUNNING:
+                job.status = JobStatus.QUEUED
+                self.store.save(job)
+    
+    async def submit(
+        self,
+        code: str,
+        language: str = "python",
+        constraints: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        client_id: str = "anonymous",
+        previous_job_id: Optional[str] = None
+    ) -> Job:
+        """
+        Ajoute un job à la file
+        
+        Args:
+            code: Code source à analyser
+            language: Langage du code
+            constraints: Contraintes optionnelles (contexte)
+            priority: Priorité (les valeurs élevées passent en premier), entre
+                MIN_PRIORITY et MAX_PRIORITY
+            client_id: Identifiant du client (équité entre clients)
+            previous_job_id: Job ayant analysé la version précédente du code
+                (analyse incrémentale)
+        
+        Returns:
+            Job créé, à l'état "queued"
+        
+        Raises:
+            ValueError: Si la priorité est hors des bornes
+        """
+        if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+            raise ValueError(f"Priorité hors bornes ({MIN_PRIORITY} à {MAX_PRIORITY}): {priority}")
+        job = Job(
+            id=uuid.uuid4().hex,
+            code=code,
+            language=language,
+            constraints=constraints,
+            priority=priority,
+            client_id=client_id,
+            previous_job_id=previous_job_id
+        )
+        self.store.save(job)
+        self._enqueue(job)
+        
+        if self._wakeup is not None:
+            async with self._wakeup:
+                self._wakeup.notify()
+        
+        print(f"[Jobs] Job {job.id} soumis (priorité: {priority}, client: {client_id})")
+        return job
+    
+    def get(self, job_id: str) -> Job:
+        """
+        Retourne l'état courant d'un job (avec les sorties partielles en cours)
+        
+        Args:
+            job_id: Identifiant du job
+        
+        Returns:
+            Job
+        
+        Raises:
+            JobNotFoundError: Si le job est inconnu
+        """
+        job = self._jobs.get(job_id) or self.store.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Job introuvable: {job_id}")
+        return job
+    
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        Position d'un job dans la file d'attente (0 = prochain servi)
+        
+        Args:
+            job_id: Identifiant du job
+        
+        Returns:
+            Position, ou None si le job n'est pas en attente
+        """
+        pending = sorted(entry for entry in self._queue if entry[3] in self._jobs)
+        for index, entry in enumerate(pending):
+            if entry[3] == job_id:
+                return index
+        return None
+    
+    def cancel(self, job_id: str) -> Job:
+        """
+        Annule un job en attente ou en cours d'exécution
+        
+        Args:
+            job_id: Identifiant du job
+        
+        Returns:
+            Job dans son nouvel état
+        
+        Raises:
+            JobNotFoundError: Si le job est inconnu
+        """
+        job = self.get(job_id)
+        if job.status in FINAL_STATUSES:
+            return job
+        
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        
+        job.status = JobStatus.CANCELLED
+        job.finished_at = time.time()
+        # Un job annulé en attente est ignoré lorsqu'il sort de la file
+        self._jobs.pop(job_id, None)
+        self.store.save(job)
+        print(f"[Jobs] Job {job_id} annulé")
+        return job
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de la file
+        
+        Returns:
+            Nombre de jobs en attente et en cours
+        """
+        return {
+            "queued": sum(1 for job in self._jobs.values() if job.status == JobStatus.QUEUED),
+            "running": len(self._tasks),
+            "max_concurrent": self.max_concurrent,
+        }
+    
+    def _enqueue(self, job: Job):
+        """Place un job dans la file selon sa priorité et le temps virtuel de son client à cette priorité"""
+        key = (job.client_id, job.priority)
+        vtime = max(self._client_vtime.get(key, 0.0), self._vtime_floor.get(job.priority, 0.0)) + 1
+        self._client_vtime[key] = vtime
+        self._jobs[job.id] = job
+        heapq.heappush(self._queue, (-job.priority, vtime, next(self._sequence), job.id))
+    
+    async def _next_job(self) -> Job:
+        """Attend et retire le prochain job à exécuter"""
+        assert self._wakeup is not None
+        async with self._wakeup:
+            while True:
+                while self._queue:
+                    priority, vtime, _, job_id = heapq.heappop(self._queue)
+                    job = self._jobs.get(job_id)
+                    if job is not None and job.status == JobStatus.QUEUED:
+                        self._vtime_floor[-priority] = max(self._vtime_floor.get(-priority, 0.0), vtime - 1)
+                        return job
+                await self._wakeup.wait()
+    
+    async def _worker(self, index: int):
+        """Boucle d'un worker : exécute les jobs un par un"""
+        while True:
+            job = await self._next_job()
+            task = asyncio.create_task(self._run_job(job))
+            self._tasks[job.id] = task
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._tasks.pop(job.id, None)
+    
+    async def _run_job(self, job: Job):
+        """Exécute le pipeline d'un job en publiant les sorties partielles"""
+        orchestrator = self.get_orchestrator()
+        if orchestrator is None:
+            self._finish(job, JobStatus.FAILED, error="Orchestrateur non initialisé")
+            return
+        
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        self.store.save(job)
+        print(f"[Jobs] Démarrage du job {job.id}")
+        
+        def on_event(event: Dict[str, Any]):
+            role = event.get("role")
+            chunk = event.get("chunk")
+            if event["type"] == "chunks":
+                job.chunk_ranges = event["ranges"]
+            elif event["type"] == "role_start":
+                job.current_role = role
+                if chunk is None:
+                    job.outputs[role] = ""
+                else:
+                    # Seule la sortie du morceau qui (re)démarre est remise à zéro
+                    job.chunk_outputs.setdefault(role, {})[chunk] = ""
+            elif event["type"] == "token":
+                if chunk is None:
+                    job.outputs[role] = job.outputs.get(role, "") + event["delta"]
+                else:
+                    parts = job.chunk_outputs.setdefault(role, {})
+                    parts[chunk] = parts.get(chunk, "") + event["delta"]
+            elif event["type"] in ("role_end", "role_error"):
+                # Persister à chaque fin de rôle (et non à chaque fragment)
+                self.store.save(job)
+        
+        context = Context(language=job.language, constraints=job.constraints)
+        try:
+            if job.previous_job_id is not None:
+                report = await orchestrator.run_incremental_async(
+                    job.code,
+                    context,
+                    previous_code=self._previous_code(job.previous_job_id),
+                    on_event=on_event
+                )
+            else:
+                report = await orchestrator.run_pipeline_async(job.code, context, on_event=on_event)
+        except asyncio.CancelledError:
+            if job.status != JobStatus.CANCELLED:
+                # Arrêt du serveur : le job sera replanifié au redémarrage
+                raise
+            return
+        except Exception as e:
+            self._finish(job, JobStatus.FAILED, error=str(e))
+            return
+        
+        job.report = report.to_dict()
+        self._finish(job, JobStatus.COMPLETED)
+    
+    def _previous_code(self, job_id: str) -> Optional[str]:
+        """Code du job précédent d'une analyse incrémentale (None s'il a été purgé)"""
+        try:
+            return self.get(job_id).code
+        except JobNotFoundError:
+            return None
+    
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None):
+        """Enregistre l'état final d'un job et le retire de la mémoire"""
+        job.status = status
+        job.error = error
+        job.current_role = None
+        job.finished_at = time.time()
+        self.store.save(job)
+        self._jobs.pop(job.id, None)
+        print(f"[Jobs] Job {job.id} terminé: {status.value}")
@@ -0,0 +1,306 @@
+"""
+Métriques du pipeline au format d'exposition Prometheus
+"""
+
+import math
+import threading
+from typing import Dict, Any, Optional, Iterable
+from src.core.models import ChatResult
+
+
+# Bornes par défaut des histogrammes de durée (secondes)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Bornes des histogrammes de débit (tokens par seconde)
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250)
+
+
+def _format_value(value: float) -> str:
+    """Formate une valeur selon la syntaxe Prometheus"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    """Construit le bloc {nom="valeur",...} en échappant les valeurs"""
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """
+    Base commune : nom, aide, noms de labels et valeurs par combinaison de labels
+    """
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[tuple[str, ...], Any] = {}
+    
+    def _key(self, labels: Dict[str, Any]) -> tuple[str, ...]:
+        """Valeurs des labels dans l'ordre déclaré"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Labels attendus pour {self.name}: {', '.join(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def render(self) -> list[str]:
+        """Lignes d'exposition de la métrique"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+    
+    def _render_sample(self, key: tuple[str, ...], value: Any) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+    kind = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Incrémente le compteur pour une combinaison de labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Valeur instantanée"""
+    kind = "gauge"
+    
+    def set(self, value: float, **labels):
+        """Fixe la valeur pour une combinaison de labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Augmente la valeur pour une combinaison de labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels):
+        """Diminue la valeur pour une combinaison de labels"""
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Histogramme à bornes fixes (buckets cumulés, somme et nombre d'observations)"""
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        """Enregistre une observation pour une combinaison de labels"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+    
+    def _render_sample(self, key: tuple[str, ...], state: Dict[str, Any]) -> list[str]:
+        lines = []
+        for bound, count in zip(self.buckets, state["counts"]):
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{labels} {state['count']}")
+        plain = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{plain} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{plain} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques exposées sur /api/metrics
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Déclare (ou retourne) un compteur"""
+        return self._register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """Déclare (ou retourne) une jauge"""
+        return self._register(Gauge(name, help_text, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS
+    ) -> Histogram:
+        """Déclare (ou retourne) un histogramme"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+    
+    def render(self) -> str:
+        """
+        Sérialise toutes les métriques au format texte Prometheus (version 0.0.4)
+        
+        Returns:
+            Corps de la réponse /api/metrics
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+# Registre global de l'application
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "code_challenger_stage_duration_seconds",
+    "Durée de chaque étape d'un rôle (render, http_wait, ttft, generation, load, prompt_eval, eval)",
+    ("role", "model", "stage")
+)
+TOKENS = REGISTRY.counter(
+    "code_challenger_tokens_total",
+    "Tokens évalués (prompt) et générés (completion) par Ollama",
+    ("role", "model", "kind")
+)
+DECODE_THROUGHPUT = REGISTRY.histogram(
+    "code_challenger_decode_tokens_per_second",
+    "Débit de génération mesuré par Ollama (eval_count / eval_duration)",
+    ("role", "model"),
+    THROUGHPUT_BUCKETS
+)
+ROLE_CALLS = REGISTRY.counter(
+    "code_challenger_role_calls_total",
+    "Exécutions de rôles par issue (ok, cached, error)",
+    ("role", "model", "status")
+)
+PIPELINE_DURATION = REGISTRY.histogram(
+    "code_challenger_pipeline_duration_seconds",
+    "Durée complète d'un pipeline (hors rapports servis depuis le cache)",
+    ("mode",)
+)
+
+
+def _seconds(nanoseconds: Optional[int]) -> Optional[float]:
+    """Convertit une durée Ollama (nanosecondes) en secondes"""
+    return nanoseconds / 1e9 if nanoseconds is not None else None
+
+
+def observe_role(
+    role_name: str,
+    model: str,
+    result: ChatResult,
+    render_seconds: float,
+    wall_seconds: float
+) -> Dict[str, Any]:
+    """
+    Enregistre les mesures d'un rôle et retourne leur synthèse pour le rapport
+    
+    Les étapes mesurées côté client sont le rendu du template, l'attente de
+    la réponse HTTP, le temps jusqu'au premier token et la génération. Les
+    compteurs d'Ollama distinguent le chargement du modèle, le prefill
+    (prompt_eval) et le décodage (eval). Sans streaming, le temps jusqu'au
+    premier token et la durée de génération sont déduits de ces compteurs.
+    
+    Args:
+        role_name: Nom du rôle
+        model: Modèle utilisé
+        result: Réponse du modèle (avec statistiques et mesures client)
+        render_seconds: Durée du rendu du prompt
+        wall_seconds: Durée totale de l'appel
+    
+    Returns:
+        Mesures du rôle (secondes et tokens), pour Report.metrics
+    """
+    status = "cached" if result.cached else "ok"
+    ROLE_CALLS.inc(role=role_name, model=model, status=status)
+    
+    load = _seconds(result.load_duration)
+    prompt_eval = _seconds(result.prompt_eval_duration)
+    eval_seconds = _seconds(result.eval_duration)
+    
+    time_to_first_token = result.time_to_first_token
+    if time_to_first_token is None and prompt_eval is not None:
+        time_to_first_token = (load or 0.0) + prompt_eval
+    generation = None
+    if result.time_to_first_token is not None:
+        generation = max(0.0, wall_seconds - result.time_to_first_token)
+    elif eval_seconds is not None:
+        generation = eval_seconds
+    tokens_per_second = None
+    if result.eval_count and result.eval_duration:
+        tokens_per_second = result.eval_count / (result.eval_duration / 1e9)
+    
+    stages = {
+        "render": render_seconds,
+        "http_wait": result.http_wait,
+        "ttft": time_to_first_token,
+        "generation": generation,
+        "load": load,
+        "prompt_eval": prompt_eval,
+        "eval": eval_seconds,
+    }
+    if not result.cached:
+        for stage, value in stages.items():
+            if value is not None:
+                STAGE_DURATION.observe(value, role=role_name, model=model, stage=stage)
+        if result.prompt_eval_count is not None:
+            TOKENS.inc(result.prompt_eval_count, role=role_name, model=model, kind="prompt")
+        if result.eval_count is not None:
+            TOKENS.inc(result.eval_count, role=role_name, model=model, kind="completion")
+        if tokens_per_second is not None:
+            DECODE_THROUGHPUT.observe(tokens_per_second, role=role_name, model=model)
+    
+    return {
+        "model": model,
+        "cached": result.cached,
+        "wall_seconds": round(wall_seconds, 4),
+        **{f"{stage}_seconds": round(value, 4) for stage, value in stages.items() if value is not None},
+        "prompt_eval_count": result.prompt_eval_count,
+        "eval_count": result.eval_count,
+        "tokens_per_second": round(tokens_per_second, 2) if tokens_per_second is not None else None,
+    }
+
+
+def observe_role_error(role_name: str, model: str):
+    """Compte l'échec d'un rôle"""
+    ROLE_CALLS.inc(role=role_name, model=model, status="error")
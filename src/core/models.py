@@ -2,9 +2,10 @@
 Modèles de données pour Code Challenger Local
 """
 
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, field
+from typing import Optional, Union, Dict, Any, Iterable
 from enum import Enum
+from src.config.template_engine import CompiledTemplate, compile_template
 
 
 class Verdict(str, Enum):
@@ -14,6 +15,23 @@ class Verdict(str, Enum):
     REFUSE = "REFUSÉ"
 
 
+# Ordre de gravité des verdicts (du plus favorable au plus sévère)
+VERDICT_SEVERITY = [Verdict.ACCEPTE, Verdict.ACCEPTE_AVEC_RESERVES, Verdict.REFUSE]
+
+
+def worst_verdict(verdicts: Iterable[Verdict]) -> Verdict:
+    """
+    Retourne le verdict le plus sévère d'une liste
+    
+    Args:
+        verdicts: Verdicts à comparer
+        
+    Returns:
+        Verdict le plus sévère (ACCEPTÉ si la liste est vide)
+    """
+    return max(verdicts, key=VERDICT_SEVERITY.index, default=Verdict.ACCEPTE)
+
+
 @dataclass
 class Context:
     """
@@ -34,6 +52,49 @@ class Context:
         }
 
 
+@dataclass
+class ChatResult:
+    """
+    Réponse d'un appel /api/chat avec les compteurs renvoyés par Ollama
+    
+    Les durées d'Ollama sont en nanosecondes, comme dans sa réponse ; les
+    mesures faites côté client (http_wait, time_to_first_token) en secondes.
+    """
+    content: str
+    prompt_eval_count: Optional[int] = None
+    eval_count: Optional[int] = None
+    prompt_eval_duration: Optional[int] = None
+    eval_duration: Optional[int] = None
+    load_duration: Optional[int] = None
+    total_duration: Optional[int] = None
+    cached: bool = False
+    # Attente des en-têtes de la réponse HTTP
+    http_wait: Optional[float] = None
+    # Délai avant le premier fragment (streaming uniquement)
+    time_to_first_token: Optional[float] = None
+    # Sortie validée par le schéma du rôle (mode sortie structurée)
+    structured: Optional[Dict[str, Any]] = None
+    # Issue de l'exécution multi-modèles (mode, modèle retenu, issue par modèle)
+    ensemble: Optional[Dict[str, Any]] = None
+    # Taille de contexte transmise à Ollama (budget de contexte)
+    num_ctx: Optional[int] = None
+    
+    @classmethod
+    def from_ollama(cls, content: str, data: Dict[str, Any]) -> "ChatResult":
+        """Construit le résultat à partir du dernier message JSON d'Ollama (complété des mesures client)"""
+        return cls(
+            content=content,
+            prompt_eval_count=data.get("prompt_eval_count"),
+            eval_count=data.get("eval_count"),
+            prompt_eval_duration=data.get("prompt_eval_duration"),
+            eval_duration=data.get("eval_duration"),
+            load_duration=data.get("load_duration"),
+            total_duration=data.get("total_duration"),
+            http_wait=data.get("http_wait"),
+            time_to_first_token=data.get("time_to_first_token"),
+        )
+
+
 @dataclass
 class Report:
     """
@@ -44,6 +105,10 @@ class Report:
     arbiter: str
     verdict: Verdict
     code_final: str
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    outputs: Dict[str, str] = field(default_factory=dict)
+    # Sorties structurées validées : rôle → champs (mode sortie structurée)
+    structured: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convertit le rapport en dictionnaire pour l'API"""
@@ -53,7 +118,71 @@ class Report:
             "arbiter": self.arbiter,
             "verdict": self.verdict.value,
             "code_final": self.code_final,
+            "metrics": self.metrics,
+            "outputs": self.outputs,
+            "structured": self.structured,
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Report":
+        """Reconstruit un rapport à partir de sa forme dictionnaire (cache, persistance)"""
+        return cls(
+            challenger=data.get("challenger", ""),
+            reviewer=data.get("reviewer", ""),
+            arbiter=data.get("arbiter", ""),
+            verdict=Verdict(data.get("verdict", Verdict.ACCEPTE.value)),
+            code_final=data.get("code_final", ""),
+            metrics=data.get("metrics") or {},
+            outputs=data.get("outputs") or {},
+            structured=data.get("structured") or {},
+        )
+
+
+# Câblage historique des rôles : rôle → {placeholder: [rôles sources]}
+DEFAULT_ROLE_INPUTS: Dict[str, Dict[str, list[str]]] = {
+    "reviewer": {"CRITIQUES": ["challenger"]},
+    "arbiter": {"CRITIQUES": ["challenger"], "CODE_AMELIORE": ["reviewer"]},
+}
+
+
+def default_role_inputs(role_name: str, pipeline: list[str]) -> Dict[str, list[str]]:
+    """
+    Câblage historique d'un rôle, restreint aux rôles présents dans le pipeline
+    
+    Args:
+        role_name: Nom du rôle
+        pipeline: Rôles du pipeline
+    
+    Returns:
+        Dictionnaire placeholder → rôles sources
+    """
+    return {
+        placeholder: [source for source in sources if source in pipeline]
+        for placeholder, sources in DEFAULT_ROLE_INPUTS.get(role_name, {}).items()
+        if any(source in pipeline for source in sources)
+    }
+
+
+@dataclass
+class EnsembleMember:
+    """
+    Modèle candidat d'un rôle exécuté en ensemble
+    """
+    model: str
+    # Durée maximale de la réponse complète de ce modèle (secondes)
+    timeout: int
+
+
+@dataclass
+class EnsembleConfig:
+    """
+    Exécution concurrente d'un rôle par plusieurs modèles (section roles.<rôle>.ensemble)
+    """
+    # Candidats par ordre de préférence, le modèle du rôle en tête
+    members: list[EnsembleMember]
+    # "first" : première réponse valide, les autres sont annulées ;
+    # "merge" : constats de tous les modèles fusionnés et dédupliqués
+    mode: str = "first"
 
 
 @dataclass
@@ -66,12 +195,31 @@ class RoleConfig:
     top_p: float
     num_ctx: int
     timeout: int
+    # Durée de maintien du modèle en mémoire ("30m", secondes, -1 = illimitée)
+    keep_alive: Optional[Union[str, int]] = None
+    # Modèles candidats exécutés en parallèle (None = modèle unique)
+    ensemble: Optional[EnsembleConfig] = None
 
 
 @dataclass
+class EndpointConfig:
+    """
+    Instance Ollama du pool (section providers)
+    """
+    name: str
+    base_url: str
+    timeout: int
+    # Modèles proposés (None = découverts via /api/tags)
+    models: Optional[list[str]] = None
+    # Requêtes traitées en parallèle par l'instance (OLLAMA_NUM_PARALLEL)
+    num_parallel: int = 1
+
+
+@dataclass(frozen=True)
 class PipelineConfig:
     """
-    Configuration complète du pipeline
+    Configuration complète du pipeline (immuable : un rechargement produit
+    une nouvelle instance)
     """
     ollama_base_url: str
     ollama_timeout: int
@@ -79,4 +227,55 @@ class PipelineConfig:
     pipeline: list[str]
     templates: Dict[str, str]
     settings: Dict[str, Any]
+    # Placeholders alimentés par les rôles amont : rôle → {placeholder: [rôles sources]}
+    inputs: Dict[str, Dict[str, list[str]]] = field(default_factory=dict)
+    # Instances Ollama (vide = ollama_base_url seule)
+    endpoints: list[EndpointConfig] = field(default_factory=list)
+    # Templates compilés au chargement : rôle → segments et placeholders utilisés
+    compiled_templates: Dict[str, CompiledTemplate] = field(default_factory=dict)
+    
+    def template(self, role_name: str) -> CompiledTemplate:
+        """
+        Template compilé d'un rôle
+        
+        Args:
+            role_name: Nom du rôle
+        
+        Returns:
+            Template compilé au chargement (compilé à la volée à défaut)
+        """
+        compiled = self.compiled_templates.get(role_name)
+        if compiled is None:
+            compiled = compile_template(self.templates[role_name])
+        return compiled
+    
+    def role_inputs(self, role_name: str) -> Dict[str, list[str]]:
+        """
+        Placeholders qu'un rôle reçoit des rôles amont
+        
+        Sans déclaration explicite, le câblage historique s'applique
+        (Reviewer ← Challenger, Arbiter ← Challenger et Reviewer).
+        
+        Args:
+            role_name: Nom du rôle
+        
+        Returns:
+            Dictionnaire placeholder → rôles sources (présents dans le pipeline)
+        """
+        if role_name in self.inputs:
+            return self.inputs[role_name]
+        return default_role_inputs(role_name, self.pipeline)
+    
+    def upstream(self, role_name: str) -> list[str]:
+        """
+        Rôles dont un rôle dépend directement
+        
+        Args:
+            role_name: Nom du rôle
+        
+        Returns:
+            Rôles sources, sans doublon, dans l'ordre du pipeline
+        """
+        sources = {source for sources in self.role_inputs(role_name).values() for source in sources}
+        return [name for name in self.pipeline if name in sources]
 
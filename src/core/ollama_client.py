@@ -2,26 +2,86 @@
 Client pour l'API Ollama
 """
 
+import asyncio
+import json
+import time
+import httpx
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Optional, Union, AsyncIterator, Callable
+from src.core.models import ChatResult
 from src.utils.errors import OllamaError, OllamaTimeoutError
 
 
+def http_options(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Options du pool de connexions HTTP (settings.http), communes aux clients sync et async
+    
+    Args:
+        settings: Section settings de la configuration
+    
+    Returns:
+        Paramètres pool_size, connect_retries et backoff_factor des clients
+    """
+    http_settings = settings.get("http") or {}
+    return {
+        "pool_size": max(1, int(http_settings.get("pool_size", 10))),
+        "connect_retries": max(0, int(http_settings.get("connect_retries", 2))),
+        "backoff_factor": float(http_settings.get("backoff_factor", 0.5)),
+    }
+
+
 class OllamaClient:
     """
     Client pour interagir avec l'API Ollama locale
+    
+    Toutes les requêtes passent par une requests.Session partagée : les
+    connexions TCP sont gardées ouvertes (keep-alive) et réutilisées d'un
+    rôle à l'autre. Les échecs de connexion sont réessayés avec une attente
+    exponentielle ; une requête déjà reçue par Ollama n'est jamais renvoyée.
     """
     
-    def __init__(self, base_url: str = "http://127.0.0.1:11434", timeout: int = 300):
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:11434",
+        timeout: int = 300,
+        pool_size: int = 10,
+        connect_retries: int = 2,
+        backoff_factor: float = 0.5
+    ):
         """
         Initialise le client Ollama
         
         Args:
             base_url: URL de base de l'API Ollama
             timeout: Timeout par défaut en secondes
+            pool_size: Nombre de connexions keep-alive conservées
+            connect_retries: Nouvelles tentatives en cas d'échec de connexion
+            backoff_factor: Base de l'attente exponentielle entre deux tentatives (secondes)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=connect_retries,
+                connect=connect_retries,
+                read=0,
+                status=0,
+                other=0,
+                backoff_factor=backoff_factor,
+                raise_on_status=False
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def close(self):
+        """Ferme les connexions de la session HTTP"""
+        self.session.close()
     
     def chat(
         self,
@@ -31,7 +91,8 @@ class OllamaClient:
         top_p: float = 0.9,
         num_ctx: int = 4096,
         timeout: Optional[int] = None,
-        max_retry: int = 1
+        max_retry: int = 1,
+        response_format: Optional[Union[str, Dict[str, Any]]] = None
     ) -> str:
         """
         Envoie une requête de chat à Ollama
@@ -44,6 +105,7 @@ class OllamaClient:
             num_ctx: Taille du contexte
             timeout: Timeout spécifique (utilise self.timeout si None)
             max_retry: Nombre maximum de tentatives en cas de réponse vide
+            response_format: Format imposé à la réponse ("json" ou schéma JSON)
             
         Returns:
             Réponse du modèle
@@ -55,21 +117,9 @@ class OllamaClient:
         url = f"{self.base_url}/api/chat"
         timeout_value = timeout if timeout is not None else self.timeout
         
-        payload = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "top_p": top_p,
-                "num_ctx": num_ctx
-            }
-        }
+        payload = _build_chat_payload(
+            model, prompt, temperature, top_p, num_ctx, response_format=response_format
+        )
         
         # Tentatives avec retry en cas de réponse vide
         last_error = None
@@ -78,7 +128,7 @@ class OllamaClient:
                 print(f"[Ollama] Tentative {attempt + 1}/{max_retry + 1} - Modèle: {model}, URL: {url}")
                 print(f"[Ollama] Envoi de la requête (timeout: {timeout_value}s)...")
                 
-                response = requests.post(
+                response = self.session.post(
                     url,
                     json=payload,
                     timeout=timeout_value
@@ -138,8 +188,452 @@ class OllamaClient:
             True si Ollama est disponible, False sinon
         """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except Exception:
             return False
 
+
+def _build_chat_payload(
+    model: str,
+    prompt: str,
+    temperature: float,
+    top_p: float,
+    num_ctx: int,
+    stream: bool = False,
+    history: Optional[list[Dict[str, str]]] = None,
+    keep_alive: Optional[str] = None,
+    response_format: Optional[Union[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Construit le corps d'une requête /api/chat (commun aux clients sync et async)
+    
+    Args:
+        model: Nom du modèle Ollama
+        prompt: Prompt à envoyer
+        temperature: Paramètre temperature
+        top_p: Paramètre top_p
+        num_ctx: Taille du contexte
+        stream: Si True, Ollama renvoie la réponse fragment par fragment (NDJSON)
+        history: Messages précédents de la conversation (placés avant le prompt)
+        keep_alive: Durée de maintien du modèle en mémoire après la requête (ex: "10m")
+        response_format: Format imposé à la réponse ("json" ou schéma JSON)
+        
+    Returns:
+        Payload JSON de la requête
+    """
+    payload = {
+        "model": model,
+        "messages": list(history or []) + [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "stream": stream,
+        "options": {
+            "temperature": temperature,
+            "top_p": top_p,
+            "num_ctx": num_ctx
+        }
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    if response_format is not None:
+        payload["format"] = response_format
+    return payload
+
+
+def _parse_stream_line(line: Optional[str]) -> tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Décode une ligne NDJSON d'une réponse /api/chat en streaming
+    
+    Args:
+        line: Ligne brute reçue d'Ollama
+        
+    Returns:
+        Tuple (fragment de texte, données finales si la génération est terminée)
+        
+    Raises:
+        OllamaError: Si la ligne est invalide ou signale une erreur
+    """
+    if not line or not line.strip():
+        return "", None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise OllamaError(f"Fragment de streaming Ollama invalide: {line[:200]}") from e
+    if "error" in data:
+        raise OllamaError(f"Erreur Ollama pendant le streaming: {data['error']}")
+    delta = data.get("message", {}).get("content", "")
+    return delta, data if data.get("done") else None
+
+
+class AsyncOllamaClient:
+    """
+    Client asynchrone pour l'API Ollama locale
+    
+    Utilise un unique httpx.AsyncClient (pool de connexions keep-alive) créé
+    à la première utilisation, afin de ne pas bloquer la boucle d'événements
+    pendant les générations longues. Comme pour le client synchrone, seuls
+    les échecs de connexion sont réessayés.
+    """
+    
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:11434",
+        timeout: int = 300,
+        max_connections: int = 10,
+        connect_retries: int = 2,
+        backoff_factor: float = 0.5
+    ):
+        """
+        Initialise le client Ollama asynchrone
+        
+        Args:
+            base_url: URL de base de l'API Ollama
+            timeout: Timeout par défaut en secondes
+            max_connections: Taille maximale du pool de connexions HTTP
+            connect_retries: Nouvelles tentatives en cas d'échec de connexion
+            backoff_factor: Base de l'attente exponentielle entre deux tentatives (secondes)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.connect_retries = connect_retries
+        self.backoff_factor = backoff_factor
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Retourne le client HTTP partagé (créé à la demande)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Ferme le pool de connexions HTTP"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    async def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        """
+        Envoie une requête en réessayant les échecs de connexion
+        
+        L'attente double à chaque tentative (backoff_factor, 2 × backoff_factor...).
+        La requête n'ayant pas atteint Ollama, la renvoyer est sans risque.
+        
+        Args:
+            request: Requête construite par le client partagé
+            stream: Si True, le corps de la réponse est lu au fil de l'eau
+        
+        Returns:
+            Réponse HTTP (à fermer par l'appelant en mode stream)
+        """
+        client = self._get_client()
+        for attempt in range(self.connect_retries + 1):
+            try:
+                return await client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if attempt >= self.connect_retries:
+                    raise
+                delay = self.backoff_factor * (2 ** attempt)
+                print(f"[Ollama] ⚠️ Connexion impossible à {self.base_url} ({e}), nouvelle tentative dans {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def chat(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        num_ctx: int = 4096,
+        timeout: Optional[int] = None,
+        max_retry: int = 1
+    ) -> str:
+        """
+        Envoie une requête de chat à Ollama sans bloquer la boucle d'événements
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            temperature: Paramètre temperature
+            top_p: Paramètre top_p
+            num_ctx: Taille du contexte
+            timeout: Timeout spécifique (utilise self.timeout si None)
+            max_retry: Nombre maximum de tentatives en cas de réponse vide
+            
+        Returns:
+            Réponse du modèle
+            
+        Raises:
+            OllamaError: En cas d'erreur HTTP
+            OllamaTimeoutError: En cas de timeout
+        """
+        result = await self.complete(
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            top_p=top_p,
+            num_ctx=num_ctx,
+            timeout=timeout,
+            max_retry=max_retry
+        )
+        return result.content
+    
+    async def complete(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        num_ctx: int = 4096,
+        timeout: Optional[int] = None,
+        max_retry: int = 1,
+        history: Optional[list[Dict[str, str]]] = None,
+        keep_alive: Optional[str] = None,
+        response_format: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> ChatResult:
+        """
+        Envoie une requête de chat et retourne la réponse avec les statistiques d'Ollama
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            temperature: Paramètre temperature
+            top_p: Paramètre top_p
+            num_ctx: Taille du contexte
+            timeout: Timeout spécifique (utilise self.timeout si None)
+            max_retry: Nombre maximum de tentatives en cas de réponse vide
+            history: Messages précédents de la conversation
+            keep_alive: Durée de maintien du modèle en mémoire après la requête
+            response_format: Format imposé à la réponse ("json" ou schéma JSON)
+            
+        Returns:
+            Réponse du modèle et compteurs (prompt_eval_count, eval_count...)
+            
+        Raises:
+            OllamaError: En cas d'erreur HTTP
+            OllamaTimeoutError: En cas de timeout
+        """
+        timeout_value = timeout if timeout is not None else self.timeout
+        payload = _build_chat_payload(
+            model, prompt, temperature, top_p, num_ctx,
+            history=history, keep_alive=keep_alive, response_format=response_format
+        )
+        request = self._get_client().build_request("POST", "/api/chat", json=payload, timeout=timeout_value)
+        
+        last_error = None
+        for attempt in range(max_retry + 1):
+            try:
+                print(f"[Ollama] Tentative async {attempt + 1}/{max_retry + 1} - Modèle: {model}")
+                
+                start_time = time.perf_counter()
+                response = await self._send(request)
+                # Sans streaming, Ollama ne répond qu'une fois la génération terminée
+                http_wait = time.perf_counter() - start_time
+                response.raise_for_status()
+                data = response.json()
+                
+                if "message" in data and "content" in data["message"]:
+                    content = data["message"]["content"].strip()
+                    
+                    if not content and attempt < max_retry:
+                        print(f"[Ollama] Réponse vide, nouvelle tentative...")
+                        continue
+                    
+                    print(f"[Ollama] Réponse obtenue (longueur: {len(content)} caractères)")
+                    return ChatResult.from_ollama(content, {**data, "http_wait": http_wait})
+                else:
+                    raise OllamaError(f"Format de réponse Ollama invalide: {data}")
+                    
+            except httpx.TimeoutException as e:
+                print(f"[Ollama] ⚠️ TIMEOUT après {timeout_value}s (modèle: {model})")
+                raise OllamaTimeoutError(
+                    f"Timeout lors de l'appel à Ollama (modèle: {model}, timeout: {timeout_value}s)"
+                ) from e
+                
+            except httpx.HTTPError as e:
+                print(f"[Ollama] ⚠️ Erreur HTTP: {str(e)}")
+                last_error = e
+                if attempt < max_retry:
+                    continue
+                raise OllamaError(
+                    f"Erreur HTTP lors de l'appel à Ollama (modèle: {model}): {str(e)}"
+                ) from e
+        
+        if last_error:
+            raise OllamaError(
+                f"Échec après {max_retry + 1} tentatives (modèle: {model}): {str(last_error)}"
+            ) from last_error
+        else:
+            raise OllamaError(f"Réponse vide après {max_retry + 1} tentatives (modèle: {model})")
+    
+    async def chat_stream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        num_ctx: int = 4096,
+        timeout: Optional[int] = None,
+        history: Optional[list[Dict[str, str]]] = None,
+        keep_alive: Optional[str] = None,
+        on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+        response_format: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Envoie une requête de chat à Ollama en mode streaming
+        
+        Le timeout s'applique entre deux fragments reçus et non à la
+        génération complète.
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            temperature: Paramètre temperature
+            top_p: Paramètre top_p
+            num_ctx: Taille du contexte
+            timeout: Timeout entre deux fragments (utilise self.timeout si None)
+            history: Messages précédents de la conversation
+            keep_alive: Durée de maintien du modèle en mémoire après la requête
+            on_done: Callback recevant le dernier message d'Ollama (statistiques),
+                complété des mesures client "http_wait" et "time_to_first_token"
+            response_format: Format imposé à la réponse ("json" ou schéma JSON)
+            
+        Yields:
+            Fragments de texte au fil de la génération
+            
+        Raises:
+            OllamaError: En cas d'erreur HTTP
+            OllamaTimeoutError: En cas de timeout
+        """
+        timeout_value = timeout if timeout is not None else self.timeout
+        payload = _build_chat_payload(
+            model, prompt, temperature, top_p, num_ctx,
+            stream=True, history=history, keep_alive=keep_alive, response_format=response_format
+        )
+        request = self._get_client().build_request("POST", "/api/chat", json=payload, timeout=timeout_value)
+        
+        start_time = time.perf_counter()
+        timings: Dict[str, Optional[float]] = {"http_wait": None, "time_to_first_token": None}
+        try:
+            response = await self._send(request, stream=True)
+            try:
+                timings["http_wait"] = time.perf_counter() - start_time
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    delta, final = _parse_stream_line(line)
+                    if delta:
+                        if timings["time_to_first_token"] is None:
+                            timings["time_to_first_token"] = time.perf_counter() - start_time
+                        yield delta
+                    if final is not None:
+                        if on_done is not None:
+                            on_done({**final, **timings})
+                        break
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            print(f"[Ollama] ⚠️ TIMEOUT streaming après {timeout_value}s (modèle: {model})")
+            raise OllamaTimeoutError(
+                f"Timeout lors de l'appel à Ollama (modèle: {model}, timeout: {timeout_value}s)"
+            ) from e
+        except httpx.HTTPError as e:
+            raise OllamaError(
+                f"Erreur HTTP lors de l'appel à Ollama (modèle: {model}): {str(e)}"
+            ) from e
+    
+    async def health_check(self) -> bool:
+        """
+        Vérifie si Ollama est disponible
+        
+        Returns:
+            True si Ollama est disponible, False sinon
+        """
+        try:
+            response = await self._get_client().get("/api/tags", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    async def load_model(
+        self,
+        model: str,
+        num_ctx: Optional[int] = None,
+        keep_alive: Optional[Union[str, int]] = None,
+        timeout: Optional[int] = None
+    ):
+        """
+        Charge un modèle en mémoire (ou prolonge sa présence) sans générer de texte
+        
+        Une requête /api/generate sans prompt suffit à Ollama pour charger le
+        modèle. num_ctx doit être celui des rôles : un contexte différent
+        forcerait Ollama à recharger le modèle à la requête suivante.
+        
+        Args:
+            model: Nom du modèle Ollama
+            num_ctx: Taille du contexte avec laquelle charger le modèle
+            keep_alive: Durée de maintien en mémoire ("30m", secondes, -1 = illimitée)
+            timeout: Timeout spécifique (utilise self.timeout si None)
+            
+        Raises:
+            OllamaError: En cas d'erreur HTTP
+            OllamaTimeoutError: En cas de timeout
+        """
+        payload: Dict[str, Any] = {"model": model}
+        if num_ctx:
+            payload["options"] = {"num_ctx": num_ctx}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
+        try:
+            response = await self._send(self._get_client().build_request(
+                "POST",
+                "/api/generate",
+                json=payload,
+                timeout=timeout or self.timeout
+            ))
+            response.raise_for_status()
+        except httpx.TimeoutException as e:
+            raise OllamaTimeoutError(
+                f"Timeout lors du chargement du modèle {model}"
+            ) from e
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Erreur lors du chargement du modèle {model}: {e}") from e
+    
+    async def running_models(self) -> Optional[list[Dict[str, Any]]]:
+        """
+        Liste les modèles actuellement chargés en mémoire (/api/ps)
+        
+        Returns:
+            Entrées de /api/ps (name, expires_at, size_vram...), ou None si
+            Ollama est injoignable
+        """
+        try:
+            response = await self._get_client().get("/api/ps", timeout=5)
+            response.raise_for_status()
+            return response.json().get("models") or []
+        except Exception:
+            return None
+    
+    async def list_models(self) -> Optional[list[str]]:
+        """
+        Liste les modèles installés sur l'instance (/api/tags)
+        
+        Returns:
+            Noms des modèles, ou None si Ollama est injoignable
+        """
+        try:
+            response = await self._get_client().get("/api/tags", timeout=5)
+            response.raise_for_status()
+            return [entry.get("name") for entry in response.json().get("models") or []]
+        except Exception:
+            return None
@@ -0,0 +1,522 @@
+"""
+Répartition des appels entre plusieurs instances Ollama
+"""
+
+import asyncio
+import time
+import httpx
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Union, AsyncIterator, Callable
+from src.core.models import ChatResult, PipelineConfig, EndpointConfig
+from src.core.ollama_client import AsyncOllamaClient, http_options
+from src.core.metrics import REGISTRY
+from src.utils.errors import OllamaError
+
+
+ENDPOINT_OUTSTANDING = REGISTRY.gauge(
+    "code_challenger_endpoint_outstanding_requests",
+    "Requêtes en cours par instance Ollama",
+    ("endpoint",)
+)
+ENDPOINT_UP = REGISTRY.gauge(
+    "code_challenger_endpoint_up",
+    "Disponibilité des instances Ollama (1 = disponible, 0 = circuit ouvert)",
+    ("endpoint",)
+)
+ENDPOINT_FAILURES = REGISTRY.counter(
+    "code_challenger_endpoint_failures_total",
+    "Échecs d'appels (réseau, HTTP, timeout) par instance Ollama",
+    ("endpoint",)
+)
+FAILOVERS = REGISTRY.counter(
+    "code_challenger_failovers_total",
+    "Appels relancés sur une autre instance après un échec",
+    ("model",)
+)
+
+
+def normalize_model(name: str) -> str:
+    """Nom de modèle avec son tag explicite ("llama3" → "llama3:latest")"""
+    return name if ":" in name else f"{name}:latest"
+
+
+@dataclass
+class _Node:
+    """
+    État d'une instance Ollama du pool
+    """
+    config: EndpointConfig
+    client: AsyncOllamaClient
+    # Modèles proposés (None = inconnus, tous acceptés)
+    models: Optional[set[str]] = None
+    # Modèles chargés en mémoire (affinité)
+    loaded: set[str] = field(default_factory=set)
+    outstanding: int = 0
+    failures: int = 0
+    open_until: float = 0.0
+    # Circuit ouvert par un health check (et non par des appels en échec)
+    opened_by_health: bool = False
+    
+    def serves(self, model: str) -> bool:
+        return self.models is None or normalize_model(model) in self.models
+    
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+
+@dataclass
+class HealthSnapshot:
+    """
+    Dernier état connu des instances (health check en tâche de fond)
+    """
+    # Instant du health check (time.monotonic())
+    checked_at: float
+    # Entrées /api/ps de toutes les instances (None si aucune n'a répondu)
+    running: Optional[list[Dict[str, Any]]] = None
+    
+    def age(self) -> float:
+        return time.monotonic() - self.checked_at
+
+
+class OllamaPool:
+    """
+    Pool d'instances Ollama exposant l'interface du client asynchrone
+    
+    Chaque appel est routé vers l'instance la moins chargée (requêtes en
+    cours rapportées à sa capacité) parmi celles qui proposent le modèle, en
+    privilégiant celles où il est déjà chargé. Une instance qui échoue
+    `failure_threshold` fois de suite (ou dont le health check /api/tags
+    échoue) est écartée pendant `reset_seconds` (circuit ouvert). Un appel en
+    échec est relancé sur une autre instance, tant qu'aucun fragment n'a été
+    transmis en streaming. Un health check réussi ne referme que le circuit
+    qu'un health check a ouvert : une instance dont les appels échouent
+    mais qui répond à /api/tags reste écartée jusqu'à la fin de
+    `reset_seconds`, puis un seul appel décide de sa réintégration.
+    
+    Le résultat des health checks (disponibilité, modèles installés et
+    chargés) est conservé dans un instantané : health_check et
+    health_snapshot ne contactent les instances que s'il date de plus de
+    `health_ttl_seconds`, la tâche de fond le rafraîchissant normalement
+    avant.
+    """
+    
+    def __init__(
+        self,
+        endpoints: list[EndpointConfig],
+        health_interval_seconds: float = 15,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30,
+        affinity_penalty: float = 1.0,
+        health_ttl_seconds: float = 30,
+        http: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialise le pool
+        
+        Args:
+            endpoints: Instances Ollama
+            health_interval_seconds: Intervalle entre deux health checks (/api/tags, /api/ps)
+            failure_threshold: Échecs consécutifs avant ouverture du circuit
+            reset_seconds: Durée d'ouverture du circuit avant une nouvelle tentative
+            affinity_penalty: Pénalité (en requêtes par slot) d'une instance où le modèle n'est pas chargé
+            health_ttl_seconds: Durée de validité de l'instantané des health checks
+            http: Options du pool de connexions (voir http_options)
+        """
+        if not endpoints:
+            raise OllamaError("Aucune instance Ollama configurée")
+        http = http or http_options({})
+        # Avec plusieurs instances, la bascule remplace les nouvelles tentatives de connexion
+        connect_retries = http["connect_retries"] if len(endpoints) == 1 else 0
+        self.nodes = [
+            _Node(
+                config=endpoint,
+                client=AsyncOllamaClient(
+                    base_url=endpoint.base_url,
+                    timeout=endpoint.timeout,
+                    max_connections=max(http["pool_size"], endpoint.num_parallel * 2),
+                    connect_retries=connect_retries,
+                    backoff_factor=http["backoff_factor"]
+                ),
+                models={normalize_model(model) for model in endpoint.models} if endpoint.models else None
+            )
+            for endpoint in endpoints
+        ]
+        self.health_interval_seconds = health_interval_seconds
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.affinity_penalty = affinity_penalty
+        self.health_ttl_seconds = health_ttl_seconds
+        self._health_task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[HealthSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        for node in self.nodes:
+            ENDPOINT_UP.set(1, endpoint=node.config.name)
+            ENDPOINT_OUTSTANDING.set(0, endpoint=node.config.name)
+    
+    @classmethod
+    def from_config(cls, config: PipelineConfig) -> "OllamaPool":
+        """
+        Construit le pool à partir de la configuration (providers, settings.load_balancing et settings.http)
+        
+        Args:
+            config: Configuration du pipeline
+        
+        Returns:
+            Pool configuré (une seule instance si providers n'en déclare qu'une)
+        """
+        endpoints = config.endpoints or [
+            EndpointConfig(name="ollama_local", base_url=config.ollama_base_url, timeout=config.ollama_timeout)
+        ]
+        settings = config.settings.get("load_balancing") or {}
+        return cls(
+            endpoints=endpoints,
+            health_interval_seconds=settings.get("health_interval_seconds", 15),
+            failure_threshold=settings.get("failure_threshold", 3),
+            reset_seconds=settings.get("reset_seconds", 30),
+            affinity_penalty=settings.get("affinity_penalty", 1.0),
+            health_ttl_seconds=settings.get("health_ttl_seconds", 30),
+            http=http_options(config.settings)
+        )
+    
+    @property
+    def capacity(self) -> int:
+        """Nombre total de requêtes que les instances traitent en parallèle"""
+        return sum(node.config.num_parallel for node in self.nodes)
+    
+    async def start(self):
+        """Lance les health checks périodiques en tâche de fond"""
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+    
+    async def aclose(self):
+        """Arrête les health checks et ferme les connexions de toutes les instances"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for node in self.nodes:
+            await node.client.aclose()
+    
+    async def chat(self, model: str, prompt: str, **kwargs) -> str:
+        """
+        Envoie une requête de chat et retourne le texte de la réponse
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            **kwargs: Paramètres de AsyncOllamaClient.complete
+        
+        Returns:
+            Réponse du modèle
+        """
+        result = await self.complete(model=model, prompt=prompt, **kwargs)
+        return result.content
+    
+    async def complete(self, model: str, prompt: str, **kwargs) -> ChatResult:
+        """
+        Envoie une requête de chat sur l'instance choisie, avec bascule en cas d'échec
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            **kwargs: Paramètres de AsyncOllamaClient.complete
+        
+        Returns:
+            Réponse du modèle et statistiques d'Ollama
+        
+        Raises:
+            OllamaError: Si toutes les instances candidates ont échoué
+        """
+        tried: list[_Node] = []
+        while True:
+            node = self._select(model, tried)
+            self._acquire(node)
+            try:
+                result = await node.client.complete(model=model, prompt=prompt, **kwargs)
+            except OllamaError as e:
+                if not self._failover(node, model, e, tried):
+                    raise
+                continue
+            finally:
+                self._release(node)
+            self._record_success(node, model)
+            return result
+    
+    async def chat_stream(
+        self,
+        model: str,
+        prompt: str,
+        on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Envoie une requête de chat en streaming sur l'instance choisie
+        
+        La bascule vers une autre instance n'est possible que tant qu'aucun
+        fragment n'a été transmis.
+        
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt à envoyer
+            on_done: Callback recevant le dernier message d'Ollama (statistiques)
+            **kwargs: Paramètres de AsyncOllamaClient.chat_stream
+        
+        Yields:
+            Fragments de texte au fil de la génération
+        
+        Raises:
+            OllamaError: Si l'appel échoue après le premier fragment ou sur toutes les instances
+        """
+        tried: list[_Node] = []
+        while True:
+            node = self._select(model, tried)
+            self._acquire(node)
+            started = False
+            try:
+                async for delta in node.client.chat_stream(model=model, prompt=prompt, on_done=on_done, **kwargs):
+                    started = True
+                    yield delta
+            except OllamaError as e:
+                if started or not self._failover(node, model, e, tried):
+                    raise
+                continue
+            finally:
+                self._release(node)
+            self._record_success(node, model)
+            return
+    
+    async def health_check(self) -> bool:
+        """
+        Indique si au moins une instance est disponible
+        
+        Sert l'instantané des health checks (sans appel réseau s'il est
+        récent) et l'état courant des circuits.
+        
+        Returns:
+            True si au moins une instance est disponible
+        """
+        await self.health_snapshot()
+        return self.available()
+    
+    def available(self) -> bool:
+        """Indique si au moins une instance a son circuit fermé (sans appel réseau)"""
+        now = time.monotonic()
+        return any(node.available(now) for node in self.nodes)
+    
+    async def health_snapshot(self) -> HealthSnapshot:
+        """
+        Dernier état connu des instances, rafraîchi s'il a expiré
+        
+        Les appels concurrents sur un instantané expiré partagent un seul
+        health check.
+        
+        Returns:
+            Instantané des health checks
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age() < self.health_ttl_seconds:
+            return snapshot
+        async with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age() < self.health_ttl_seconds:
+                return snapshot
+            return await self._check_nodes()
+    
+    async def load_model(
+        self,
+        model: str,
+        num_ctx: Optional[int] = None,
+        keep_alive: Optional[Union[str, int]] = None,
+        timeout: Optional[int] = None
+    ):
+        """
+        Charge un modèle sur toutes les instances disponibles qui le proposent
+        
+        Args:
+            model: Nom du modèle Ollama
+            num_ctx: Taille du contexte avec laquelle charger le modèle
+            keep_alive: Durée de maintien en mémoire
+            timeout: Timeout spécifique
+        
+        Raises:
+            OllamaError: Si le chargement a échoué partout
+        """
+        now = time.monotonic()
+        nodes = [node for node in self.nodes if node.serves(model) and node.available(now)]
+        if not nodes:
+            raise OllamaError(f"Aucune instance disponible ne propose le modèle {model}")
+        
+        results = await asyncio.gather(
+            *(node.client.load_model(model, num_ctx=num_ctx, keep_alive=keep_alive, timeout=timeout) for node in nodes),
+            return_exceptions=True
+        )
+        errors = []
+        for node, outcome in zip(nodes, results):
+            if isinstance(outcome, Exception):
+                errors.append(outcome)
+                if _is_node_failure(outcome):
+                    self._record_failure(node, outcome)
+            else:
+                self._record_success(node, model)
+        if len(errors) == len(nodes):
+            raise errors[0]
+    
+    async def running_models(self) -> Optional[list[Dict[str, Any]]]:
+        """
+        Modèles chargés sur l'ensemble des instances (/api/ps)
+        
+        Returns:
+            Entrées de /api/ps complétées du nom de l'instance ("endpoint"),
+            ou None si aucune instance ne répond
+        """
+        results = await asyncio.gather(*(node.client.running_models() for node in self.nodes))
+        if all(running is None for running in results):
+            return None
+        entries = []
+        for node, running in zip(self.nodes, results):
+            if running is None:
+                continue
+            node.loaded = {normalize_model(entry.get("name", "")) for entry in running}
+            entries.extend({**entry, "endpoint": node.config.name} for entry in running)
+        return entries
+    
+    def status(self) -> list[Dict[str, Any]]:
+        """
+        État de chaque instance pour le health check
+        
+        Returns:
+            Nom, URL, disponibilité, requêtes en cours, modèles installés et
+            chargés par instance (état en mémoire, sans appel réseau)
+        """
+        now = time.monotonic()
+        return [
+            {
+                "name": node.config.name,
+                "base_url": node.config.base_url,
+                "available": node.available(now),
+                "outstanding": node.outstanding,
+                "num_parallel": node.config.num_parallel,
+                "loaded_models": sorted(node.loaded),
+                "models": sorted(node.models) if node.models is not None else None,
+            }
+            for node in self.nodes
+        ]
+    
+    def _select(self, model: str, exclude: list[_Node]) -> _Node:
+        """
+        Choisit l'instance d'un appel
+        
+        Score = requêtes en cours / capacité, plus une pénalité si le modèle
+        n'y est pas chargé. Si toutes les instances candidates ont un circuit
+        ouvert, la plus ancienne est retentée (demi-ouverture).
+        
+        Raises:
+            OllamaError: Si aucune instance ne propose le modèle
+        """
+        candidates = [node for node in self.nodes if node not in exclude and node.serves(model)]
+        if not candidates:
+            raise OllamaError(f"Aucune instance Ollama disponible pour le modèle {model}")
+        
+        now = time.monotonic()
+        ready = [node for node in candidates if node.available(now)]
+        if not ready:
+            return min(candidates, key=lambda node: node.open_until)
+        
+        normalized = normalize_model(model)
+        
+        def score(node: _Node) -> float:
+            penalty = 0.0 if normalized in node.loaded else self.affinity_penalty
+            return node.outstanding / node.config.num_parallel + penalty
+        
+        return min(ready, key=score)
+    
+    def _failover(self, node: _Node, model: str, error: OllamaError, tried: list[_Node]) -> bool:
+        """
+        Enregistre l'échec d'une instance et indique si l'appel peut être relancé ailleurs
+        
+        Seules les erreurs de transport (réseau, HTTP, timeout) déclenchent
+        une bascule ; une réponse vide ou invalide est propagée telle quelle.
+        Une erreur 4xx est relancée ailleurs sans compter pour le circuit.
+        """
+        if error.__cause__ is None:
+            return False
+        if _is_node_failure(error):
+            self._record_failure(node, error)
+        tried.append(node)
+        remaining = [other for other in self.nodes if other not in tried and other.serves(model)]
+        if not remaining:
+            return False
+        print(f"[Pool] ⚠️ Échec sur {node.config.name} ({error}), bascule vers une autre instance")
+        FAILOVERS.inc(model=model)
+        return True
+    
+    def _acquire(self, node: _Node):
+        node.outstanding += 1
+        ENDPOINT_OUTSTANDING.set(node.outstanding, endpoint=node.config.name)
+    
+    def _release(self, node: _Node):
+        node.outstanding -= 1
+        ENDPOINT_OUTSTANDING.set(node.outstanding, endpoint=node.config.name)
+    
+    def _record_success(self, node: _Node, model: str):
+        node.failures = 0
+        node.open_until = 0.0
+        node.loaded.add(normalize_model(model))
+        ENDPOINT_UP.set(1, endpoint=node.config.name)
+    
+    def _record_failure(self, node: _Node, error: Exception):
+        node.failures += 1
+        ENDPOINT_FAILURES.inc(endpoint=node.config.name)
+        if node.failures >= self.failure_threshold:
+            self._open_circuit(node, f"{node.failures} échecs consécutifs ({error})")
+    
+    def _open_circuit(self, node: _Node, reason: str, by_health: bool = False):
+        node.open_until = time.monotonic() + self.reset_seconds
+        node.opened_by_health = by_health
+        ENDPOINT_UP.set(0, endpoint=node.config.name)
+        print(f"[Pool] ⚠️ Instance {node.config.name} écartée pour {self.reset_seconds}s : {reason}")
+    
+    async def _check_nodes(self) -> HealthSnapshot:
+        """Health check de chaque instance : /api/tags (disponibilité, modèles) puis /api/ps (affinité)"""
+        tags = await asyncio.gather(*(node.client.list_models() for node in self.nodes))
+        for node, models in zip(self.nodes, tags):
+            if models is None:
+                if node.available(time.monotonic()):
+                    self._open_circuit(node, "health check /api/tags en échec", by_health=True)
+                continue
+            if node.config.models is None:
+                node.models = {normalize_model(model) for model in models}
+            if node.opened_by_health:
+                node.open_until = 0.0
+                node.opened_by_health = False
+            if node.available(time.monotonic()):
+                ENDPOINT_UP.set(1, endpoint=node.config.name)
+        running = await self.running_models()
+        self._snapshot = HealthSnapshot(checked_at=time.monotonic(), running=running)
+        return self._snapshot
+    
+    async def _health_loop(self):
+        """Boucle de fond des health checks"""
+        while True:
+            try:
+                async with self._refresh_lock:
+                    await self._check_nodes()
+            except Exception as e:
+                print(f"[Pool] ⚠️ Erreur lors du health check: {e}")
+            await asyncio.sleep(self.health_interval_seconds)
+
+
+def _is_node_failure(error: Exception) -> bool:
+    """
+    Indique si une erreur met en cause l'instance (et compte pour son circuit)
+    
+    Seuls les échecs de connexion, les timeouts et les erreurs 5xx comptent :
+    une erreur 4xx (modèle absent, requête refusée) vient de la requête.
+    """
+    cause = error.__cause__ or error
+    if isinstance(cause, httpx.HTTPStatusError):
+        return cause.response.status_code >= 500
+    return isinstance(cause, httpx.TransportError)
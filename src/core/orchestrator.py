@@ -2,35 +2,143 @@
 Orchestrateur du pipeline Challenger → Reviewer → Arbiter
 """
 
-from typing import Dict, Any, Optional
-from src.core.models import Report, Context, Verdict, PipelineConfig, RoleConfig
-from src.core.ollama_client import OllamaClient
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Dict, Any, Optional, Callable, AsyncIterator
+from src.core.models import Report, Context, Verdict, PipelineConfig, RoleConfig, ChatResult
+from src.core.ollama_pool import OllamaPool
+from src.core.cache import ResultCache
+from src.core.reports import ReportStore
+from src.core.singleflight import SingleFlight
+from src.core.budget import ContextBudget, ContextNeed
+from src.core.chunking import CodeChunk, split_code, split_units, merge_reports, derive_unit_report
+from src.core.conversation import ConversationTracker
+from src.core.gating import PipelineGate
+from src.core.compaction import OutputCompactor
+from src.core import structured, patching, ensemble
+from src.core.warmup import resolve_keep_alive
+from src.core.metrics import observe_role, observe_role_error, PIPELINE_DURATION
+from src.core.batch import resolve_concurrency
+from src.utils.tokens import estimate_tokens
 from src.config.template_engine import TemplateEngine
 from src.utils.errors import PipelineError, OllamaError
 
 
+# Callback recevant les événements de progression du pipeline
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
 class PipelineOrchestrator:
     """
-    Orchestrateur pour exécuter le pipeline séquentiel
+    Orchestrateur pour exécuter le pipeline (graphe de dépendances entre rôles)
     """
     
-    def __init__(self, config: PipelineConfig):
+    def __init__(
+        self,
+        config: PipelineConfig,
+        cache: Optional[ResultCache] = None,
+        client: Optional[OllamaPool] = None,
+        reports: Optional[ReportStore] = None,
+        context_budget: Optional[ContextBudget] = None
+    ):
         """
         Initialise l'orchestrateur
         
         Args:
             config: Configuration du pipeline
+            cache: Cache de résultats (construit depuis settings.cache si None)
+            client: Pool d'instances Ollama à partager (construit depuis la
+                configuration si None)
+            reports: Historique des rapports (construit depuis settings.reports si None)
+            context_budget: Budget de contexte à partager (construit depuis
+                settings.context_budget si None)
         """
         self.config = config
-        self.ollama_client = OllamaClient(
-            base_url=config.ollama_base_url,
-            timeout=config.ollama_timeout
+        self.cache = cache if cache is not None else ResultCache.from_settings(config.settings)
+        self.reports = reports if reports is not None else ReportStore.from_settings(config.settings)
+        # Regroupement des pipelines et des appels identiques en cours (settings.coalescing)
+        coalescing = bool((config.settings.get("coalescing") or {}).get("enabled", False))
+        self.pipeline_flights = SingleFlight("pipeline") if coalescing else None
+        self.chat_flights = SingleFlight("chat") if coalescing else None
+        # Budget de contexte (settings.context_budget) : sorties amont
+        # condensées si nécessaire et num_ctx ajusté à chaque appel, sauf en
+        # mode conversation (le cache KV d'une conversation est lié à son num_ctx)
+        self.context_budget = (
+            context_budget if context_budget is not None else ContextBudget.from_settings(config.settings)
+        )
+        self.size_context = (
+            self.context_budget is not None
+            and not (config.settings.get("conversation") or {}).get("enabled", False)
         )
+        # Empreinte de la configuration : un changement de modèle, de
+        # paramètre ou de template invalide les rapports en cache (la
+        # concurrence et les durées de maintien n'ont pas d'effet sur eux)
+        self.config_fingerprint = ResultCache.make_key(
+            "config",
+            {
+                name: {key: value for key, value in asdict(role).items() if key != "keep_alive"}
+                for name, role in config.roles.items()
+            },
+            config.pipeline,
+            config.templates,
+            config.settings.get("gating"),
+            config.settings.get("structured_output"),
+            config.settings.get("review_diff"),
+            config.settings.get("context_budget"),
+            config.settings.get("compaction"),
+            {
+                key: value for key, value in (config.settings.get("chunking") or {}).items()
+                if key != "concurrency"
+            },
+            {
+                key: value for key, value in (config.settings.get("conversation") or {}).items()
+                if key != "keep_alive"
+            }
+        )
+        # Pool d'instances Ollama (une seule si providers n'en déclare qu'une)
+        self.async_client = client if client is not None else OllamaPool.from_config(config)
         self.template_engine = TemplateEngine()
+        # Rôles en sortie structurée : rôle → type de sortie (challenger, reviewer, arbiter)
+        self.structured_roles = structured.structured_roles(config.settings, config.pipeline)
+        # Reviewer en mode diff (settings.review_diff), sauf en sortie structurée
+        self.review_diff = (
+            bool((config.settings.get("review_diff") or {}).get("enabled", False))
+            and "reviewer" in config.pipeline
+            and "reviewer" not in self.structured_roles
+        )
+        # Pipelines en cours (un orchestrateur remplacé n'est fermé qu'une fois inactif)
+        self.active_runs = 0
+    
+    async def aclose(self, close_client: bool = True):
+        """
+        Libère les ressources (health checks et connexions HTTP du pool)
+        
+        Args:
+            close_client: Fermer aussi le pool async (False s'il est partagé
+                avec l'orchestrateur qui remplace celui-ci)
+        """
+        if close_client:
+            await self.async_client.aclose()
+    
+    @contextmanager
+    def _track_run(self):
+        """Compte un pipeline en cours pendant la durée du bloc"""
+        self.active_runs += 1
+        try:
+            yield
+        finally:
+            self.active_runs -= 1
     
     def run_pipeline(self, code: str, context: Optional[Context] = None) -> Report:
         """
-        Exécute le pipeline complet
+        Exécute le pipeline complet (hors boucle d'événements)
+        
+        Enveloppe synchrone de run_pipeline_async, pour les scripts : les
+        connexions du pool sont fermées à la fin, la boucle d'événements
+        créée pour l'appel l'étant aussi.
         
         Args:
             code: Code source à analyser
@@ -39,86 +147,1132 @@ class PipelineOrchestrator:
         Returns:
             Rapport final avec toutes les sorties
             
+        Raises:
+            PipelineError: En cas d'erreur lors de l'exécution
+        """
+        async def run() -> Report:
+            try:
+                return await self.run_pipeline_async(code, context)
+            finally:
+                await self.async_client.aclose()
+        
+        return asyncio.run(run())
+    
+    async def run_pipeline_async(
+        self,
+        code: str,
+        context: Optional[Context] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Report:
+        """
+        Exécute le pipeline complet sans bloquer la boucle d'événements
+        
+        Même sémantique que run_pipeline, mais les appels à Ollama passent par
+        le client asynchrone : plusieurs pipelines peuvent ainsi s'exécuter en
+        parallèle dans un même worker. Au sein d'un pipeline, chaque rôle
+        démarre dès que ses rôles amont ont terminé : les rôles indépendants
+        (plusieurs challengers, par exemple) s'exécutent simultanément.
+        
+        Si on_event est fourni, les rôles sont exécutés en streaming et le
+        callback reçoit les événements role_start, token, role_end et role_error.
+        
+        Si le découpage est activé (settings.chunking) et que le code dépasse
+        le budget de tokens d'un morceau, le pipeline est exécuté sur chaque
+        morceau en parallèle et les rapports sont fusionnés.
+        
+        Les mesures de chaque rôle (rendu, attente HTTP, premier token,
+        génération, compteurs d'Ollama) sont jointes à report.metrics et
+        exportées sur /api/metrics.
+        
+        Si le regroupement est activé (settings.coalescing), une requête
+        identique à un pipeline déjà en cours (même code, même contexte, même
+        configuration) s'y rattache et reçoit son rapport et ses événements.
+        
+        Args:
+            code: Code source à analyser
+            context: Contexte optionnel (utilise les valeurs par défaut si None)
+            on_event: Callback optionnel recevant les événements de progression
+            
+        Returns:
+            Rapport final avec toutes les sorties
+            
         Raises:
             PipelineError: En cas d'erreur lors de l'exécution
         """
         if context is None:
             context = Context()
+        if self.pipeline_flights is None:
+            return await self._execute_pipeline_async(code, context, on_event)
+        return await self.pipeline_flights.do(
+            self._report_cache_key(code, context),
+            lambda emit: self._execute_pipeline_async(code, context, emit),
+            on_event,
+            replay=self._replay_report
+        )
+    
+    async def _execute_pipeline_async(
+        self,
+        code: str,
+        context: Context,
+        on_event: Optional[EventCallback]
+    ) -> Report:
+        """Exécute le pipeline (découpé ou non) et enregistre son rapport"""
+        with self._track_run():
+            start_time = time.perf_counter()
+            chunks = self._split_code(code, context)
+            if len(chunks) > 1:
+                report = await self._run_chunked_pipeline_async(code, context, chunks, on_event)
+            else:
+                report = await self._run_single_pipeline_async(code, context, on_event)
+            
+            mode = "chunked" if len(chunks) > 1 else "single"
+            if not report.metrics.get("cached"):
+                duration = time.perf_counter() - start_time
+                report.metrics["duration_seconds"] = round(duration, 4)
+                PIPELINE_DURATION.observe(duration, mode=mode)
+            await asyncio.to_thread(self._record_report, report, code, context, mode)
+            return report
+    
+    async def run_incremental_async(
+        self,
+        code: str,
+        context: Optional[Context] = None,
+        previous_code: Optional[str] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Report:
+        """
+        Ré-analyse une nouvelle version d'un code en réutilisant les résultats inchangés
         
-        # Préparer le contexte de base pour les templates
-        template_context = {
-            "CODE": code,
-            "LANGUAGE": context.language,
-            "PROJECT_NAME": context.project_name,
-            "RUNTIME": context.runtime or "",
-            "CONSTRAINTS": str(context.constraints) if context.constraints else "",
+        Le code est découpé en unités (une par fonction ou classe de premier
+        niveau) analysées comme les morceaux du découpage : les unités
+        identiques à une analyse précédente sont servies par le cache de
+        rapports, seules les unités modifiées sont soumises aux rôles. Une
+        unité inchangée absente du cache (version précédente analysée d'un
+        seul tenant ou découpée autrement) reprend les constats qui la
+        concernent dans le rapport en cache de la version précédente. Le
+        cache doit donc être activé (settings.cache).
+        
+        Args:
+            code: Nouvelle version du code
+            context: Contexte optionnel (utilise les valeurs par défaut si None)
+            previous_code: Version précédente (unités modifiées et résultats réutilisables)
+            on_event: Callback optionnel recevant les événements de progression
+            
+        Returns:
+            Rapport fusionné, avec report.metrics["incremental"] (unités,
+            unités modifiées, réutilisées, dont extraites du rapport
+            précédent, et ré-analysées)
+            
+        Raises:
+            PipelineError: En cas d'erreur lors de l'exécution
+        """
+        with self._track_run():
+            if context is None:
+                context = Context()
+            if self.cache is None:
+                print("[Pipeline] ⚠️ Cache désactivé : toutes les unités seront ré-analysées")
+            
+            start_time = time.perf_counter()
+            max_tokens = (self.config.settings.get("chunking") or {}).get("max_chunk_tokens") or self._default_chunk_tokens()
+            units = split_units(code, context.language, max_tokens)
+            changed = None
+            known: Dict[int, Report] = {}
+            if previous_code is not None:
+                previous_starts: Dict[str, int] = {}
+                for unit in split_units(previous_code, context.language, max_tokens):
+                    previous_starts.setdefault(unit.code, unit.start_line)
+                changed = [[unit.start_line, unit.end_line] for unit in units if unit.code not in previous_starts]
+                if len(units) > 1:
+                    known = await self._derive_unchanged_units(units, previous_starts, previous_code, context)
+            if len(units) > 1:
+                report = await self._run_chunked_pipeline_async(code, context, units, on_event, known)
+            else:
+                report = await self._run_single_pipeline_async(code, context, on_event)
+            
+            unit_metrics = report.metrics.get("chunks") or [report.metrics]
+            reused = len(units) if report.metrics.get("cached") else sum(1 for m in unit_metrics if m.get("cached"))
+            report.metrics["incremental"] = {
+                "units": len(units),
+                "changed": changed,
+                "reused": reused,
+                "derived": sum(1 for m in unit_metrics if m.get("derived")),
+                "reanalyzed": len(units) - reused,
+            }
+            print(f"[Pipeline] Analyse incrémentale : {len(units) - reused}/{len(units)} unité(s) ré-analysée(s)")
+            
+            if not report.metrics.get("cached"):
+                duration = time.perf_counter() - start_time
+                report.metrics["duration_seconds"] = round(duration, 4)
+                PIPELINE_DURATION.observe(duration, mode="incremental")
+            await asyncio.to_thread(self._record_report, report, code, context, "incremental")
+            return report
+    
+    async def _derive_unchanged_units(
+        self,
+        units: list[CodeChunk],
+        previous_starts: Dict[str, int],
+        previous_code: str,
+        context: Context
+    ) -> Dict[int, Report]:
+        """
+        Rapports des unités inchangées absentes du cache, extraits du rapport précédent
+        
+        Args:
+            units: Unités de la nouvelle version
+            previous_starts: Code de chaque unité de la version précédente → première ligne
+            previous_code: Version précédente
+            context: Contexte d'exécution
+        
+        Returns:
+            Index d'unité → rapport extrait (vide si la version précédente n'est pas en cache)
+        """
+        unchanged = [unit for unit in units if unit.code in previous_starts]
+        if not unchanged or self.cache is None:
+            return {}
+        missing = []
+        for unit in unchanged:
+            if await self._cache_get_async(self._report_cache_key(unit.code, context)) is None:
+                missing.append(unit)
+        if not missing:
+            return {}
+        previous = await self._get_cached_report_async(self._report_cache_key(previous_code, context))
+        if previous is None:
+            return {}
+        print(f"[Pipeline] {len(missing)} unité(s) inchangée(s) reprise(s) du rapport précédent")
+        return {
+            unit.index: derive_unit_report(previous, unit, previous_starts[unit.code])
+            for unit in missing
         }
+    
+    async def _run_single_pipeline_async(
+        self,
+        code: str,
+        context: Context,
+        on_event: Optional[EventCallback] = None
+    ) -> Report:
+        """
+        Exécute le pipeline sur un code entier (sans découpage)
         
-        # Stockage des sorties de chaque rôle
-        outputs = {}
+        Args:
+            code: Code source à analyser
+            context: Contexte d'exécution
+            on_event: Callback optionnel recevant les événements de progression
+            
+        Returns:
+            Rapport final avec toutes les sorties
+        """
+        report_key = self._report_cache_key(code, context)
+        cached_report = await self._get_cached_report_async(report_key)
+        if cached_report is not None:
+            if on_event is not None:
+                self._replay_report(cached_report, on_event)
+            return cached_report
+        
+        template_context = self._build_template_context(code, context)
+        
+        outputs: Dict[str, str] = {}
         preserve_outputs = self.config.settings.get("preserve_outputs_on_error", True)
         max_retry = self.config.settings.get("max_retry", 1)
+        conversation = ConversationTracker(self.config.settings.get("conversation") or {})
+        gate = PipelineGate(self.config)
+        compactor = OutputCompactor(self.config)
+        tasks: Dict[str, asyncio.Task] = {}
+        role_metrics: Dict[str, Dict[str, Any]] = {}
+        structured_outputs: Dict[str, Dict[str, Any]] = {}
+        review_patch: Dict[str, Any] = {}
+        # Sorties transmises aux rôles aval à la place de celles du rapport
+        forwarded: Dict[str, str] = {}
         
-        # Exécution séquentielle du pipeline
-        for role_name in self.config.pipeline:
+        async def run_role(role_name: str):
+            # Attendre les rôles amont : les rôles indépendants s'exécutent en parallèle
+            upstream = [tasks[source] for source in self.config.upstream(role_name)]
+            if upstream:
+                await asyncio.gather(*upstream)
+            
+            # Court-circuit : rôle aval d'un Challenger sans critique notable
+            if gate.skips(role_name):
+                print(f"[Pipeline] Rôle {role_name} court-circuité (gravité faible)")
+                if on_event is not None:
+                    on_event({"type": "role_skipped", "role": role_name})
+                return
+            
             try:
-                print(f"[Pipeline] Démarrage du rôle: {role_name}")
+                render_start = time.perf_counter()
+                role_context = self._build_role_context(role_name, template_context, outputs, compactor, forwarded)
+                budget_notes: Dict[str, Any] = {}
+                role_config, prompt, need = self._prepare_role(role_name, role_context, gate, notes=budget_notes)
+                
+                # Mode conversation : le code et les sorties déjà présents dans
+                # l'historique du même modèle sont remplacés par des références
+                # (hors ensemble : chaque candidat reçoit le prompt complet)
+                history, turn_prompt = None, ""
+                if role_config.ensemble is None:
+                    history, turn_prompt = conversation.prepare_turn(
+                        role_config,
+                        self.config.templates[role_name],
+                        role_context,
+                        self.config.role_inputs(role_name),
+                        self.template_engine
+                    )
+                turn_prompt = gate.instruct(role_name, turn_prompt)
+                kind = self.structured_roles.get(role_name)
+                if kind and turn_prompt:
+                    turn_prompt = structured.instruct(kind, turn_prompt)
+                if role_name == "reviewer" and self.review_diff and turn_prompt:
+                    turn_prompt = patching.instruct(turn_prompt)
+                render_seconds = time.perf_counter() - render_start
                 
-                # Récupérer la configuration du rôle
-                role_config: RoleConfig = self.config.roles[role_name]
-                print(f"[Pipeline] Modèle: {role_config.model}, Timeout: {role_config.timeout}s")
+                if on_event is not None:
+                    on_event({"type": "role_start", "role": role_name, "model": role_config.model})
                 
-                # Construire le prompt à partir du template
-                template = self.config.templates[role_name]
+                call_start = time.perf_counter()
+                keep_alive = resolve_keep_alive(role_config, self.config.settings) or conversation.keep_alive
+                if role_config.ensemble is not None:
+                    result = await self._call_ensemble_async(
+                        role_name, role_config, prompt, max_retry, on_event, keep_alive, kind, need
+                    )
+                else:
+                    result = await self._call_role_async(
+                        role_name,
+                        role_config,
+                        turn_prompt if history else prompt,
+                        max_retry,
+                        on_event,
+                        history=history,
+                        keep_alive=keep_alive,
+                        output_kind=kind,
+                        need=need
+                    )
+                response = result.content
+                if role_name == "reviewer" and self.review_diff:
+                    review_patch.update(self._apply_review_patch(response, code, context.language))
+                    if review_patch["mode"] == "fallback":
+                        # Diff inapplicable : nouvelle demande en sortie complète, hors conversation
+                        _, full_prompt, full_need = self._prepare_role(role_name, role_context, gate, diff=False)
+                        if on_event is not None:
+                            on_event({"type": "role_start", "role": role_name, "model": role_config.model})
+                        result = await self._call_role_async(
+                            role_name, role_config, full_prompt, max_retry, on_event, keep_alive=keep_alive,
+                            need=full_need
+                        )
+                        response = result.content
+                if result.structured is not None:
+                    structured_outputs[role_name] = result.structured
+                    response = structured.render_text(kind, result.structured, context.language)
+                response = gate.record(role_name, response, result.structured)
+                model = (result.ensemble or {}).get("winner") or role_config.model
+                role_metrics[role_name] = observe_role(
+                    role_name, model, result, render_seconds, time.perf_counter() - call_start
+                )
+                if result.ensemble is not None:
+                    role_metrics[role_name]["ensemble"] = result.ensemble
+                if need is not None:
+                    role_metrics[role_name]["context"] = {
+                        "num_ctx": result.num_ctx,
+                        "estimated_prompt_tokens": need.prompt_tokens,
+                        **budget_notes
+                    }
+                if role_config.ensemble is None and (review_patch.get("mode") != "fallback" or role_name != "reviewer"):
+                    conversation.record_turn(
+                        role_name, role_config, self.config.templates[role_name], prompt, turn_prompt, history, result
+                    )
                 
-                # Ajouter les sorties précédentes au contexte si disponibles
-                if role_name == "reviewer" and "challenger" in outputs:
-                    template_context["CRITIQUES"] = outputs["challenger"]
-                elif role_name == "arbiter":
-                    if "challenger" in outputs:
-                        template_context["CRITIQUES"] = outputs["challenger"]
-                    if "reviewer" in outputs:
-                        template_context["CODE_AMELIORE"] = outputs["reviewer"]
+                if on_event is not None:
+                    on_event({"type": "role_end", "role": role_name, "length": len(response)})
+                    if role_name == gate.role and gate.enabled:
+                        on_event({"type": "gate", **gate.metrics()})
                 
-                # Rendre le template
-                prompt = self.template_engine.render(template, template_context)
-                print(f"[Pipeline] Prompt généré (longueur: {len(prompt)} caractères)")
+                print(
+                    f"[Pipeline] Réponse reçue du rôle {role_name} (longueur: {len(response)} caractères, "
+                    f"{role_metrics[role_name]['wall_seconds']}s)"
+                )
+                outputs[role_name] = response
+                if role_name == "reviewer" and review_patch.get("mode") == "diff":
+                    forwarded[role_name] = patching.with_patched_code(
+                        response, review_patch["code"], context.language
+                    )
                 
-                # Appeler Ollama
-                print(f"[Pipeline] Appel à Ollama en cours...")
-                response = self.ollama_client.chat(
+            except Exception as e:
+                observe_role_error(role_name, self.config.roles[role_name].model)
+                if on_event is not None:
+                    on_event({"type": "role_error", "role": role_name, "message": str(e)})
+                self._handle_role_error(role_name, e, preserve_outputs)
+        
+        # Une tâche par rôle, créées dans l'ordre topologique du graphe
+        for role_name in self.config.pipeline:
+            tasks[role_name] = asyncio.create_task(run_role(role_name))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        
+        report = self._build_report(outputs, code, structured_outputs, review_patch.pop("code", None))
+        report.metrics["roles"] = role_metrics
+        if conversation.enabled:
+            report.metrics["conversation"] = conversation.metrics()
+        if gate.enabled:
+            report.metrics["gating"] = gate.metrics()
+        if compactor.enabled:
+            report.metrics["compaction"] = compactor.metrics()
+        if review_patch:
+            report.metrics["patch"] = review_patch
+        await asyncio.to_thread(self._store_report, report_key, report, outputs)
+        return report
+    
+    async def _run_chunked_pipeline_async(
+        self,
+        code: str,
+        context: Context,
+        chunks: list[CodeChunk],
+        on_event: Optional[EventCallback] = None,
+        known: Optional[Dict[int, Report]] = None
+    ) -> Report:
+        """
+        Exécute le pipeline sur chaque morceau en parallèle et fusionne les rapports
+        
+        Les événements des morceaux sont relayés avec les champs "chunk"
+        (index du morceau) et "chunks" (nombre total), précédés d'un
+        événement "chunks" décrivant le découpage.
+        
+        Args:
+            code: Code source complet
+            context: Contexte d'exécution
+            chunks: Morceaux issus du découpage
+            on_event: Callback optionnel recevant les événements de progression
+            known: Rapports déjà connus de certains morceaux (index → rapport),
+                servis sans passer par les rôles ; le rapport fusionné n'est
+                alors pas mis en cache
+            
+        Returns:
+            Rapport fusionné
+        """
+        report_key = self._report_cache_key(code, context)
+        cached_report = await self._get_cached_report_async(report_key)
+        if cached_report is not None:
+            if on_event is not None:
+                self._replay_report(cached_report, on_event)
+            return cached_report
+        
+        total = len(chunks)
+        print(f"[Pipeline] Code découpé en {total} morceaux")
+        if on_event is not None:
+            on_event({
+                "type": "chunks",
+                "count": total,
+                "ranges": [[chunk.start_line, chunk.end_line] for chunk in chunks]
+            })
+        
+        chunking_settings = self.config.settings.get("chunking") or {}
+        semaphore = asyncio.Semaphore(
+            chunking_settings.get("concurrency")
+            or resolve_concurrency(self.config.settings, capacity=self.async_client.capacity)
+        )
+        
+        known = known or {}
+        
+        async def run_chunk(chunk: CodeChunk) -> Report:
+            chunk_event = None
+            if on_event is not None:
+                def chunk_event(event: Dict[str, Any]):
+                    on_event({**event, "chunk": chunk.index, "chunks": total})
+            if chunk.index in known:
+                if chunk_event is not None:
+                    self._replay_report(known[chunk.index], chunk_event)
+                return known[chunk.index]
+            async with semaphore:
+                return await self._run_single_pipeline_async(chunk.code, context, chunk_event)
+        
+        reports = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        report = merge_reports(chunks, list(reports))
+        report.metrics["chunks"] = [chunk_report.metrics for chunk_report in reports]
+        
+        if not known and all(self._is_complete(chunk_report) for chunk_report in reports):
+            await self._cache_set_async(report_key, json.dumps(report.to_dict(), ensure_ascii=False))
+        return report
+    
+    async def run_pipeline_stream(
+        self,
+        code: str,
+        context: Optional[Context] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Exécute le pipeline en émettant les événements au fil de l'eau
+        
+        Le dernier événement est de type "report" et contient le rapport final.
+        Si le consommateur abandonne l'itération, le pipeline est annulé.
+        
+        Args:
+            code: Code source à analyser
+            context: Contexte optionnel (utilise les valeurs par défaut si None)
+            
+        Yields:
+            Événements du pipeline (dictionnaires avec une clé "type")
+            
+        Raises:
+            PipelineError: En cas d'erreur lors de l'exécution
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(
+            self.run_pipeline_async(code, context, on_event=queue.put_nowait)
+        )
+        # Sentinelle de fin, posée après tous les événements du pipeline
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            report = task.result()
+            yield {"type": "report", "report": report.to_dict()}
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    async def _call_role_async(
+        self,
+        role_name: str,
+        role_config: RoleConfig,
+        prompt: str,
+        max_retry: int,
+        on_event: Optional[EventCallback] = None,
+        history: Optional[list[Dict[str, str]]] = None,
+        keep_alive: Optional[str] = None,
+        output_kind: Optional[str] = None,
+        need: Optional[ContextNeed] = None
+    ) -> ChatResult:
+        """
+        Appelle Ollama pour un rôle (cache, streaming ou réponse complète)
+        
+        Si on_event est fourni, la réponse est demandée en streaming et chaque
+        fragment est relayé sous forme d'événement "token".
+        
+        En sortie structurée, le schéma du rôle est imposé à Ollama (paramètre
+        format) et la réponse est validée ; une réponse non conforme est
+        redemandée (max_retry) au lieu d'être mise en cache.
+        
+        Si le regroupement est activé (settings.coalescing), un appel
+        identique déjà en cours dans un autre pipeline (même rôle, modèle,
+        prompt et paramètres) est partagé au lieu d'être relancé.
+        
+        Args:
+            role_name: Nom du rôle
+            role_config: Configuration du rôle
+            prompt: Prompt rendu (dernier message utilisateur)
+            max_retry: Nombre maximum de tentatives en cas de réponse vide
+            on_event: Callback optionnel recevant les événements "token"
+            history: Messages précédents de la conversation (mode conversation)
+            keep_alive: Durée de maintien du modèle en mémoire
+            output_kind: Type de sortie structurée du rôle (None = texte libre)
+            need: Besoin en contexte de l'appel (None = num_ctx du rôle)
+            
+        Returns:
+            Réponse du modèle et statistiques d'Ollama (sortie validée dans structured)
+            
+        Raises:
+            StructuredOutputError: Si la réponse reste non conforme au schéma
+        """
+        cache_prompt = json.dumps(history + [{"role": "user", "content": prompt}]) if history else prompt
+        chat_key = self._chat_cache_key(role_name, role_config, cache_prompt)
+        cached = await self._cache_get_async(chat_key)
+        if cached is not None:
+            if on_event is not None:
+                on_event({"type": "token", "role": role_name, "delta": cached})
+            return ChatResult(content=cached, cached=True, structured=self._parse_structured(output_kind, cached))
+        
+        if self.chat_flights is None:
+            return await self._generate_validated(
+                role_name, role_config, prompt, max_retry, on_event, history, keep_alive, output_kind, chat_key, need
+            )
+        # Appel identique déjà en cours (autre pipeline) : un seul appel à Ollama
+        return await self.chat_flights.do(
+            chat_key,
+            lambda emit: self._generate_validated(
+                role_name, role_config, prompt, max_retry, emit, history, keep_alive, output_kind, chat_key, need
+            ),
+            on_event,
+            replay=lambda result, emit: emit({"type": "token", "role": role_name, "delta": result.content})
+        )
+    
+    async def _generate_validated(
+        self,
+        role_name: str,
+        role_config: RoleConfig,
+        prompt: str,
+        max_retry: int,
+        on_event: Optional[EventCallback],
+        history: Optional[list[Dict[str, str]]],
+        keep_alive: Optional[str],
+        output_kind: Optional[str],
+        chat_key: str,
+        need: Optional[ContextNeed] = None
+    ) -> ChatResult:
+        """Génère la réponse d'un rôle, la valide (sortie structurée) et la met en cache"""
+        response_format = structured.output_schema(output_kind) if output_kind else None
+        for attempt in range(max_retry + 1):
+            result = await self._generate(
+                role_name, role_config, prompt, max_retry, on_event, history, keep_alive, response_format, need
+            )
+            try:
+                result.structured = self._parse_structured(output_kind, result.content)
+                break
+            except structured.StructuredOutputError as e:
+                print(f"[Pipeline] ⚠️ {e} ({attempt + 1}/{max_retry + 1})")
+                if attempt >= max_retry:
+                    raise
+        
+        await self._cache_set_async(chat_key, result.content)
+        return result
+    
+    async def _call_ensemble_async(
+        self,
+        role_name: str,
+        role_config: RoleConfig,
+        prompt: str,
+        max_retry: int,
+        on_event: Optional[EventCallback],
+        keep_alive: Optional[str],
+        output_kind: Optional[str],
+        need: Optional[ContextNeed] = None
+    ) -> ChatResult:
+        """
+        Appelle tous les modèles de l'ensemble d'un rôle en parallèle
+        
+        Les candidats ne sont pas streamés (leurs fragments s'entremêleraient) :
+        la réponse retenue est relayée en un seul événement "token", suivi d'un
+        événement "ensemble" décrivant l'issue de chaque modèle.
+        
+        Args:
+            role_name: Nom du rôle
+            role_config: Configuration du rôle (avec son ensemble)
+            prompt: Prompt rendu
+            max_retry: Nombre maximum de tentatives par modèle
+            on_event: Callback optionnel recevant les événements
+            keep_alive: Durée de maintien des modèles en mémoire
+            output_kind: Type de sortie structurée du rôle (None = texte libre)
+            need: Besoin en contexte de l'appel (num_ctx ajusté pour chaque modèle)
+        
+        Returns:
+            Réponse retenue ou fusionnée (issue par modèle dans ensemble)
+        """
+        result = await ensemble.run_ensemble(
+            role_name,
+            role_config,
+            lambda member_config: self._call_role_async(
+                role_name, member_config, prompt, max_retry, keep_alive=keep_alive, output_kind=output_kind, need=need
+            ),
+            output_kind
+        )
+        if on_event is not None:
+            on_event({"type": "token", "role": role_name, "delta": result.content})
+            on_event({"type": "ensemble", "role": role_name, **result.ensemble})
+        return result
+    
+    async def _generate(
+        self,
+        role_name: str,
+        role_config: RoleConfig,
+        prompt: str,
+        max_retry: int,
+        on_event: Optional[EventCallback],
+        history: Optional[list[Dict[str, str]]],
+        keep_alive: Optional[str],
+        response_format: Optional[Dict[str, Any]],
+        need: Optional[ContextNeed] = None
+    ) -> ChatResult:
+        """Génère la réponse d'un rôle (streaming si on_event est fourni), sans cache"""
+        num_ctx = self._num_ctx(role_config, need)
+        if on_event is None:
+            print(f"[Pipeline] Appel asynchrone à Ollama en cours...")
+            result = await self.async_client.complete(
+                model=role_config.model,
+                prompt=prompt,
+                temperature=role_config.temperature,
+                top_p=role_config.top_p,
+                num_ctx=num_ctx,
+                timeout=role_config.timeout,
+                max_retry=max_retry,
+                history=history,
+                keep_alive=keep_alive,
+                response_format=response_format
+            )
+        else:
+            result = ChatResult(content="")
+            for attempt in range(max_retry + 1):
+                parts = []
+                final: Dict[str, Any] = {}
+                async for delta in self.async_client.chat_stream(
                     model=role_config.model,
                     prompt=prompt,
                     temperature=role_config.temperature,
                     top_p=role_config.top_p,
-                    num_ctx=role_config.num_ctx,
+                    num_ctx=num_ctx,
                     timeout=role_config.timeout,
-                    max_retry=max_retry
-                )
+                    history=history,
+                    keep_alive=keep_alive,
+                    on_done=final.update,
+                    response_format=response_format
+                ):
+                    parts.append(delta)
+                    on_event({"type": "token", "role": role_name, "delta": delta})
                 
-                print(f"[Pipeline] Réponse reçue du rôle {role_name} (longueur: {len(response)} caractères)")
-                outputs[role_name] = response
-                
-            except OllamaError as e:
-                if preserve_outputs:
-                    # Conserver les sorties déjà produites
-                    # On continue avec les sorties disponibles
-                    pass
-                else:
-                    raise PipelineError(
-                        f"Erreur lors de l'exécution du rôle '{role_name}': {e}"
-                    ) from e
-            except Exception as e:
-                if preserve_outputs:
-                    pass
-                else:
-                    raise PipelineError(
-                        f"Erreur inattendue lors de l'exécution du rôle '{role_name}': {e}"
-                    ) from e
+                result = ChatResult.from_ollama("".join(parts).strip(), final)
+                if result.content:
+                    break
+                print(f"[Pipeline] Réponse vide en streaming ({attempt + 1}/{max_retry + 1})")
+        
+        result.num_ctx = num_ctx
+        if need is not None and self.size_context:
+            self.context_budget.observe(role_config.model, need, result.prompt_eval_count)
+        return result
+    
+    def _num_ctx(self, role_config: RoleConfig, need: Optional[ContextNeed]) -> int:
+        """num_ctx d'un appel : ajusté au besoin (settings.context_budget), sinon celui du rôle"""
+        if need is None or not self.size_context:
+            return role_config.num_ctx
+        return self.context_budget.num_ctx(role_config.model, need, role_config.num_ctx)
+    
+    def _output_tokens(self, role_name: str, role_context: Dict[str, Any], diff: bool) -> int:
+        """
+        Tokens réservés à la réponse d'un rôle
+        
+        settings.context_budget.reserve_tokens, augmenté de la taille du code
+        pour un Reviewer qui le réécrit en entier (hors mode diff).
+        """
+        output_tokens = self.context_budget.reserve_tokens
+        if role_name == "reviewer" and not (diff and self.review_diff):
+            output_tokens += estimate_tokens(role_context.get("CODE", ""))
+        return output_tokens
+    
+    @staticmethod
+    def _parse_structured(output_kind: Optional[str], content: str) -> Optional[Dict[str, Any]]:
+        """Valide une réponse en sortie structurée (None pour un rôle en texte libre)"""
+        if output_kind is None:
+            return None
+        return structured.parse_output(output_kind, content)
+    
+    @staticmethod
+    def _apply_review_patch(response: str, code: str, language: str) -> Dict[str, Any]:
+        """
+        Applique localement le diff du Reviewer (mode diff)
+        
+        Args:
+            response: Réponse du Reviewer
+            code: Code analysé par le Reviewer
+            language: Langage du code
+            
+        Returns:
+            État du patch : mode ("diff" si appliqué, "full" si le Reviewer a
+            fourni le code complet, "fallback" si le diff est inapplicable et
+            doit être redemandé en sortie complète), hunks, error et, en mode
+            "diff", code (code patché)
+        """
+        try:
+            applied = patching.apply_review(code, response, language)
+        except patching.PatchError as e:
+            print(f"[Pipeline] ⚠️ Diff du Reviewer rejeté ({e}), demande du code complet")
+            return {"mode": "fallback", "hunks": 0, "error": str(e)}
+        if applied is None:
+            return {"mode": "full", "hunks": 0, "error": None}
+        patched, hunks = applied
+        print(f"[Pipeline] Diff du Reviewer appliqué ({hunks} hunk(s))")
+        return {"mode": "diff", "hunks": hunks, "error": None, "code": patched}
+    
+    def _split_code(self, code: str, context: Context) -> list[CodeChunk]:
+        """
+        Découpe le code selon settings.chunking (un seul morceau si désactivé)
+        
+        Args:
+            code: Code source complet
+            context: Contexte d'exécution (langage)
+            
+        Returns:
+            Morceaux à analyser
+        """
+        chunking_settings = self.config.settings.get("chunking") or {}
+        if not chunking_settings.get("enabled", False):
+            return [CodeChunk(index=0, start_line=1, end_line=code.count("\n") + 1, code=code)]
+        max_tokens = chunking_settings.get("max_chunk_tokens") or self._default_chunk_tokens()
+        return split_code(code, context.language, max_tokens)
+    
+    def _default_chunk_tokens(self) -> int:
+        """
+        Budget de tokens par morceau déduit des num_ctx des rôles
+        
+        Le prompt d'un rôle contient le code et les sorties de ses rôles
+        amont (l'arbiter : critiques et code amélioré) : le contexte restant
+        après le texte fixe du template (et la réserve de réponse du budget
+        de contexte) est partagé à parts égales entre le code et chacune de
+        ces sorties.
+        
+        Returns:
+            Nombre de tokens par morceau
+        """
+        budgets = []
+        for role_name in self.config.pipeline:
+            template_text = self.config.template(role_name).static_text
+            num_ctx = self.config.roles[role_name].num_ctx
+            if self.context_budget is not None:
+                # Contexte maximal du rôle, moins la réserve de réponse
+                num_ctx = self.context_budget.limit(num_ctx) - self.context_budget.reserve_tokens
+            available = num_ctx - estimate_tokens(template_text)
+            budgets.append(available // (1 + len(self.config.upstream(role_name))))
+        return max(256, min(budgets))
+    
+    def _is_complete(self, report: Report) -> bool:
+        """Indique si tous les rôles du pipeline ont produit une sortie (ou ont été court-circuités)"""
+        skipped = self._skipped_roles(report)
+        return all(
+            self._report_output(report, role_name) or role_name in skipped
+            for role_name in self.config.pipeline
+        )
+    
+    @staticmethod
+    def _skipped_roles(report: Report) -> list[str]:
+        """Rôles court-circuités lors de l'exécution d'un rapport"""
+        return (report.metrics.get("gating") or {}).get("skipped", [])
+    
+    @staticmethod
+    def _report_output(report: Report, role_name: str) -> str:
+        """Sortie d'un rôle dans un rapport (champ dédié ou sorties additionnelles)"""
+        if role_name in ("challenger", "reviewer", "arbiter"):
+            return getattr(report, role_name)
+        return report.outputs.get(role_name, "")
+    
+    def _chat_cache_key(self, role_name: str, role_config: RoleConfig, prompt: str) -> str:
+        """Clé de cache d'une complétion de rôle"""
+        return ResultCache.make_key(
+            "chat",
+            role_name,
+            role_config.model,
+            prompt,
+            role_config.temperature,
+            role_config.top_p,
+            role_config.num_ctx
+        )
+    
+    def _report_cache_key(self, code: str, context: Context) -> str:
+        """Clé de cache d'un rapport complet"""
+        return ResultCache.make_key(
+            "report",
+            self.config_fingerprint,
+            code,
+            self._build_template_context("", context)
+        )
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """
+        Lit le cache sans jamais faire échouer le pipeline
+        
+        Args:
+            key: Clé de cache
+            
+        Returns:
+            Valeur en cache ou None (absente, cache désactivé ou en erreur)
+        """
+        if self.cache is None:
+            return None
+        try:
+            value = self.cache.get(key)
+        except Exception as e:
+            print(f"[Cache] ⚠️ Lecture impossible: {e}")
+            return None
+        if value is not None:
+            print(f"[Cache] Hit {key.split(':', 1)[0]}")
+        return value
+    
+    def _cache_set(self, key: str, value: str):
+        """
+        Écrit dans le cache (les réponses vides ne sont pas mémorisées)
+        
+        Args:
+            key: Clé de cache
+            value: Valeur à stocker
+        """
+        if self.cache is None or not value:
+            return
+        try:
+            self.cache.set(key, value)
+        except Exception as e:
+            print(f"[Cache] ⚠️ Écriture impossible: {e}")
+    
+    async def _cache_get_async(self, key: str) -> Optional[str]:
+        """Lit le cache hors de la boucle d'événements (requêtes SQLite bloquantes)"""
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self._cache_get, key)
+    
+    async def _cache_set_async(self, key: str, value: str):
+        """Écrit dans le cache hors de la boucle d'événements (requêtes SQLite bloquantes)"""
+        if self.cache is None or not value:
+            return
+        await asyncio.to_thread(self._cache_set, key, value)
+    
+    async def _get_cached_report_async(self, key: str) -> Optional[Report]:
+        """Rapport en cache pour cette clé, lu hors de la boucle d'événements"""
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self._get_cached_report, key)
+    
+    def _get_cached_report(self, key: str) -> Optional[Report]:
+        """Retourne le rapport en cache pour cette clé, s'il existe"""
+        raw = self._cache_get(key)
+        if raw is None:
+            return None
+        try:
+            report = Report.from_dict(json.loads(raw))
+        except (ValueError, TypeError) as e:
+            print(f"[Cache] ⚠️ Rapport en cache illisible: {e}")
+            return None
+        # Les mesures de l'exécution d'origine ne décrivent pas cette requête ;
+        # la décision de court-circuit, elle, reste valable
+        gating = report.metrics.get("gating")
+        report.metrics = {"cached": True}
+        if gating is not None:
+            report.metrics["gating"] = gating
+        return report
+    
+    def _store_report(self, key: str, report: Report, outputs: Dict[str, str]):
+        """Met en cache un rapport, uniquement si tous les rôles ont produit une sortie (ou ont été court-circuités)"""
+        skipped = self._skipped_roles(report)
+        if all(outputs.get(role_name) or role_name in skipped for role_name in self.config.pipeline):
+            self._cache_set(key, json.dumps(report.to_dict(), ensure_ascii=False))
+    
+    def _record_report(self, report: Report, code: str, context: Context, mode: str):
+        """
+        Enregistre le rapport dans l'historique (settings.reports) et joint son identifiant
+        
+        Un échec d'écriture est signalé sans faire échouer le pipeline.
+        """
+        if self.reports is None:
+            return
+        models = {role_name: self.config.roles[role_name].model for role_name in self.config.pipeline}
+        for role_name, role_metrics in (report.metrics.get("roles") or {}).items():
+            winner = (role_metrics.get("ensemble") or {}).get("winner")
+            if winner:
+                models[role_name] = winner
+        try:
+            report.metrics["report_id"] = self.reports.add(report, code, context, mode, models)
+        except Exception as e:
+            print(f"[Reports] ⚠️ Enregistrement du rapport impossible: {e}")
+    
+    def _replay_report(self, report: Report, on_event: EventCallback):
+        """Émet les événements de progression correspondant à un rapport en cache"""
+        skipped = self._skipped_roles(report)
+        for role_name in self.config.pipeline:
+            if role_name in skipped:
+                on_event({"type": "role_skipped", "role": role_name})
+                continue
+            output = self._report_output(report, role_name)
+            on_event({"type": "role_start", "role": role_name, "model": self.config.roles[role_name].model})
+            if output:
+                on_event({"type": "token", "role": role_name, "delta": output})
+            on_event({"type": "role_end", "role": role_name, "length": len(output)})
+    
+    def _build_template_context(self, code: str, context: Context) -> Dict[str, Any]:
+        """
+        Prépare le contexte de base commun à tous les templates
+        
+        Args:
+            code: Code source à analyser
+            context: Contexte d'exécution
+            
+        Returns:
+            Dictionnaire des placeholders de base
+        """
+        return {
+            "CODE": code,
+            "LANGUAGE": context.language,
+            "PROJECT_NAME": context.project_name,
+            "RUNTIME": context.runtime or "",
+            "CONSTRAINTS": str(context.constraints) if context.constraints else "",
+        }
+    
+    def _build_role_context(
+        self,
+        role_name: str,
+        template_context: Dict[str, Any],
+        outputs: Dict[str, str],
+        compactor: Optional[OutputCompactor] = None,
+        forwarded: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Complète le contexte des templates avec les sorties des rôles amont
+        
+        Seuls les placeholders utilisés par le template du rôle sont
+        renseignés. Un placeholder alimenté par plusieurs rôles reçoit leurs
+        sorties concaténées, chacune précédée du nom de son rôle. Un
+        placeholder dont aucun rôle source n'a produit de sortie n'est pas
+        renseigné. Avec la compaction (settings.compaction), les sorties
+        sont réduites à leurs constats ou à leur code avant d'être transmises.
+        Une sortie de forwarded remplace celle du rapport auprès des rôles
+        aval (code patché du Reviewer en mode diff).
+        
+        Args:
+            role_name: Nom du rôle
+            template_context: Contexte de base des templates
+            outputs: Sorties des rôles déjà exécutés
+            compactor: Compaction des sorties de l'exécution (None = sorties complètes)
+            forwarded: Sorties transmises aux rôles aval à la place de celles du rapport
+            
+        Returns:
+            Contexte propre au rôle
+        """
+        outputs = {**outputs, **(forwarded or {})}
+        used = self.config.template(role_name).placeholders
+        role_context = {name: value for name, value in template_context.items() if name in used}
+        for placeholder, sources in self.config.role_inputs(role_name).items():
+            if placeholder not in used:
+                continue
+            available = [source for source in sources if outputs.get(source)]
+            texts = {
+                source: compactor.apply(source, outputs[source]) if compactor is not None else outputs[source]
+                for source in available
+            }
+            if len(available) == 1:
+                role_context[placeholder] = texts[available[0]]
+            elif available:
+                role_context[placeholder] = "\n\n".join(
+                    f"### {source}\n{texts[source]}" for source in available
+                )
+        return role_context
+    
+    def _prepare_role(
+        self,
+        role_name: str,
+        role_context: Dict[str, Any],
+        gate: Optional[PipelineGate] = None,
+        diff: bool = True,
+        notes: Optional[Dict[str, Any]] = None
+    ) -> tuple[RoleConfig, str, Optional[ContextNeed]]:
+        """
+        Récupère la configuration d'un rôle et rend son prompt
+        
+        Si le budget de contexte est activé et que le prompt dépasse le
+        contexte maximal du rôle, les sorties amont sont condensées dans
+        role_context et le prompt est rendu à nouveau.
+        
+        Args:
+            role_name: Nom du rôle
+            role_context: Contexte des templates du rôle (sorties amont comprises)
+            gate: Court-circuit de l'exécution (modèle rapide, consigne de synthèse)
+            diff: Demander un diff au Reviewer si le mode diff est activé
+            notes: Dictionnaire optionnel recevant les placeholders condensés
+                (trimmed) et le dépassement du contexte maximal (overflow)
+            
+        Returns:
+            Tuple (configuration du rôle, prompt rendu, besoin en contexte
+            estimé ; None si le budget de contexte est désactivé)
+        """
+        print(f"[Pipeline] Démarrage du rôle: {role_name}")
+        
+        # Récupérer la configuration du rôle
+        role_config: RoleConfig = self.config.roles[role_name]
+        if gate is not None:
+            role_config = gate.route(role_name, role_config)
+        print(f"[Pipeline] Modèle: {role_config.model}, Timeout: {role_config.timeout}s")
+        
+        # Rendre le template
+        prompt = self._render_prompt(role_name, role_context, gate, diff)
+        if self.context_budget is None:
+            print(f"[Pipeline] Prompt généré (longueur: {len(prompt)} caractères)")
+            return role_config, prompt, None
+        
+        need = ContextNeed(estimate_tokens(prompt), self._output_tokens(role_name, role_context, diff))
+        upstream = {name: role_context[name] for name in self.config.role_inputs(role_name) if name in role_context}
+        trimmed = self.context_budget.fit(role_name, role_config.model, need, upstream, role_config.num_ctx)
+        if trimmed:
+            role_context.update(trimmed)
+            prompt = self._render_prompt(role_name, role_context, gate, diff)
+            need = ContextNeed(estimate_tokens(prompt), need.output_tokens)
+            if notes is not None:
+                notes["trimmed"] = sorted(trimmed)
+        limit = self.context_budget.limit(role_config.num_ctx)
+        if notes is not None and self.context_budget.required(role_config.model, need) > limit:
+            # Signalé dans le rapport : Ollama tronquera le prompt
+            notes["overflow"] = True
+        print(f"[Pipeline] Prompt généré (longueur: {len(prompt)} caractères, ~{need.prompt_tokens} tokens)")
+        
+        return role_config, prompt, need
+    
+    def _render_prompt(
+        self,
+        role_name: str,
+        role_context: Dict[str, Any],
+        gate: Optional[PipelineGate],
+        diff: bool
+    ) -> str:
+        """Rend le template d'un rôle et ajoute ses consignes (synthèse, sortie structurée, diff)"""
+        prompt = self.template_engine.render(self.config.template(role_name), role_context)
+        if gate is not None:
+            prompt = gate.instruct(role_name, prompt)
+        if role_name in self.structured_roles:
+            prompt = structured.instruct(self.structured_roles[role_name], prompt)
+        if diff and role_name == "reviewer" and self.review_diff:
+            prompt = patching.instruct(prompt)
+        return prompt
+    
+    def _handle_role_error(self, role_name: str, error: Exception, preserve_outputs: bool):
+        """
+        Applique la politique d'erreur d'un rôle
+        
+        Args:
+            role_name: Nom du rôle en échec
+            error: Exception levée
+            preserve_outputs: Si True, on continue avec les sorties disponibles
+            
+        Raises:
+            PipelineError: Si preserve_outputs est False
+        """
+        if preserve_outputs:
+            # Conserver les sorties déjà produites
+            # On continue avec les sorties disponibles
+            return
+        if isinstance(error, OllamaError):
+            raise PipelineError(
+                f"Erreur lors de l'exécution du rôle '{role_name}': {error}"
+            ) from error
+        raise PipelineError(
+            f"Erreur inattendue lors de l'exécution du rôle '{role_name}': {error}"
+        ) from error
+    
+    def _build_report(
+        self,
+        outputs: Dict[str, str],
+        code: str,
+        structured_outputs: Optional[Dict[str, Dict[str, Any]]] = None,
+        patched_code: Optional[str] = None
+    ) -> Report:
+        """
+        Post-traitement : extraction du verdict et du code final
+        
+        En sortie structurée, le verdict et le code final sont lus dans les
+        champs validés de l'Arbiter et du Reviewer plutôt qu'extraits du texte.
+        En mode diff, le code final est le code original patché localement.
         
-        # Post-traitement : extraction du verdict et du code final
-        verdict = self._extract_verdict(outputs.get("arbiter", ""))
-        code_final = self._extract_code_final(outputs.get("reviewer", ""), code)
+        Args:
+            outputs: Sorties de chaque rôle
+            code: Code original
+            structured_outputs: Sorties structurées validées par rôle
+            patched_code: Code issu du diff du Reviewer (mode diff)
+            
+        Returns:
+            Rapport final
+        """
+        structured_outputs = structured_outputs or {}
+        if "verdict" in structured_outputs.get("arbiter", {}):
+            verdict = structured.structured_verdict(structured_outputs["arbiter"])
+        else:
+            verdict = self._extract_verdict(outputs.get("arbiter", ""))
+        if patched_code is not None:
+            code_final = patched_code.strip()
+        elif structured_outputs.get("reviewer", {}).get("code"):
+            code_final = structured_outputs["reviewer"]["code"].strip()
+        else:
+            code_final = self._extract_code_final(outputs.get("reviewer", ""), code)
         
         # Construire le rapport
         return Report(
@@ -126,7 +1280,13 @@ class PipelineOrchestrator:
             reviewer=outputs.get("reviewer", ""),
             arbiter=outputs.get("arbiter", ""),
             verdict=verdict,
-            code_final=code_final
+            code_final=code_final,
+            outputs={
+                role_name: output
+                for role_name, output in outputs.items()
+                if role_name not in ("challenger", "reviewer", "arbiter")
+            },
+            structured=structured_outputs
         )
     
     def _extract_verdict(self, arbiter_output: str) -> Verdict:
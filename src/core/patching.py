@@ -0,0 +1,237 @@
+"""
+Application locale des diffs unifiés produits par le Reviewer
+"""
+
+import ast
+import re
+from dataclasses import dataclass
+from typing import Optional
+from src.utils.errors import CodeChallengerError
+
+
+# Consigne ajoutée au prompt du Reviewer en mode diff
+DIFF_INSTRUCTION = """
+Ne réécris pas tout le fichier : fournis uniquement tes modifications sous forme de diff unifié
+dans un bloc ```diff (en-têtes @@, lignes de contexte inchangées, lignes supprimées préfixées
+par '-', lignes ajoutées préfixées par '+'), puis tes explications. Si les modifications
+touchent l'essentiel du code, fournis à la place le code complet dans un bloc de code."""
+
+# Bloc ```diff ou ```patch
+DIFF_BLOCK_PATTERN = re.compile(r"```(?:diff|patch)\s*\n(.*?)```", re.DOTALL)
+
+# En-tête de hunk : @@ -début,longueur +début,longueur @@
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Décalage maximal (en lignes) toléré entre la position annoncée d'un hunk et sa position réelle
+MAX_OFFSET = 50
+
+
+class PatchError(CodeChallengerError):
+    """Diff illisible, inapplicable ou produisant un code invalide"""
+    pass
+
+
+@dataclass
+class Hunk:
+    """
+    Bloc de modifications d'un diff unifié
+    """
+    # Ligne de début annoncée dans le code original (1-based)
+    old_start: int
+    # Lignes attendues dans le code original (contexte et suppressions)
+    old_lines: list[str]
+    # Lignes qui les remplacent (contexte et ajouts)
+    new_lines: list[str]
+
+
+def instruct(prompt: str) -> str:
+    """Ajoute au prompt du Reviewer la consigne de réponse en diff"""
+    return prompt + "\n" + DIFF_INSTRUCTION
+
+
+def extract_patch(output: str) -> Optional[str]:
+    """
+    Extrait le diff unifié d'une sortie du Reviewer
+    
+    Args:
+        output: Réponse du Reviewer
+    
+    Returns:
+        Texte du diff (blocs ```diff concaténés), ou None si la réponse n'en contient pas
+    """
+    blocks = [block for block in DIFF_BLOCK_PATTERN.findall(output) if "@@" in block]
+    if blocks:
+        return "\n".join(blocks)
+    if re.search(r"^@@ -\d", output, re.MULTILINE) and re.search(r"^[-+]", output, re.MULTILINE):
+        return output
+    return None
+
+
+def parse_hunks(patch: str) -> list[Hunk]:
+    """
+    Découpe un diff unifié en hunks
+    
+    Les en-têtes de fichiers (---, +++, diff --git) sont ignorés ; les
+    longueurs annoncées par les en-têtes de hunk ne sont pas exigées, les
+    modèles les calculant rarement juste.
+    
+    Args:
+        patch: Texte du diff
+    
+    Returns:
+        Hunks dans l'ordre du diff
+    
+    Raises:
+        PatchError: Si le diff ne contient aucun hunk
+    """
+    hunks: list[Hunk] = []
+    current: Optional[Hunk] = None
+    for line in patch.splitlines():
+        header = HUNK_HEADER_PATTERN.match(line)
+        if header:
+            current = Hunk(old_start=int(header.group(1)), old_lines=[], new_lines=[])
+            hunks.append(current)
+            continue
+        if current is None or line.startswith(("---", "+++", "diff ", "index ")):
+            continue
+        if line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        marker, text = (line[0], line[1:]) if line else (" ", "")
+        if marker == "-":
+            current.old_lines.append(text)
+        elif marker == "+":
+            current.new_lines.append(text)
+        elif marker == " ":
+            current.old_lines.append(text)
+            current.new_lines.append(text)
+        else:
+            # Ligne de contexte dont l'espace initial a été perdu
+            current.old_lines.append(line)
+            current.new_lines.append(line)
+    if not hunks:
+        raise PatchError("Aucun hunk dans le diff")
+    return hunks
+
+
+def apply_patch(original: str, patch: str) -> str:
+    """
+    Applique un diff unifié au code original
+    
+    Chaque hunk est recherché à sa position annoncée puis, à défaut, au plus
+    près de celle-ci (à MAX_OFFSET lignes près), en ignorant les espaces en
+    fin de ligne. Les hunks doivent se suivre sans se chevaucher.
+    
+    Args:
+        original: Code original
+        patch: Diff unifié
+    
+    Returns:
+        Code modifié
+    
+    Raises:
+        PatchError: Si un hunk ne correspond pas au code original
+    """
+    lines = original.splitlines()
+    result: list[str] = []
+    cursor = 0
+    for number, hunk in enumerate(parse_hunks(patch), start=1):
+        position = _locate(lines, hunk, cursor)
+        if position is None:
+            raise PatchError(f"Hunk {number} (ligne {hunk.old_start}) ne correspond pas au code original")
+        result.extend(lines[cursor:position])
+        result.extend(hunk.new_lines)
+        cursor = position + len(hunk.old_lines)
+    result.extend(lines[cursor:])
+    patched = "\n".join(result)
+    return patched + "\n" if original.endswith("\n") else patched
+
+
+def validate_code(code: str, language: str):
+    """
+    Vérifie que le code modifié reste valide (syntaxe Python uniquement)
+    
+    Args:
+        code: Code modifié
+        language: Langage du code
+    
+    Raises:
+        PatchError: Si le code Python ne se parse plus
+    """
+    if language.lower() != "python":
+        return
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError) as e:
+        raise PatchError(f"Code modifié invalide: {e}") from e
+
+
+def apply_review(original: str, output: str, language: str) -> Optional[tuple[str, int]]:
+    """
+    Applique le diff d'une sortie du Reviewer et valide le résultat
+    
+    Args:
+        original: Code analysé par le Reviewer
+        output: Réponse du Reviewer
+        language: Langage du code
+    
+    Returns:
+        Tuple (code modifié, nombre de hunks), ou None si la réponse ne
+        contient pas de diff (code complet fourni à la place)
+    
+    Raises:
+        PatchError: Si le diff est inapplicable ou produit un code invalide
+    """
+    patch = extract_patch(output)
+    if patch is None:
+        return None
+    hunks = parse_hunks(patch)
+    patched = apply_patch(original, patch)
+    validate_code(patched, language)
+    return patched, len(hunks)
+
+
+def with_patched_code(output: str, patched: str, language: str) -> str:
+    """
+    Sortie du Reviewer transmise aux rôles aval en mode diff
+    
+    Le premier bloc de diff est remplacé par le code patché complet (les
+    suivants sont retirés) et les explications sont conservées : l'Arbiter
+    juge le code amélioré et non le diff.
+    
+    Args:
+        output: Réponse du Reviewer (diff appliqué)
+        patched: Code patché
+        language: Langage du code
+    
+    Returns:
+        Réponse dont le diff est remplacé par le code patché
+    """
+    block = f"```{language}\n{patched.rstrip()}\n```"
+    replaced = []
+    
+    def substitute(match: re.Match) -> str:
+        if replaced:
+            return ""
+        replaced.append(match)
+        return block
+    
+    text = DIFF_BLOCK_PATTERN.sub(substitute, output)
+    return text if replaced else block
+
+
+def _locate(lines: list[str], hunk: Hunk, cursor: int) -> Optional[int]:
+    """Position (0-based) où les lignes attendues du hunk figurent dans le code, à partir de cursor"""
+    expected = [line.rstrip() for line in hunk.old_lines]
+    if not expected:
+        # Hunk d'ajout pur : insertion à la position annoncée
+        return min(max(cursor, hunk.old_start), len(lines))
+    
+    announced = max(cursor, hunk.old_start - 1)
+    for offset in range(MAX_OFFSET + 1):
+        for position in (announced - offset, announced + offset):
+            if position < cursor or position + len(expected) > len(lines):
+                continue
+            if [line.rstrip() for line in lines[position:position + len(expected)]] == expected:
+                return position
+    return None
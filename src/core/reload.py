@@ -0,0 +1,204 @@
+"""
+Rechargement à chaud de la configuration (sans redémarrage du serveur)
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+from src.config.loader import ConfigLoader
+from src.core.models import PipelineConfig
+from src.core.orchestrator import PipelineOrchestrator
+from src.core.warmup import ModelKeeper
+
+
+# Callback publiant le nouvel orchestrateur et son gardien des modèles
+SwapCallback = Callable[[PipelineOrchestrator, Optional[ModelKeeper]], None]
+
+# Sections comparées pour décrire un rechargement
+CONFIG_SECTIONS = ("endpoints", "roles", "pipeline", "templates", "settings")
+
+
+class ConfigReloader:
+    """
+    Recharge config.yaml et remplace l'orchestrateur de façon atomique
+    
+    La nouvelle configuration est validée par ConfigLoader ; si elle est
+    invalide, la configuration courante reste en place. Sinon, un nouvel
+    orchestrateur est construit et publié d'un seul coup (callback
+    on_swap) : les pipelines déjà lancés conservent l'orchestrateur, et
+    donc la configuration, avec lesquels ils ont démarré. L'ancien
+    orchestrateur n'est fermé qu'une fois ses pipelines terminés.
+    
+    Le pool d'instances Ollama (connexions, health checks), le cache de
+    résultats et l'historique des rapports sont repris tels quels si leur
+    configuration n'a pas changé ; seuls les modèles dont le préchargement
+    a changé sont chargés.
+    """
+    
+    def __init__(
+        self,
+        config_path: str,
+        orchestrator: PipelineOrchestrator,
+        model_keeper: Optional[ModelKeeper],
+        on_swap: SwapCallback
+    ):
+        """
+        Initialise le rechargement
+        
+        Args:
+            config_path: Chemin vers le fichier config.yaml
+            orchestrator: Orchestrateur courant
+            model_keeper: Gardien des modèles courant (None si le préchargement est désactivé)
+            on_swap: Callback publiant le nouvel orchestrateur et son gardien
+        """
+        self.config_path = Path(config_path)
+        self.orchestrator = orchestrator
+        self.model_keeper = model_keeper
+        self.on_swap = on_swap
+        self.reloads = 0
+        self._mtime = self._read_mtime()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._retiring: set[asyncio.Task] = set()
+    
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Section settings.reload de la configuration courante"""
+        return self.orchestrator.config.settings.get("reload") or {}
+    
+    async def start(self):
+        """Lance la surveillance du fichier si settings.reload.enabled"""
+        if self._task is None and self.settings.get("enabled", False):
+            self._task = asyncio.create_task(self._watch())
+    
+    async def stop(self):
+        """Arrête la surveillance et ferme les orchestrateurs remplacés"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+    
+    async def reload(self) -> Dict[str, Any]:
+        """
+        Recharge la configuration et publie un nouvel orchestrateur si elle a changé
+        
+        Returns:
+            Résultat : status ("reloaded" ou "unchanged"), sections modifiées,
+            modèles préchargés, pool et cache repris ou reconstruits
+        
+        Raises:
+            ConfigError: Si la nouvelle configuration est invalide (la
+                configuration courante est conservée)
+        """
+        async with self._lock:
+            self._mtime = self._read_mtime()
+            config = ConfigLoader(str(self.config_path)).load()
+            current = self.orchestrator
+            changed = [
+                section for section in CONFIG_SECTIONS
+                if getattr(config, section) != getattr(current.config, section)
+            ]
+            if not changed:
+                print("[Reload] Configuration inchangée")
+                return {"status": "unchanged", "changed": []}
+            
+            reuse_pool = self._same_pool(current.config, config)
+            reuse_cache = config.settings.get("cache") == current.config.settings.get("cache")
+            reuse_reports = config.settings.get("reports") == current.config.settings.get("reports")
+            # Budget conservé : num_ctx déjà atteint par chaque modèle chargé
+            reuse_budget = (
+                reuse_pool and config.settings.get("context_budget") == current.config.settings.get("context_budget")
+            )
+            orchestrator = PipelineOrchestrator(
+                config,
+                cache=current.cache if reuse_cache else None,
+                client=current.async_client if reuse_pool else None,
+                reports=current.reports if reuse_reports else None,
+                context_budget=current.context_budget if reuse_budget else None
+            )
+            if not reuse_pool:
+                await orchestrator.async_client.start()
+            
+            # Ne précharger que les modèles absents de l'ancien préchargement
+            # ou dont le contexte ou le keep_alive a changé
+            model_keeper = ModelKeeper.from_config(config, orchestrator.async_client)
+            warmed = []
+            if model_keeper is not None:
+                previous = {
+                    (warm.model, warm.num_ctx, warm.keep_alive)
+                    for warm in (self.model_keeper.models if self.model_keeper is not None else [])
+                }
+                warm_models = [
+                    warm for warm in model_keeper.models
+                    if (warm.model, warm.num_ctx, warm.keep_alive) not in previous
+                ]
+                warmed = [warm.model for warm in warm_models]
+            if self.model_keeper is not None:
+                await self.model_keeper.stop()
+            if model_keeper is not None:
+                await model_keeper.start(preload=warm_models)
+            
+            # Publication : les nouvelles requêtes utilisent le nouvel orchestrateur
+            self.orchestrator = orchestrator
+            self.model_keeper = model_keeper
+            self.on_swap(orchestrator, model_keeper)
+            self.reloads += 1
+            
+            retiring = asyncio.create_task(self._retire(current, close_client=not reuse_pool))
+            self._retiring.add(retiring)
+            retiring.add_done_callback(self._retiring.discard)
+            
+            print(
+                f"[Reload] Configuration rechargée ({', '.join(changed)}) ; "
+                f"modèles préchargés : {', '.join(warmed) or 'aucun'}"
+            )
+            return {
+                "status": "reloaded",
+                "changed": changed,
+                "warmed": warmed,
+                "pool": "reused" if reuse_pool else "rebuilt",
+                "cache": "reused" if reuse_cache else "rebuilt",
+                "draining_runs": current.active_runs,
+            }
+    
+    async def _watch(self):
+        """Boucle de fond : recharge la configuration quand le fichier est modifié"""
+        while True:
+            await asyncio.sleep(self.settings.get("interval_seconds", 2))
+            if self._read_mtime() == self._mtime:
+                continue
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"[Reload] ⚠️ Configuration invalide, configuration courante conservée: {e}")
+    
+    async def _retire(self, orchestrator: PipelineOrchestrator, close_client: bool):
+        """Ferme un orchestrateur remplacé une fois ses pipelines terminés"""
+        try:
+            while orchestrator.active_runs > 0:
+                await asyncio.sleep(1)
+        finally:
+            await orchestrator.aclose(close_client=close_client)
+            if close_client:
+                print("[Reload] Ancien pool d'instances Ollama fermé")
+    
+    def _read_mtime(self) -> Optional[float]:
+        """Date de modification du fichier (None s'il est absent)"""
+        try:
+            return self.config_path.stat().st_mtime
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _same_pool(old: PipelineConfig, new: PipelineConfig) -> bool:
+        """Indique si le pool d'instances Ollama peut être repris tel quel"""
+        return old.endpoints == new.endpoints and all(
+            old.settings.get(key) == new.settings.get(key)
+            for key in ("load_balancing", "http")
+        )
@@ -0,0 +1,534 @@
+"""
+Historique persistant des rapports, avec recherche plein texte (SQLite FTS5)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+from src.core.models import Report, Context, Verdict
+from src.core.structured import SEVERITY_LEVELS
+from src.core.gating import normalize_severity
+from src.core.ensemble import SINGLE_ANSWER_ROLES
+from src.utils.errors import CodeChallengerError
+
+
+# Constat d'une sortie libre : "- [gravité] ligne N, description" (gravité et ligne facultatives)
+FINDING_LINE_PATTERN = re.compile(
+    r"^\s*(?:[-*•]|\d+[.)])\s+(?:\[(?P<severity>[^\]]+)\]\s*)?(?:ligne (?P<line>\d+),\s*)?(?P<text>\S.*)$",
+    re.IGNORECASE
+)
+
+# Colonnes renvoyées pour chaque rapport d'une recherche
+SUMMARY_COLUMNS = (
+    "id", "created_at", "code_hash", "language", "project_name", "verdict", "mode",
+    "cached", "duration_seconds", "models", "findings_count", "max_severity", "compacted",
+)
+
+
+class ReportQueryError(CodeChallengerError):
+    """Critère de recherche invalide"""
+    pass
+
+
+class ReportStore:
+    """
+    Historique SQLite de tous les rapports produits par le pipeline
+    
+    Chaque exécution enregistre le rapport, l'empreinte du code analysé, le
+    langage, les modèles, la durée et les constats extraits du Challenger
+    (une ligne par constat). Un index FTS5 couvre les constats et les
+    sorties des rôles pour la recherche plein texte.
+    
+    La rétention supprime les rapports au-delà de retention_days ou de
+    max_reports (les plus anciens d'abord) ; la compaction retire, au-delà
+    de compact_after_days, le code et les sorties brutes des rapports en
+    conservant métadonnées, verdict, mesures et constats.
+    """
+    
+    # Nombre d'enregistrements entre deux passes de rétention
+    PURGE_INTERVAL = 100
+    
+    # Taille maximale d'une page de résultats
+    MAX_PAGE_SIZE = 200
+    
+    def __init__(
+        self,
+        path: str = ".cache/reports.sqlite3",
+        retention_days: Optional[float] = 90,
+        max_reports: Optional[int] = 100000,
+        compact_after_days: Optional[float] = 7
+    ):
+        """
+        Initialise l'historique
+        
+        Args:
+            path: Chemin du fichier SQLite (":memory:" pour un historique non persistant)
+            retention_days: Âge au-delà duquel les rapports sont supprimés (None ou 0 = illimité)
+            max_reports: Nombre maximal de rapports conservés (None ou 0 = illimité)
+            compact_after_days: Âge au-delà duquel code et sorties brutes sont retirés (None ou 0 = jamais)
+        """
+        self.path = path
+        self.retention_days = retention_days or None
+        self.max_reports = max_reports or None
+        self.compact_after_days = compact_after_days or None
+        self._lock = threading.Lock()
+        self._writes = 0
+        
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Vacuum incrémental : l'espace libéré par la rétention est rendu au système
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id TEXT NOT NULL UNIQUE,
+                created_at REAL NOT NULL,
+                code_hash TEXT NOT NULL,
+                language TEXT NOT NULL,
+                project_name TEXT,
+                verdict TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                cached INTEGER NOT NULL,
+                duration_seconds REAL,
+                models TEXT NOT NULL,
+                findings_count INTEGER NOT NULL,
+                max_severity TEXT,
+                compacted INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                code TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS findings (
+                report_rowid INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                severity TEXT,
+                line INTEGER,
+                category TEXT,
+                description TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                findings, outputs, tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        for statement in (
+            "CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_verdict ON reports(verdict, created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_language ON reports(language, created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_code_hash ON reports(code_hash)",
+            "CREATE INDEX IF NOT EXISTS idx_findings_report ON findings(report_rowid)",
+            "CREATE INDEX IF NOT EXISTS idx_findings_category ON findings(category)",
+        ):
+            self._conn.execute(statement)
+        self._conn.commit()
+    
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> Optional["ReportStore"]:
+        """
+        Construit l'historique à partir de la section settings.reports
+        
+        Args:
+            settings: Section settings de la configuration
+        
+        Returns:
+            Historique configuré, ou None s'il est désactivé
+        """
+        report_settings = settings.get("reports") or {}
+        if not report_settings.get("enabled", False):
+            return None
+        return cls(
+            path=report_settings.get("path", ".cache/reports.sqlite3"),
+            retention_days=report_settings.get("retention_days", 90),
+            max_reports=report_settings.get("max_reports", 100000),
+            compact_after_days=report_settings.get("compact_after_days", 7)
+        )
+    
+    @staticmethod
+    def code_hash(code: str) -> str:
+        """Empreinte SHA-256 du code analysé (calculable côté client pour retrouver ses audits)"""
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+    
+    def add(
+        self,
+        report: Report,
+        code: str,
+        context: Context,
+        mode: str,
+        models: Dict[str, str]
+    ) -> str:
+        """
+        Enregistre le rapport d'une exécution
+        
+        Args:
+            report: Rapport produit (ou servi depuis le cache)
+            code: Code analysé
+            context: Contexte d'exécution (langage, projet)
+            mode: Mode d'exécution (single, chunked, incremental)
+            models: Modèle de chaque rôle
+        
+        Returns:
+            Identifiant du rapport enregistré
+        """
+        report_id = uuid.uuid4().hex
+        now = time.time()
+        findings = extract_findings(report)
+        severities = [finding["severity"] for finding in findings if finding["severity"]]
+        severities += [
+            level for level in (normalize_severity(data.get("max_severity")) for data in report.structured.values())
+            if level
+        ]
+        max_severity = max(severities, key=SEVERITY_LEVELS.index) if severities else None
+        
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO reports (
+                    id, created_at, code_hash, language, project_name, verdict, mode, cached,
+                    duration_seconds, models, findings_count, max_severity, data, code
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    report_id,
+                    now,
+                    self.code_hash(code),
+                    context.language,
+                    context.project_name,
+                    report.verdict.value,
+                    mode,
+                    int(bool(report.metrics.get("cached"))),
+                    report.metrics.get("duration_seconds"),
+                    json.dumps(models, ensure_ascii=False),
+                    len(findings),
+                    max_severity,
+                    json.dumps(report.to_dict(), ensure_ascii=False),
+                    code,
+                )
+            )
+            rowid = cursor.lastrowid
+            self._conn.executemany(
+                """
+                INSERT INTO findings (report_rowid, role, severity, line, category, description)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (rowid, f["role"], f["severity"], f["line"], f["category"], f["description"])
+                    for f in findings
+                ]
+            )
+            self._conn.execute(
+                "INSERT INTO reports_fts (rowid, findings, outputs) VALUES (?, ?, ?)",
+                (rowid, "\n".join(f["description"] for f in findings), "\n\n".join(_role_outputs(report).values()))
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self._apply_retention(now)
+            self._conn.commit()
+        return report_id
+    
+    def get(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Charge un rapport enregistré
+        
+        Args:
+            report_id: Identifiant du rapport
+        
+        Returns:
+            Métadonnées, rapport, constats et code analysé (None si compacté),
+            ou None si le rapport est inconnu
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT rowid, {', '.join(SUMMARY_COLUMNS)}, data, code FROM reports WHERE id = ?",
+                (report_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            findings = self._conn.execute(
+                "SELECT role, severity, line, category, description FROM findings WHERE report_rowid = ? ORDER BY rowid",
+                (row[0],)
+            ).fetchall()
+        
+        result = self._summary(row[1:-2])
+        result["report"] = json.loads(row[-2])
+        result["code"] = row[-1]
+        result["findings"] = [
+            dict(zip(("role", "severity", "line", "category", "description"), finding))
+            for finding in findings
+        ]
+        return result
+    
+    def query(
+        self,
+        verdict: Optional[str] = None,
+        language: Optional[str] = None,
+        q: Optional[str] = None,
+        code_hash: Optional[str] = None,
+        model: Optional[str] = None,
+        min_severity: Optional[str] = None,
+        since: Optional[Union[str, float]] = None,
+        until: Optional[Union[str, float]] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Recherche des rapports, du plus récent au plus ancien
+        
+        Args:
+            verdict: Verdict exact (ACCEPTÉ, ACCEPTÉ AVEC RÉSERVES, REFUSÉ)
+            language: Langage du code
+            q: Termes recherchés dans les constats et les sorties (tous requis)
+            code_hash: Empreinte SHA-256 du code analysé
+            model: Modèle ayant exécuté l'un des rôles
+            min_severity: Gravité maximale minimale des constats (low, medium...)
+            since: Date de début (timestamp ou date ISO 8601)
+            until: Date de fin (timestamp ou date ISO 8601)
+            limit: Nombre de rapports par page (au plus MAX_PAGE_SIZE)
+            offset: Nombre de rapports à sauter
+        
+        Returns:
+            Total des rapports correspondants, pagination et page de métadonnées
+        
+        Raises:
+            ReportQueryError: Si un critère est invalide
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        if verdict:
+            try:
+                params.append(Verdict(verdict).value)
+            except ValueError as e:
+                raise ReportQueryError(f"Verdict inconnu: '{verdict}'") from e
+            clauses.append("verdict = ?")
+        if language:
+            clauses.append("language = ?")
+            params.append(language)
+        if code_hash:
+            clauses.append("code_hash = ?")
+            params.append(code_hash.lower())
+        if model:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(reports.models) WHERE json_each.value = ?)")
+            params.append(model)
+        if min_severity:
+            level = normalize_severity(min_severity)
+            if level is None:
+                raise ReportQueryError(
+                    f"Gravité inconnue: '{min_severity}' (attendu : {', '.join(SEVERITY_LEVELS)})"
+                )
+            levels = SEVERITY_LEVELS[SEVERITY_LEVELS.index(level):]
+            clauses.append(f"max_severity IN ({', '.join('?' * len(levels))})")
+            params.extend(levels)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_timestamp(until))
+        if q and q.strip():
+            clauses.append("rowid IN (SELECT rowid FROM reports_fts WHERE reports_fts MATCH ?)")
+            params.append(_match_expression(q))
+        
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM reports{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM reports{where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return {
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "items": [self._summary(row) for row in rows],
+        }
+    
+    def stats(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Tendances sur une période : verdicts et durée moyenne par jour, catégories fréquentes
+        
+        Args:
+            days: Nombre de jours couverts
+        
+        Returns:
+            Nombre de rapports, répartition quotidienne et catégories les plus signalées
+        """
+        since = time.time() - days * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT date(created_at, 'unixepoch') AS day, verdict, COUNT(*), AVG(duration_seconds)
+                FROM reports WHERE created_at >= ? GROUP BY day, verdict ORDER BY day
+                """,
+                (since,)
+            ).fetchall()
+            categories = self._conn.execute(
+                """
+                SELECT findings.category, COUNT(*) FROM findings
+                JOIN reports ON reports.rowid = findings.report_rowid
+                WHERE reports.created_at >= ? AND findings.category IS NOT NULL
+                GROUP BY findings.category ORDER BY COUNT(*) DESC LIMIT 10
+                """,
+                (since,)
+            ).fetchall()
+            total = self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        
+        by_day: Dict[str, Dict[str, Any]] = {}
+        for day, verdict, count, duration in rows:
+            entry = by_day.setdefault(day, {"day": day, "total": 0, "verdicts": {}, "duration_seconds": 0.0})
+            entry["total"] += count
+            entry["verdicts"][verdict] = count
+            # Moyenne pondérée des durées sur les verdicts du jour
+            entry["duration_seconds"] += (duration or 0.0) * count
+        for entry in by_day.values():
+            entry["duration_seconds"] = round(entry["duration_seconds"] / entry["total"], 3)
+        return {
+            "reports": total,
+            "days": days,
+            "by_day": list(by_day.values()),
+            "top_categories": [{"category": category, "count": count} for category, count in categories],
+        }
+    
+    def apply_retention(self) -> Dict[str, int]:
+        """
+        Applique la rétention et la compaction
+        
+        Returns:
+            Nombre de rapports supprimés et compactés
+        """
+        with self._lock:
+            result = self._apply_retention(time.time())
+            self._conn.commit()
+        return result
+    
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
+    
+    def _apply_retention(self, now: float) -> Dict[str, int]:
+        """Supprime les rapports expirés ou en surnombre et compacte les anciens (appelé sous verrou)"""
+        expired = []
+        if self.retention_days:
+            expired = self._conn.execute(
+                "SELECT rowid FROM reports WHERE created_at < ?", (now - self.retention_days * 86400,)
+            ).fetchall()
+        if self.max_reports:
+            expired += self._conn.execute(
+                "SELECT rowid FROM reports ORDER BY created_at DESC LIMIT -1 OFFSET ?", (self.max_reports,)
+            ).fetchall()
+        rowids = sorted({row[0] for row in expired})
+        for statement in (
+            "DELETE FROM reports_fts WHERE rowid = ?",
+            "DELETE FROM findings WHERE report_rowid = ?",
+            "DELETE FROM reports WHERE rowid = ?",
+        ):
+            self._conn.executemany(statement, [(rowid,) for rowid in rowids])
+        
+        compacted = []
+        if self.compact_after_days:
+            compacted = self._conn.execute(
+                "SELECT rowid, data FROM reports WHERE compacted = 0 AND created_at < ?",
+                (now - self.compact_after_days * 86400,)
+            ).fetchall()
+        for rowid, data in compacted:
+            report = json.loads(data)
+            slim = {key: report.get(key) for key in ("verdict", "metrics", "structured")}
+            self._conn.execute(
+                "UPDATE reports SET data = ?, code = NULL, compacted = 1 WHERE rowid = ?",
+                (json.dumps(slim, ensure_ascii=False), rowid)
+            )
+            self._conn.execute("UPDATE reports_fts SET outputs = '' WHERE rowid = ?", (rowid,))
+        
+        if rowids or compacted:
+            self._conn.execute("PRAGMA incremental_vacuum")
+            print(f"[Reports] Rétention : {len(rowids)} rapport(s) supprimé(s), {len(compacted)} compacté(s)")
+        return {"deleted": len(rowids), "compacted": len(compacted)}
+    
+    @staticmethod
+    def _summary(row: tuple) -> Dict[str, Any]:
+        """Métadonnées d'un rapport à partir des colonnes SUMMARY_COLUMNS"""
+        summary = dict(zip(SUMMARY_COLUMNS, row))
+        summary["models"] = json.loads(summary["models"])
+        summary["cached"] = bool(summary["cached"])
+        summary["compacted"] = bool(summary["compacted"])
+        return summary
+
+
+def extract_findings(report: Report) -> list[Dict[str, Any]]:
+    """
+    Constats d'un rapport : problèmes des sorties structurées, sinon lignes
+    en puces des rôles qui produisent des critiques
+    
+    Args:
+        report: Rapport du pipeline
+    
+    Returns:
+        Constats (role, severity, line, category, description)
+    """
+    findings = []
+    for role_name, data in report.structured.items():
+        for issue in data.get("issues") or []:
+            findings.append({
+                "role": role_name,
+                "severity": normalize_severity(issue.get("severity")),
+                "line": issue.get("line"),
+                "category": issue.get("category"),
+                "description": issue["description"],
+            })
+    for role_name, output in _role_outputs(report).items():
+        if role_name in SINGLE_ANSWER_ROLES or role_name in report.structured:
+            continue
+        for line in output.splitlines():
+            match = FINDING_LINE_PATTERN.match(line)
+            if match:
+                findings.append({
+                    "role": role_name,
+                    "severity": normalize_severity(match.group("severity")),
+                    "line": int(match.group("line")) if match.group("line") else None,
+                    "category": None,
+                    "description": match.group("text").strip(),
+                })
+    return findings
+
+
+def _role_outputs(report: Report) -> Dict[str, str]:
+    """Sortie texte de chaque rôle du rapport"""
+    outputs = {"challenger": report.challenger, "reviewer": report.reviewer, "arbiter": report.arbiter}
+    outputs.update(report.outputs)
+    return {role_name: output for role_name, output in outputs.items() if output}
+
+
+def _match_expression(q: str) -> str:
+    """Requête FTS5 : chaque terme entre guillemets (syntaxe FTS neutralisée), tous requis"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+def _timestamp(value: Union[str, float]) -> float:
+    """Convertit un timestamp ou une date ISO 8601 en timestamp"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError as e:
+        raise ReportQueryError(f"Date invalide: '{value}'") from e
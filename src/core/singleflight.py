@@ -0,0 +1,137 @@
+"""
+Regroupement des exécutions identiques en cours (single-flight)
+"""
+
+import asyncio
+import copy
+from typing import Dict, Any, Optional, Callable, Awaitable
+from src.core.metrics import REGISTRY
+
+
+# Callback recevant les événements de progression
+EventCallback = Callable[[Dict[str, Any]], None]
+
+# Exécution partagée : reçoit le callback de diffusion des événements (None sans abonné)
+FlightFactory = Callable[[Optional[EventCallback]], Awaitable[Any]]
+
+# Émet le résultat d'une exécution non streamée à un abonné arrivé en cours de route
+ReplayCallback = Callable[[Any, EventCallback], None]
+
+COALESCED = REGISTRY.counter(
+    "code_challenger_coalesced_total",
+    "Requêtes rattachées à une exécution identique déjà en cours (pipeline, chat)",
+    ("level",)
+)
+
+
+class _Flight:
+    """Exécution en cours, ses abonnés et les événements déjà émis"""
+    
+    def __init__(self, streaming: bool):
+        self.streaming = streaming
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.joined = 0
+        self.events: list[Dict[str, Any]] = []
+        self.subscribers: list[EventCallback] = []
+    
+    def emit(self, event: Dict[str, Any]):
+        """Diffuse un événement à tous les abonnés et le conserve pour les suivants"""
+        self.events.append(event)
+        for callback in list(self.subscribers):
+            callback(event)
+
+
+class SingleFlight:
+    """
+    Rattache les appels identiques simultanés à une seule exécution
+    
+    Le premier appel pour une clé lance l'exécution ; les appels suivants
+    reçoivent le même résultat (ou la même exception) sans relancer le
+    travail. Si l'exécution est streamée, un abonné arrivé en cours de
+    route reçoit d'abord les événements déjà émis, puis les suivants ;
+    sinon, replay lui restitue le résultat sous forme d'événements.
+    
+    L'exécution n'est annulée que lorsque tous ses appelants ont abandonné.
+    Quand elle est partagée, chaque appelant reçoit sa propre copie du
+    résultat.
+    """
+    
+    def __init__(self, level: str):
+        """
+        Initialise le regroupement
+        
+        Args:
+            level: Niveau de regroupement ("pipeline", "chat"), pour les métriques
+        """
+        self.level = level
+        self._flights: Dict[str, _Flight] = {}
+    
+    @property
+    def in_flight(self) -> int:
+        """Nombre d'exécutions en cours"""
+        return len(self._flights)
+    
+    async def do(
+        self,
+        key: str,
+        factory: FlightFactory,
+        on_event: Optional[EventCallback] = None,
+        replay: Optional[ReplayCallback] = None
+    ) -> Any:
+        """
+        Exécute factory, ou se rattache à l'exécution en cours pour la même clé
+        
+        Args:
+            key: Clé des exécutions identiques
+            factory: Exécution à lancer (reçoit le callback de diffusion des
+                événements si l'appelant qui la lance en attend)
+            on_event: Callback optionnel recevant les événements de l'exécution
+            replay: Restitution du résultat à un abonné d'une exécution non streamée
+        
+        Returns:
+            Résultat de l'exécution (copie s'il est partagé)
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(streaming=on_event is not None)
+            flight.task = asyncio.create_task(factory(flight.emit if flight.streaming else None))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self._flights[key] = flight
+        else:
+            flight.joined += 1
+            COALESCED.inc(level=self.level)
+            print(f"[SingleFlight] Requête rattachée à une exécution en cours ({self.level})")
+            if on_event is not None and flight.streaming:
+                for event in list(flight.events):
+                    on_event(event)
+        
+        subscribed = on_event is not None and flight.streaming
+        if subscribed:
+            flight.subscribers.append(on_event)
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if subscribed:
+                flight.subscribers.remove(on_event)
+            if flight.waiters == 0 and not flight.task.done():
+                # Plus aucun appelant : l'exécution est abandonnée
+                self._forget(key, flight)
+                flight.task.cancel()
+        
+        if not flight.joined:
+            return result
+        result = copy.deepcopy(result)
+        if on_event is not None and not flight.streaming and replay is not None:
+            replay(result, on_event)
+        return result
+    
+    def _forget(self, key: str, flight: _Flight):
+        """Retire une exécution terminée ou abandonnée (les appels suivants en relancent une)"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Exception récupérée même si plus personne n'attend le résultat
+            flight.task.exception()
@@ -0,0 +1,217 @@
+"""
+Sorties structurées des rôles (format JSON imposé à Ollama)
+"""
+
+import json
+from typing import Dict, Any, Optional, List, Literal, get_args
+from pydantic import BaseModel, Field, ValidationError
+from src.core.models import Verdict, worst_verdict
+from src.utils.errors import OllamaError, ConfigError
+
+
+# Gravité d'un problème, du moins au plus grave
+Severity = Literal["none", "low", "medium", "high", "critical"]
+SEVERITY_LEVELS: List[str] = list(get_args(Severity))
+
+
+class Issue(BaseModel):
+    """Problème relevé par le Challenger"""
+    severity: Severity
+    line: Optional[int] = Field(default=None, description="Ligne concernée dans le code original")
+    category: str = Field(default="", description="bug, performance, sécurité, lisibilité...")
+    description: str
+
+
+class ChallengerOutput(BaseModel):
+    """Sortie structurée du Challenger"""
+    issues: List[Issue] = []
+    max_severity: Severity = Field(description="Gravité du problème le plus grave (none si aucun)")
+
+
+class ReviewerOutput(BaseModel):
+    """Sortie structurée du Reviewer"""
+    code: str = Field(description="Version améliorée complète du code")
+    changes: List[str] = Field(default=[], description="Modifications effectuées et leur raison")
+
+
+class ArbiterOutput(BaseModel):
+    """Sortie structurée de l'Arbiter"""
+    verdict: Literal["ACCEPTÉ", "ACCEPTÉ AVEC RÉSERVES", "REFUSÉ"]
+    confidence: float = Field(ge=0.0, le=1.0, description="Confiance dans le verdict (0 à 1)")
+    justification: str
+
+
+# Schéma de sortie par type de rôle
+OUTPUT_MODELS: Dict[str, type[BaseModel]] = {
+    "challenger": ChallengerOutput,
+    "reviewer": ReviewerOutput,
+    "arbiter": ArbiterOutput,
+}
+
+# Consigne ajoutée au prompt d'un rôle en sortie structurée
+STRUCTURED_INSTRUCTION = """
+Réponds uniquement par un objet JSON respectant ce schéma :
+{schema}"""
+
+
+class StructuredOutputError(OllamaError):
+    """Réponse d'un rôle non conforme à son schéma"""
+    pass
+
+
+def structured_roles(settings: Dict[str, Any], pipeline: list[str]) -> Dict[str, str]:
+    """
+    Type de sortie structurée de chaque rôle (settings.structured_output)
+    
+    `roles` est soit une liste de rôles (le type est le nom du rôle), soit un
+    dictionnaire rôle → type ("challenger", "reviewer" ou "arbiter"). Par
+    défaut, les rôles challenger, reviewer et arbiter du pipeline.
+    
+    Args:
+        settings: Section settings de la configuration
+        pipeline: Rôles du pipeline
+    
+    Returns:
+        Dictionnaire rôle → type de sortie (vide si le mode est désactivé)
+    
+    Raises:
+        ConfigError: Si un type de sortie est inconnu
+    """
+    structured_settings = settings.get("structured_output") or {}
+    if not structured_settings.get("enabled", False):
+        return {}
+    roles = structured_settings.get("roles")
+    if roles is None:
+        roles = [role for role in OUTPUT_MODELS if role in pipeline]
+    if isinstance(roles, list):
+        roles = {role: role for role in roles}
+    for role, kind in roles.items():
+        if kind not in OUTPUT_MODELS:
+            raise ConfigError(
+                f"Type de sortie structurée inconnu pour '{role}': '{kind}' "
+                f"(attendu : {', '.join(OUTPUT_MODELS)})"
+            )
+    return {role: kind for role, kind in roles.items() if role in pipeline}
+
+
+def output_schema(kind: str) -> Dict[str, Any]:
+    """Schéma JSON transmis à Ollama (paramètre format) pour un type de sortie"""
+    return OUTPUT_MODELS[kind].model_json_schema()
+
+
+def instruct(kind: str, prompt: str) -> str:
+    """Ajoute au prompt la consigne de réponse JSON et le schéma attendu"""
+    schema = json.dumps(output_schema(kind), ensure_ascii=False)
+    return prompt + "\n" + STRUCTURED_INSTRUCTION.format(schema=schema)
+
+
+def parse_output(kind: str, content: str) -> Dict[str, Any]:
+    """
+    Valide la réponse JSON d'un rôle
+    
+    Args:
+        kind: Type de sortie
+        content: Réponse brute du modèle
+    
+    Returns:
+        Sortie validée sous forme de dictionnaire
+    
+    Raises:
+        StructuredOutputError: Si la réponse n'est pas un JSON conforme au schéma
+    """
+    try:
+        return OUTPUT_MODELS[kind].model_validate_json(content).model_dump()
+    except ValidationError as e:
+        raise StructuredOutputError(
+            f"Sortie {kind} non conforme au schéma: {e.error_count()} erreur(s), {e.errors()[0]['msg']}"
+        ) from e
+
+
+def render_text(kind: str, data: Dict[str, Any], language: str = "") -> str:
+    """
+    Version lisible d'une sortie structurée (rapport texte et prompts des rôles aval)
+    
+    Args:
+        kind: Type de sortie
+        data: Sortie validée
+        language: Langage du code (bloc de code du Reviewer)
+    
+    Returns:
+        Texte au format des sorties libres
+    """
+    if kind == "challenger":
+        if not data["issues"]:
+            return "Aucun problème identifié."
+        lines = []
+        for issue in data["issues"]:
+            location = f"ligne {issue['line']}, " if issue.get("line") else ""
+            category = f"{issue['category']} : " if issue.get("category") else ""
+            lines.append(f"- [{issue['severity']}] {location}{category}{issue['description']}")
+        return "\n".join(lines)
+    if kind == "reviewer":
+        changes = "\n".join(f"- {change}" for change in data["changes"])
+        return f"```{language}\n{data['code']}\n```" + (f"\n\n{changes}" if changes else "")
+    return (
+        f"Verdict : {data['verdict']}\n"
+        f"Confiance : {data['confidence']:.2f}\n"
+        f"Justification : {data['justification']}"
+    )
+
+
+def structured_verdict(data: Dict[str, Any]) -> Verdict:
+    """Verdict d'une sortie structurée d'Arbiter"""
+    return Verdict(data["verdict"])
+
+
+def offset_lines(data: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    """
+    Décale les numéros de ligne des problèmes d'une sortie Challenger
+    
+    Args:
+        data: Sortie structurée (seuls les problèmes avec une ligne sont modifiés)
+        offset: Nombre de lignes précédant le morceau analysé
+    
+    Returns:
+        Copie de la sortie avec les lignes rapportées au fichier complet
+    """
+    if "issues" not in data or not offset:
+        return data
+    issues = [
+        {**issue, "line": issue["line"] + offset if issue.get("line") else issue.get("line")}
+        for issue in data["issues"]
+    ]
+    return {**data, "issues": issues}
+
+
+def merge_outputs(parts: list[tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Fusionne les sorties structurées d'un rôle sur plusieurs morceaux
+    
+    Les problèmes sont concaténés (lignes rapportées au fichier complet), les
+    codes et modifications mis bout à bout, et le verdict retenu est le plus
+    sévère avec la confiance la plus faible.
+    
+    Args:
+        parts: Couples (lignes précédant le morceau, sortie structurée du morceau)
+    
+    Returns:
+        Sortie structurée fusionnée
+    """
+    outputs = [offset_lines(data, offset) for offset, data in parts]
+    first = outputs[0]
+    if "issues" in first:
+        issues = [issue for data in outputs for issue in data["issues"]]
+        return {
+            "issues": issues,
+            "max_severity": max((data["max_severity"] for data in outputs), key=SEVERITY_LEVELS.index),
+        }
+    if "code" in first:
+        return {
+            "code": "\n".join(data["code"].rstrip("\n") for data in outputs),
+            "changes": [change for data in outputs for change in data["changes"]],
+        }
+    return {
+        "verdict": worst_verdict(Verdict(data["verdict"]) for data in outputs).value,
+        "confidence": min(data["confidence"] for data in outputs),
+        "justification": "\n\n".join(data["justification"] for data in outputs),
+    }
@@ -0,0 +1,269 @@
+"""
+Préchargement des modèles et maintien en mémoire (keep-alive)
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Union
+from src.core.models import PipelineConfig, RoleConfig
+from src.core.ollama_pool import OllamaPool
+from src.core.gating import dependent_roles
+from src.core.budget import ContextBudget
+from src.utils.tokens import estimate_tokens
+
+
+# Durée Ollama : "30m", "1h30m", "45s", nombre de secondes
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+@dataclass
+class WarmModel:
+    """
+    Modèle à garder chargé
+    """
+    model: str
+    num_ctx: int
+    keep_alive: Optional[Union[str, int]] = None
+
+
+def parse_duration(value: Optional[Union[str, int, float]]) -> Optional[float]:
+    """
+    Convertit une durée keep_alive d'Ollama en secondes
+    
+    Args:
+        value: Durée ("30m", "1h30m", nombre de secondes ; négative = illimitée)
+    
+    Returns:
+        Nombre de secondes, float("inf") si illimitée, None si absente ou illisible
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    
+    text = str(value).strip()
+    if text.startswith("-"):
+        return float("inf")
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = DURATION_PATTERN.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def resolve_keep_alive(role_config: RoleConfig, settings: Dict[str, Any]) -> Optional[Union[str, int]]:
+    """
+    keep_alive applicable à un rôle : valeur du rôle, sinon settings.warmup.keep_alive
+    
+    Args:
+        role_config: Configuration du rôle
+        settings: Section settings de la configuration
+    
+    Returns:
+        Durée keep_alive (None = valeur par défaut d'Ollama)
+    """
+    if role_config.keep_alive is not None:
+        return role_config.keep_alive
+    return (settings.get("warmup") or {}).get("keep_alive")
+
+
+class ModelKeeper:
+    """
+    Précharge les modèles des rôles et les empêche d'être déchargés
+    
+    Au démarrage, chaque modèle distinct est chargé (séquentiellement, pour
+    ne pas saturer la mémoire) avec le num_ctx de ses rôles. Une tâche de
+    fond consulte ensuite /api/ps à intervalle régulier : les modèles dont
+    l'échéance keep_alive approche sont prolongés et ceux qui ont été
+    déchargés (pression mémoire, redémarrage d'Ollama) sont rechargés.
+    """
+    
+    def __init__(
+        self,
+        client: OllamaPool,
+        models: list[WarmModel],
+        interval_seconds: float = 60,
+        reload_evicted: bool = True
+    ):
+        """
+        Initialise le gardien des modèles
+        
+        Args:
+            client: Pool d'instances Ollama
+            models: Modèles à garder chargés
+            interval_seconds: Intervalle entre deux vérifications de /api/ps
+            reload_evicted: Recharger les modèles déchargés par Ollama
+        """
+        self.client = client
+        self.models = models
+        self.interval_seconds = interval_seconds
+        self.reload_evicted = reload_evicted
+        self._task: Optional[asyncio.Task] = None
+        self._loads: Dict[str, int] = {model.model: 0 for model in models}
+    
+    @classmethod
+    def from_config(cls, config: PipelineConfig, client: OllamaPool) -> Optional["ModelKeeper"]:
+        """
+        Construit le gardien à partir de la configuration (settings.warmup)
+        
+        Chaque modèle distinct des rôles (candidats des ensembles compris) est
+        retenu une fois, avec le num_ctx du premier rôle qui l'utilise (avec
+        le budget de contexte : le plus petit bucket couvrant son template)
+        et le keep_alive le plus long, ainsi que le modèle rapide du court-circuit
+        (settings.gating.fast_model).
+        
+        Args:
+            config: Configuration du pipeline
+            client: Pool d'instances Ollama
+        
+        Returns:
+            Gardien configuré, ou None si le préchargement est désactivé
+        """
+        warmup_settings = config.settings.get("warmup") or {}
+        if not warmup_settings.get("enabled", False):
+            return None
+        
+        # Budget de contexte : préchargement au plus petit contexte utile,
+        # agrandi par les appels suivants (sauf en mode conversation)
+        budget = None
+        if not (config.settings.get("conversation") or {}).get("enabled", False):
+            budget = ContextBudget.from_settings(config.settings)
+        
+        models: Dict[str, WarmModel] = {}
+        for role_name, role_config in config.roles.items():
+            keep_alive = resolve_keep_alive(role_config, config.settings)
+            num_ctx = role_config.num_ctx
+            if budget is not None:
+                num_ctx = budget.initial_num_ctx(num_ctx, estimate_tokens(config.template(role_name).static_text))
+            role_models = [role_config.model]
+            if role_config.ensemble is not None:
+                role_models = [member.model for member in role_config.ensemble.members]
+            for model in role_models:
+                warm = models.get(model)
+                if warm is None:
+                    models[model] = WarmModel(model, num_ctx, keep_alive)
+                elif (parse_duration(keep_alive) or 0) > (parse_duration(warm.keep_alive) or 0):
+                    warm.keep_alive = keep_alive
+        
+        # Modèle rapide du court-circuit, avec le num_ctx du premier rôle routé
+        gating = config.settings.get("gating") or {}
+        fast_model = gating.get("fast_model")
+        if gating.get("enabled", False) and fast_model and fast_model not in models:
+            routed = dependent_roles(config, gating.get("role", "challenger"))
+            num_ctx = next(
+                (config.roles[role].num_ctx for role in config.pipeline if role in routed),
+                max(role.num_ctx for role in config.roles.values())
+            )
+            models[fast_model] = WarmModel(fast_model, num_ctx, warmup_settings.get("keep_alive"))
+        
+        return cls(
+            client=client,
+            models=list(models.values()),
+            interval_seconds=warmup_settings.get("interval_seconds", 60),
+            reload_evicted=warmup_settings.get("reload_evicted", True)
+        )
+    
+    async def start(self, preload: Optional[list[WarmModel]] = None):
+        """
+        Lance le préchargement puis la surveillance en tâche de fond
+        
+        Args:
+            preload: Modèles à précharger (tous par défaut ; après un
+                rechargement de la configuration, seuls les modèles modifiés)
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(self.models if preload is None else preload))
+    
+    async def stop(self):
+        """Arrête la surveillance (les modèles restent chargés côté Ollama)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def preload(self, models: Optional[list[WarmModel]] = None):
+        """Charge chaque modèle (tous par défaut), l'un après l'autre"""
+        for warm in self.models if models is None else models:
+            await self._load(warm, warm.num_ctx, "Préchargement")
+    
+    async def refresh(self):
+        """
+        Prolonge les modèles dont l'échéance approche et recharge les modèles déchargés
+        """
+        running = await self.client.running_models()
+        if running is None:
+            print("[Warmup] ⚠️ Ollama injoignable, vérification reportée")
+            return
+        
+        resident = {entry.get("name"): entry for entry in running}
+        for warm in self.models:
+            entry = resident.get(warm.model)
+            if entry is None:
+                if self.reload_evicted:
+                    await self._load(warm, warm.num_ctx, "Rechargement")
+            elif self._expires_soon(entry):
+                # Conserver le contexte actuel pour ne pas provoquer de rechargement
+                await self._load(warm, entry.get("context_length") or warm.num_ctx, "Prolongation")
+    
+    def status(self, running: Optional[list[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        État des modèles pour le health check
+        
+        Args:
+            running: Entrées /api/ps de l'instantané du pool (None si inconnues)
+        
+        Returns:
+            Modèles résidents (tous, d'après /api/ps) et modèles configurés non chargés
+        """
+        resident = [entry.get("name") for entry in running or []]
+        return {
+            "resident_models": resident,
+            "missing_models": [warm.model for warm in self.models if warm.model not in resident],
+            "loads": dict(self._loads),
+        }
+    
+    async def _run(self, preload: list[WarmModel]):
+        """Boucle de fond : préchargement initial puis vérifications périodiques"""
+        await self.preload(preload)
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[Warmup] ⚠️ Erreur lors de la vérification des modèles: {e}")
+    
+    async def _load(self, warm: WarmModel, num_ctx: int, action: str):
+        """Charge un modèle en journalisant la durée (les erreurs ne sont pas propagées)"""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        try:
+            await self.client.load_model(warm.model, num_ctx=num_ctx, keep_alive=warm.keep_alive)
+        except Exception as e:
+            print(f"[Warmup] ⚠️ {action} impossible pour {warm.model}: {e}")
+            return
+        self._loads[warm.model] += 1
+        print(f"[Warmup] {action} de {warm.model} ({loop.time() - start_time:.1f}s)")
+    
+    def _expires_soon(self, entry: Dict[str, Any]) -> bool:
+        """Indique si l'échéance d'un modèle résident tombe avant les deux prochaines vérifications"""
+        expires_at = entry.get("expires_at")
+        if not expires_at:
+            return False
+        try:
+            # Ollama renvoie des nanosecondes : on tronque aux microsecondes
+            deadline = datetime.fromisoformat(re.sub(r"(\.\d{6})\d+", r"\1", expires_at))
+        except ValueError:
+            return False
+        if deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=timezone.utc)
+        remaining = (deadline - datetime.now(timezone.utc)).total_seconds()
+        return remaining < 2 * self.interval_seconds
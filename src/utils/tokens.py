@@ -0,0 +1,37 @@
+"""
+Estimation rapide du nombre de tokens d'un texte
+"""
+
+import re
+
+
+# Mots, nombres et symboles isolés : approximation des découpages BPE
+TOKEN_PATTERN = re.compile(r"[A-Za-z_]+|\d+|[^\sA-Za-z_\d]")
+
+# Longueur moyenne (en caractères) d'un token pour un mot long
+CHARS_PER_TOKEN = 4
+
+# Mots et nombres plus longs qu'un token
+LONG_WORD_PATTERN = re.compile(r"[A-Za-z_]{%d,}|\d{%d,}" % (CHARS_PER_TOKEN + 1, CHARS_PER_TOKEN + 1))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime le nombre de tokens d'un texte sans tokenizer
+
+    Chaque mot, nombre ou symbole compte pour un token, et les mots longs
+    pour un token par tranche de 4 caractères. L'estimation est volontairement
+    un peu pessimiste pour du code source.
+
+    Args:
+        text: Texte à estimer
+
+    Returns:
+        Nombre de tokens estimé
+    """
+    if not text:
+        return 0
+    # Un token par mot, nombre ou symbole, plus les tranches supplémentaires
+    # des mots longs (findall évite une boucle Python par token)
+    extra = sum((len(word) - 1) // CHARS_PER_TOKEN for word in LONG_WORD_PATTERN.findall(text))
+    return len(TOKEN_PATTERN.findall(text)) + extra
@@ -73,6 +73,106 @@ var API = (function() {
         });
     }
     
+    /**
+     * Indique si le navigateur sait lire une réponse HTTP en flux
+     * @returns {boolean} true si fetch + ReadableStream sont disponibles
+     */
+    function supportsStreaming() {
+        return typeof window.fetch === 'function' &&
+            typeof window.ReadableStream === 'function' &&
+            typeof window.TextDecoder === 'function';
+    }
+    
+    /**
+     * Découpe un bloc Server-Sent Events en événement
+     * @param {string} block - Bloc brut (lignes "event:" / "data:")
+     * @returns {object|null} Événement décodé ou null
+     */
+    function parseSSEBlock(block) {
+        var data = [];
+        block.split('\n').forEach(function(line) {
+            if (line.indexOf('data:') === 0) {
+                data.push(line.slice(5).replace(/^ /, ''));
+            }
+        });
+        if (!data.length) {
+            return null;
+        }
+        return JSON.parse(data.join('\n'));
+    }
+    
+    /**
+     * Lance un challenge en streaming (Server-Sent Events)
+     * @param {string} code - Code source
+     * @param {string} language - Langage du code
+     * @param {object} context - Contexte optionnel
+     * @param {function} onEvent - Appelé pour chaque événement (role_start, token, role_end, role_error)
+     * @returns {Promise} Promise résolue avec le rapport final
+     */
+    function challengeCodeStream(code, language, context, onEvent) {
+        return fetch(BASE_URL + '/challenge/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            body: JSON.stringify({
+                code: code,
+                language: language || 'python',
+                context: context || null
+            })
+        }).then(function(response) {
+            if (!response.ok) {
+                return response.json().then(function(error) {
+                    throw new Error(error.detail || 'Erreur HTTP ' + response.status);
+                }, function() {
+                    throw new Error('Erreur HTTP ' + response.status + ': ' + response.statusText);
+                });
+            }
+            
+            var reader = response.body.getReader();
+            var decoder = new TextDecoder('utf-8');
+            var buffer = '';
+            var report = null;
+            
+            function handleBlock(block) {
+                var event = parseSSEBlock(block);
+                if (!event) return;
+                if (event.type === 'report') {
+                    report = event.report;
+                } else if (event.type === 'error') {
+                    throw new Error(event.message || 'Erreur du pipeline');
+                } else if (onEvent) {
+                    onEvent(event);
+                }
+            }
+            
+            function pump() {
+                return reader.read().then(function(result) {
+                    if (result.done) {
+                        if (buffer.trim()) {
+                            handleBlock(buffer);
+                        }
+                        if (!report) {
+                            throw new Error('Flux interrompu avant le rapport final');
+                        }
+                        return { status: 'success', report: report };
+                    }
+                    
+                    buffer += decoder.decode(result.value, { stream: true });
+                    var index;
+                    while ((index = buffer.indexOf('\n\n')) !== -1) {
+                        handleBlock(buffer.slice(0, index));
+                        buffer = buffer.slice(index + 2);
+                    }
+                    return pump();
+                });
+            }
+            
+            return pump();
+        });
+    }
+    
     /**
      * Vérifie la santé de l'API et d'Ollama
      * @returns {Promise} Promise résolue avec le statut
@@ -84,6 +184,8 @@ var API = (function() {
     // API publique
     return {
         challengeCode: challengeCode,
+        challengeCodeStream: challengeCodeStream,
+        supportsStreaming: supportsStreaming,
         checkHealth: checkHealth
     };
 })();
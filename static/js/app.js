@@ -44,6 +44,53 @@
         }
     }
     
+    // Nombre de morceaux terminés par rôle (fichiers découpés)
+    var chunksDone = {};
+    
+    /**
+     * Traite un événement de progression reçu en streaming
+     * @param {object} event - Événement du pipeline
+     */
+    function handleStreamEvent(event) {
+        if (!UI) return;
+        
+        if (event.type === 'chunks') {
+            chunksDone = {};
+            console.log('[App] Code découpé en ' + event.count + ' morceaux');
+        } else if (event.type === 'role_start') {
+            UI.updateRoleStatus(event.role, 'running');
+        } else if (event.type === 'token') {
+            UI.appendRoleOutput(event.role, event.delta, event.chunk, event.chunks);
+        } else if (event.type === 'role_end') {
+            if (typeof event.chunk === 'number') {
+                chunksDone[event.role] = (chunksDone[event.role] || 0) + 1;
+                if (chunksDone[event.role] < event.chunks) {
+                    return;
+                }
+            }
+            UI.updateRoleStatus(event.role, 'completed');
+        } else if (event.type === 'role_error') {
+            UI.updateRoleStatus(event.role, 'error');
+            console.error('[App] Erreur du rôle ' + event.role + ': ' + event.message);
+        }
+    }
+    
+    /**
+     * Lance le challenge, en streaming si le navigateur le permet
+     * @param {string} code - Code source
+     * @param {string} language - Langage du code
+     * @returns {Promise} Promise résolue avec la réponse de l'API
+     */
+    function runChallenge(code, language) {
+        if (API.supportsStreaming && API.supportsStreaming()) {
+            if (UI) {
+                UI.startStreaming();
+            }
+            return API.challengeCodeStream(code, language, null, handleStreamEvent);
+        }
+        return API.challengeCode(code, language, null);
+    }
+    
     /**
      * Gère le clic sur le bouton de challenge
      */
@@ -87,7 +134,7 @@
             console.log('[App] Appel API en cours...');
             var startTime = Date.now();
             
-            API.challengeCode(code, language, null)
+            runChallenge(code, language)
                 .then(function(response) {
                     var duration = ((Date.now() - startTime) / 1000).toFixed(1);
                     console.log('[App] Réponse reçue après ' + duration + 's');
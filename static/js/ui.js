@@ -133,6 +133,77 @@ var UI = (function() {
         switchTab('challenger');
     }
     
+    /**
+     * Prépare l'affichage des résultats pour une réception en streaming
+     */
+    function startStreaming() {
+        var section = document.getElementById('results-section');
+        if (section) {
+            section.style.display = 'block';
+        }
+        
+        ['challenger-content', 'reviewer-content', 'arbiter-content'].forEach(function(id) {
+            var el = document.getElementById(id);
+            if (el) {
+                el.textContent = '';
+            }
+        });
+        
+        var verdictBadge = document.getElementById('verdict-badge');
+        if (verdictBadge) {
+            verdictBadge.textContent = '';
+            verdictBadge.className = 'verdict-badge';
+        }
+    }
+    
+    /**
+     * Ajoute un fragment de texte à la sortie d'un rôle
+     * @param {string} role - Nom du rôle (challenger, reviewer, arbiter)
+     * @param {string} delta - Fragment reçu
+     * @param {number} chunk - Index du morceau (fichiers découpés, optionnel)
+     * @param {number} chunks - Nombre total de morceaux (optionnel)
+     */
+    function appendRoleOutput(role, delta, chunk, chunks) {
+        var content = document.getElementById(role + '-content');
+        if (!content || !delta) return;
+        
+        if (typeof chunk === 'number') {
+            content = getChunkSection(content, chunk, chunks);
+        }
+        content.appendChild(document.createTextNode(delta));
+    }
+    
+    /**
+     * Retourne (en la créant si besoin) la section d'un morceau dans une sortie
+     * Les sections sont maintenues dans l'ordre des morceaux, quel que soit
+     * l'ordre d'arrivée des fragments.
+     * @param {HTMLElement} content - Conteneur de la sortie du rôle
+     * @param {number} chunk - Index du morceau
+     * @param {number} chunks - Nombre total de morceaux
+     * @returns {HTMLElement} Section du morceau
+     */
+    function getChunkSection(content, chunk, chunks) {
+        var sections = content.querySelectorAll('span[data-chunk]');
+        var next = null;
+        for (var i = 0; i < sections.length; i++) {
+            var index = parseInt(sections[i].getAttribute('data-chunk'), 10);
+            if (index === chunk) {
+                return sections[i];
+            }
+            if (index > chunk && !next) {
+                next = sections[i];
+            }
+        }
+        
+        var section = document.createElement('span');
+        section.setAttribute('data-chunk', String(chunk));
+        section.appendChild(document.createTextNode(
+            '\n### Partie ' + (chunk + 1) + '/' + (chunks || '?') + '\n'
+        ));
+        content.insertBefore(section, next);
+        return section;
+    }
+    
     /**
      * Masque les résultats
      */
@@ -207,6 +278,8 @@ var UI = (function() {
         resetProgress: resetProgress,
         updateRoleStatus: updateRoleStatus,
         showResults: showResults,
+        startStreaming: startStreaming,
+        appendRoleOutput: appendRoleOutput,
         hideResults: hideResults,
         showError: showError,
         hideError: hideError,
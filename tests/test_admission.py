@@ -0,0 +1,186 @@
+"""
+Tests du contrôle d'admission et de la limite de débit
+"""
+
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.api import routes
+from src.core import admission as admission_module
+from src.core.admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge monotone contrôlée par le test"""
+    now = [1000.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_burst_then_delay(clock):
+    """La réserve autorise une rafale, puis indique le délai avant le prochain jeton"""
+    bucket = TokenBucket(rate=1.0, burst=3)
+    
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(1.0)
+
+
+def test_token_bucket_refill_capped_by_burst(clock):
+    """Les jetons se reconstituent au débit configuré, sans dépasser la réserve"""
+    bucket = TokenBucket(rate=2.0, burst=4)
+    for _ in range(4):
+        bucket.take()
+    
+    clock[0] += 1.0
+    assert bucket.take(2) == 0.0
+    assert bucket.take() == pytest.approx(0.5)
+    
+    clock[0] += 60
+    assert bucket.full
+    assert [bucket.take() for _ in range(5)][-1] > 0
+
+
+def test_rate_limit_rejects_with_429(clock):
+    """Un client sans jeton disponible est refusé en 429 avec Retry-After"""
+    controller = AdmissionController(max_concurrent=4, rate_per_minute=60, burst=2)
+    controller.check_rate("a")
+    controller.check_rate("a")
+    
+    with pytest.raises(AdmissionRejected) as error:
+        controller.check_rate("a")
+    
+    assert error.value.status_code == 429
+    assert error.value.reason == "rate_limited"
+    assert error.value.retry_after == 1
+    # Les autres clients ont leur propre seau
+    controller.check_rate("b")
+
+
+def test_full_queue_rejects_with_503():
+    """Sans place ni place en file, la requête est refusée en 503 avec Retry-After"""
+    async def main():
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("b")
+        controller.release(ticket)
+        return error.value
+    
+    error = asyncio.run(main())
+    
+    assert error.status_code == 503
+    assert error.reason == "queue_full"
+    assert error.retry_after >= 1
+
+
+def test_queued_request_admitted_on_release():
+    """Une requête en file est admise dès qu'une place est rendue"""
+    async def main():
+        controller = AdmissionController(max_concurrent=1, max_queue=2, max_wait_seconds=5)
+        ticket = await controller.acquire("a")
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0.01)
+        depth = controller.queue_depth
+        controller.release(ticket)
+        second = await waiting
+        active = controller.active
+        controller.release(second)
+        return depth, active, controller.active
+    
+    assert asyncio.run(main()) == (1, 1, 0)
+
+
+def test_wait_timeout_rejects_with_503():
+    """Une requête qui n'obtient pas de place à temps est refusée en 503"""
+    async def main():
+        controller = AdmissionController(max_concurrent=1, max_queue=2, max_wait_seconds=0.05)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("b")
+        controller.release(ticket)
+        return error.value, controller.queue_depth
+    
+    error, depth = asyncio.run(main())
+    
+    assert (error.status_code, error.reason, depth) == (503, "wait_timeout", 0)
+
+
+class StubOrchestrator:
+    """Orchestrateur minimal : deux événements puis le rapport"""
+    
+    async def run_pipeline_stream(self, code, context):
+        yield {"type": "role_start", "role": "challenger"}
+        await asyncio.sleep(0)
+        yield {"type": "report", "report": {}}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Application exposant les routes, avec un contrôle d'admission de test"""
+    def build(**options) -> tuple[FastAPI, AdmissionController]:
+        controller = AdmissionController(**options)
+        monkeypatch.setattr(routes, "_admission", controller)
+        monkeypatch.setattr(routes, "_orchestrator", StubOrchestrator())
+        app = FastAPI()
+        app.include_router(routes.router, prefix="/api")
+        return app, controller
+    return build
+
+
+async def post_stream(app: FastAPI, client_id: str = "a") -> httpx.Response:
+    """Envoie une requête de streaming et lit tout le flux"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/api/challenge/stream", json={"code": "x = 1\n"}, headers={"X-Client-Id": client_id})
+
+
+def test_stream_releases_ticket_when_finished(api):
+    """La place d'un flux est rendue à la fin de la réponse"""
+    app, controller = api(max_concurrent=1, max_queue=0)
+    
+    responses = [asyncio.run(post_stream(app)) for _ in range(3)]
+    
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert "report" in responses[-1].text
+    assert controller.active == 0
+
+
+def test_stream_releases_ticket_when_body_never_sent(api):
+    """Régression : la place est rendue même si le client part avant le premier envoi"""
+    _, controller = api(max_concurrent=1, max_queue=0)
+    
+    async def main():
+        ticket = await controller.acquire("a")
+        response = routes._AdmittedStreamingResponse(iter([b"data"]), ticket)
+        
+        async def receive():
+            return {"type": "http.disconnect"}
+        
+        async def send(message):
+            raise OSError("client parti")
+        
+        with pytest.raises(Exception):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+    
+    asyncio.run(main())
+    
+    assert controller.active == 0
+
+
+def test_stream_rejections_carry_retry_after(api):
+    """Les refus d'admission du flux sont des 429/503 avec Retry-After"""
+    app, controller = api(max_concurrent=1, max_queue=0, rate_per_minute=60, burst=1)
+    
+    async def main():
+        limited = (await post_stream(app, "a"), await post_stream(app, "a"))
+        ticket = await controller.acquire("c")
+        saturated = await post_stream(app, "b")
+        controller.release(ticket)
+        return limited, saturated
+    
+    (first, second), saturated = asyncio.run(main())
+    
+    assert first.status_code == 200
+    assert second.status_code == 429 and int(second.headers["Retry-After"]) >= 1
+    assert saturated.status_code == 503 and int(saturated.headers["Retry-After"]) >= 1
@@ -0,0 +1,96 @@
+"""
+Tests du budget de contexte
+"""
+
+from src.core import budget as budget_module
+from src.core.budget import ContextBudget, ContextNeed, condense, OMITTED_MARKER
+
+
+def make_budget(**kwargs) -> ContextBudget:
+    """Budget sans marge, aux buckets réduits"""
+    options = {"buckets": (1024, 2048, 4096, 8192), "reserve_tokens": 100, "margin": 0.0}
+    options.update(kwargs)
+    return ContextBudget(**options)
+
+
+def test_num_ctx_smallest_covering_bucket():
+    """num_ctx est le plus petit bucket couvrant le prompt et la réserve"""
+    budget = make_budget()
+    
+    assert budget.num_ctx("a", ContextNeed(500, 100), 8192) == 1024
+    assert budget.num_ctx("b", ContextNeed(1000, 100), 8192) == 2048
+    assert budget.num_ctx("c", ContextNeed(3000, 100), 8192) == 4096
+
+
+def test_num_ctx_capped_by_role_limit():
+    """num_ctx ne dépasse pas le contexte maximal du rôle"""
+    assert make_budget().num_ctx("m", ContextNeed(6000, 100), 2048) == 2048
+    assert make_budget(max_num_ctx=8192).num_ctx("m", ContextNeed(6000, 100), 2048) == 8192
+
+
+def test_num_ctx_does_not_shrink_between_calls():
+    """Un petit prompt garde le contexte courant du modèle (pas de rechargement)"""
+    budget = make_budget()
+    
+    assert budget.num_ctx("m", ContextNeed(3000, 100), 8192) == 4096
+    assert budget.num_ctx("m", ContextNeed(100, 100), 8192) == 4096
+
+
+def test_num_ctx_shrinks_after_small_calls():
+    """Le contexte est réduit au plus grand besoin récent après une série de petits prompts"""
+    budget = make_budget(shrink_after_calls=3)
+    
+    sizes = [budget.num_ctx("m", ContextNeed(tokens, 100), 8192) for tokens in (5000, 100, 1500, 100, 100)]
+    
+    assert sizes == [8192, 8192, 8192, 2048, 2048]
+
+
+def test_num_ctx_recomputed_after_idle(monkeypatch):
+    """Après une période d'inactivité, le contexte courant n'est plus imposé"""
+    now = [0.0]
+    monkeypatch.setattr(budget_module.time, "monotonic", lambda: now[0])
+    budget = make_budget(shrink_after_calls=None, shrink_after_seconds=60)
+    
+    assert budget.num_ctx("m", ContextNeed(5000, 100), 8192) == 8192
+    now[0] += 10
+    assert budget.num_ctx("m", ContextNeed(100, 100), 8192) == 8192
+    now[0] += 120
+    assert budget.num_ctx("m", ContextNeed(100, 100), 8192) == 1024
+
+
+def test_observe_only_raises_correction():
+    """Seule une sous-estimation corrige l'estimation du modèle"""
+    budget = make_budget()
+    need = ContextNeed(1000, 100)
+    
+    budget.observe("m", need, 500)
+    assert budget.required("m", need) == 1100
+    budget.observe("m", need, 1500)
+    assert budget.required("m", need) == 1600
+
+
+def test_fit_condenses_upstream_outputs():
+    """Un prompt trop grand voit ses sorties amont réduites"""
+    budget = make_budget()
+    critiques = "\n".join(f"- constat numéro {index} avec quelques détails" for index in range(300))
+    need = ContextNeed(budget.estimate("m", critiques) + 200, 100)
+    
+    trimmed = budget.fit("arbiter", "m", need, {"CRITIQUES": critiques}, 2048)
+    
+    assert trimmed is not None
+    assert budget.required("m", ContextNeed(200 + budget.estimate("m", trimmed["CRITIQUES"]), 100)) <= 2048
+
+
+def test_fit_leaves_small_prompt_untouched():
+    """Un prompt qui tient dans le contexte n'est pas modifié"""
+    assert make_budget().fit("arbiter", "m", ContextNeed(500, 100), {"CRITIQUES": "- a"}, 2048) is None
+
+
+def test_condense_keeps_findings_and_marks_omission():
+    """La condensation garde les constats et signale les lignes omises"""
+    text = "Introduction en prose.\n" + "\n".join(f"- constat {index}" for index in range(100))
+    
+    condensed = condense(text, 60)
+    
+    assert condensed.splitlines()[0] == "- constat 0"
+    assert condensed.splitlines()[-1].startswith(OMITTED_MARKER.split("{")[0])
@@ -0,0 +1,95 @@
+"""
+Tests du cache de résultats
+"""
+
+import pytest
+from src.core import cache as cache_module
+from src.core.cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée par le test"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_make_key_is_content_addressed():
+    """La clé ne dépend que du contenu (ordre des clés de dictionnaire ignoré)"""
+    key = ResultCache.make_key("chat", {"a": 1, "b": 2}, "prompt")
+    
+    assert key.startswith("chat:")
+    assert key == ResultCache.make_key("chat", {"b": 2, "a": 1}, "prompt")
+    assert key != ResultCache.make_key("chat", {"a": 1, "b": 3}, "prompt")
+    assert key != ResultCache.make_key("report", {"a": 1, "b": 2}, "prompt")
+
+
+def test_entry_expires_after_ttl(clock):
+    """Une entrée plus ancienne que le TTL n'est plus servie et est supprimée"""
+    cache = ResultCache(":memory:", ttl_seconds=60, max_entries=None)
+    cache.set("chat:a", "valeur")
+    
+    clock[0] += 59
+    assert cache.get("chat:a") == "valeur"
+    clock[0] += 2
+    assert cache.get("chat:a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_ttl_disabled(clock):
+    """Sans TTL, les entrées n'expirent pas"""
+    cache = ResultCache(":memory:", ttl_seconds=0, max_entries=None)
+    cache.set("chat:a", "valeur")
+    
+    clock[0] += 10 * 86400
+    
+    assert cache.get("chat:a") == "valeur"
+
+
+def test_lru_eviction_at_max_entries(clock):
+    """Au-delà de max_entries, les entrées les moins récemment utilisées sont supprimées"""
+    cache = ResultCache(":memory:", ttl_seconds=None, max_entries=3)
+    for key in ("chat:a", "chat:b", "chat:c"):
+        clock[0] += 1
+        cache.set(key, key)
+    clock[0] += 1
+    # Lire "a" le rend plus récent que "b"
+    assert cache.get("chat:a") == "chat:a"
+    
+    clock[0] += 1
+    cache.set("chat:d", "chat:d")
+    
+    assert cache.get("chat:b") is None
+    assert [cache.get(key) for key in ("chat:a", "chat:c", "chat:d")] == ["chat:a", "chat:c", "chat:d"]
+    assert cache.stats()["entries"] == 3
+
+
+def test_stats_per_namespace(clock):
+    """Les hits et misses sont comptés par espace de noms"""
+    cache = ResultCache(":memory:")
+    cache.set("chat:a", "1")
+    cache.set("report:r", "2")
+    
+    cache.get("chat:a")
+    cache.get("chat:a")
+    cache.get("chat:x")
+    cache.get("report:x")
+    stats = cache.stats()
+    
+    assert stats["namespaces"] == {"chat": {"hits": 2, "misses": 1}, "report": {"hits": 0, "misses": 1}}
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_clear_resets_entries_and_stats():
+    """clear() vide le cache et ses compteurs"""
+    cache = ResultCache(":memory:")
+    cache.set("chat:a", "1")
+    cache.get("chat:a")
+    
+    cache.clear()
+    
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["namespaces"] == {}
+    assert cache.get("chat:a") is None
@@ -0,0 +1,126 @@
+"""
+Tests du découpage des fichiers volumineux
+"""
+
+from src.core.chunking import derive_unit_report, merge_reports, split_code, split_units
+from src.core.models import Report, Verdict
+
+
+PYTHON_CODE = "".join(
+    f"def fonction_{index}(x):\n"
+    f"    \"\"\"Fonction {index}\"\"\"\n"
+    f"    total = x * {index}\n"
+    f"    return total + {index}\n"
+    f"\n"
+    for index in range(40)
+)
+
+GENERIC_CODE = "".join(
+    f"function f{index}(x) {{\n  return x + {index};\n}}\n\n" for index in range(40)
+)
+
+
+def test_split_code_round_trip_python():
+    """La concaténation des morceaux redonne le code d'origine"""
+    chunks = split_code(PYTHON_CODE, "python", max_tokens=120)
+    
+    assert len(chunks) > 1
+    assert "".join(chunk.code for chunk in chunks) == PYTHON_CODE
+
+
+def test_split_code_round_trip_generic():
+    """Même garantie pour les langages découpés par heuristique"""
+    chunks = split_code(GENERIC_CODE, "javascript", max_tokens=80)
+    
+    assert len(chunks) > 1
+    assert "".join(chunk.code for chunk in chunks) == GENERIC_CODE
+
+
+def test_split_code_line_ranges_are_contiguous():
+    """Les morceaux se suivent sans trou ni chevauchement"""
+    chunks = split_code(PYTHON_CODE, "python", max_tokens=120)
+    
+    assert chunks[0].start_line == 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line + 1
+    assert chunks[-1].end_line == len(PYTHON_CODE.splitlines())
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_split_code_cuts_at_function_boundaries():
+    """Chaque morceau commence au début d'une fonction"""
+    for chunk in split_code(PYTHON_CODE, "python", max_tokens=120):
+        assert chunk.code.startswith("def ")
+
+
+def test_split_code_small_code_is_single_chunk():
+    """Un code qui tient dans le budget n'est pas découpé"""
+    chunks = split_code("x = 1\n", "python", max_tokens=1000)
+    
+    assert len(chunks) == 1
+    assert chunks[0].code == "x = 1\n"
+
+
+def test_split_code_oversized_line_block():
+    """Un bloc sans frontière est découpé ligne par ligne, sans perte"""
+    code = "".join(f"valeur_{index} = {index} * 2\n" for index in range(200))
+    chunks = split_code(code, "python", max_tokens=50)
+    
+    assert len(chunks) > 1
+    assert "".join(chunk.code for chunk in chunks) == code
+
+
+def test_split_units_one_unit_per_function():
+    """Chaque fonction forme sa propre unité et le code est conservé"""
+    units = split_units(PYTHON_CODE, "python", max_tokens=1000)
+    
+    assert len(units) == 40
+    assert "".join(unit.code for unit in units) == PYTHON_CODE
+
+
+def test_derive_unit_report_from_chunked_report():
+    """Une unité inchangée reprend ses constats du rapport découpé précédent, lignes rapportées à l'unité"""
+    previous_units = split_units(PYTHON_CODE, "python", max_tokens=1000)[:2]
+    reports = [
+        Report(
+            challenger="Analyse.\n- [high] ligne 3, multiplication suspecte",
+            reviewer="```python\n...\n```",
+            arbiter="Verdict : REFUSE",
+            verdict=Verdict.REFUSE,
+            code_final=unit.code,
+            structured={"challenger": {
+                "issues": [{"severity": "high", "line": 3, "description": "x", "category": "bug"}],
+                "max_severity": "high",
+            }}
+        )
+        for unit in previous_units
+    ]
+    previous = merge_reports(previous_units, reports)
+    # La deuxième fonction, décalée de deux lignes dans la nouvelle version
+    unit = split_units("# a\n# b\n" + previous_units[1].code, "python", max_tokens=1000)[1]
+    
+    derived = derive_unit_report(previous, unit, previous_units[1].start_line)
+    
+    assert derived.challenger == "- [high] ligne 3, multiplication suspecte"
+    assert derived.structured["challenger"]["issues"][0]["line"] == 3
+    assert derived.reviewer == derived.arbiter == ""
+    assert derived.verdict == Verdict.REFUSE
+    assert derived.code_final == unit.code
+    assert derived.metrics == {"cached": True, "derived": True}
+
+
+def test_derive_unit_report_without_findings():
+    """Une unité sans constat dans le rapport précédent est acceptée"""
+    previous = Report(
+        challenger="- [high] ligne 1, import inutile",
+        reviewer="",
+        arbiter="",
+        verdict=Verdict.REFUSE,
+        code_final=PYTHON_CODE
+    )
+    unit = split_units(PYTHON_CODE, "python", max_tokens=1000)[5]
+    
+    derived = derive_unit_report(previous, unit, unit.start_line)
+    
+    assert derived.challenger == ""
+    assert derived.verdict == Verdict.ACCEPTE
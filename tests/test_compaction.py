@@ -0,0 +1,57 @@
+"""
+Tests de la compaction des sorties transmises aux rôles aval
+"""
+
+from src.core.compaction import compact_code, compact_findings, OMITTED_FINDINGS
+
+
+CRITIQUE = """Voici mon analyse du code.
+
+- [low] ligne 3, nom de variable peu clair
+- [critical] ligne 10, injection SQL possible
+  via la concaténation de la requête
+- [high] ligne 7, exception avalée
+- [low] ligne 3, nom de variable peu clair
+
+En conclusion, le code doit être corrigé.
+"""
+
+
+def test_compact_findings_dedup_and_rank():
+    """Les constats sont dédupliqués et classés par gravité décroissante"""
+    compacted, count = compact_findings(CRITIQUE)
+    lines = compacted.splitlines()
+    
+    assert count == 3
+    assert lines[0].startswith("1. [critical]")
+    assert "via la concaténation" in lines[0]
+    assert lines[1].startswith("2. [high]")
+    assert lines[2].startswith("3. [low]")
+    assert "conclusion" not in compacted
+
+
+def test_compact_findings_limit():
+    """Les constats au-delà de la limite sont omis avec une mention"""
+    compacted, count = compact_findings(CRITIQUE, max_findings=1)
+    
+    assert count == 1
+    assert compacted.splitlines()[-1] == OMITTED_FINDINGS.format(count=2)
+
+
+def test_compact_findings_without_findings():
+    """Une sortie sans constat n'est pas compactée"""
+    assert compact_findings("Rien à signaler.") == ("", 0)
+
+
+def test_compact_code_keeps_last_block_and_changes():
+    """Seuls le dernier bloc de code et la liste des modifications sont conservés"""
+    output = (
+        "Version initiale :\n```python\nx = 1\n```\n"
+        "Version corrigée :\n```python\nx = 2\n```\n"
+        "Modifications :\n- renommage de x\n- renommage de x\n"
+    )
+    
+    compacted, count = compact_code(output)
+    
+    assert compacted == "```python\nx = 2\n```\n\n- renommage de x"
+    assert count == 1
@@ -0,0 +1,175 @@
+"""
+Tests de la file de jobs : ordre, annulation, replanification et rétention
+"""
+
+import asyncio
+import time
+from src.core.jobs import Job, JobScheduler, JobStatus, JobStore
+from src.core.models import Report, Verdict
+
+
+class StubOrchestrator:
+    """Orchestrateur minimal : attend release (si fourni) puis rend un rapport"""
+    
+    def __init__(self, release: asyncio.Event = None):
+        self.release = release
+        self.started: list[str] = []
+    
+    async def run_pipeline_async(self, code, context, on_event=None):
+        self.started.append(code)
+        if on_event is not None:
+            on_event({"type": "role_start", "role": "challenger"})
+            on_event({"type": "token", "role": "challenger", "delta": "ok"})
+        if self.release is not None:
+            await self.release.wait()
+        return Report(challenger="ok", reviewer="", arbiter="", verdict=Verdict.ACCEPTE, code_final=code)
+
+
+def make_scheduler(orchestrator=None, store=None) -> JobScheduler:
+    """Planificateur d'un seul worker sur un stockage en mémoire"""
+    return JobScheduler(store or JobStore(":memory:"), lambda: orchestrator, max_concurrent=1)
+
+
+async def wait_for(predicate, timeout: float = 2.0):
+    """Attend qu'une condition soit vraie"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition non atteinte"
+        await asyncio.sleep(0.005)
+
+
+def queue_order(scheduler: JobScheduler, jobs: dict[str, Job]) -> list[str]:
+    """Noms des jobs dans l'ordre de service"""
+    return sorted(jobs, key=lambda name: scheduler.position(jobs[name].id))
+
+
+def test_priority_then_fairness_between_clients():
+    """Priorité décroissante, puis clients servis à tour de rôle"""
+    async def main():
+        scheduler = make_scheduler()
+        jobs = {}
+        for name in ("a1", "a2", "a3"):
+            jobs[name] = await scheduler.submit(name, client_id="a")
+        jobs["b1"] = await scheduler.submit("b1", client_id="b")
+        jobs["c1"] = await scheduler.submit("c1", client_id="c", priority=5)
+        return queue_order(scheduler, jobs)
+    
+    assert asyncio.run(main()) == ["c1", "a1", "b1", "a2", "a3"]
+
+
+def test_fairness_within_each_priority_level():
+    """Les jobs d'un client à une priorité ne retardent pas ses jobs d'une autre priorité"""
+    async def main():
+        scheduler = make_scheduler()
+        jobs = {}
+        for name in ("a1", "a2", "a3"):
+            jobs[name] = await scheduler.submit(name, client_id="a")
+        jobs["ah"] = await scheduler.submit("ah", client_id="a", priority=3)
+        jobs["bh"] = await scheduler.submit("bh", client_id="b", priority=3)
+        return queue_order(scheduler, jobs)
+    
+    assert asyncio.run(main())[:2] == ["ah", "bh"]
+
+
+def test_priority_out_of_bounds_rejected():
+    """Une priorité hors bornes est refusée"""
+    async def main():
+        scheduler = make_scheduler()
+        for priority in (11, -11, 10 ** 30):
+            try:
+                await scheduler.submit("x", priority=priority)
+            except ValueError:
+                continue
+            raise AssertionError(f"priorité {priority} acceptée")
+    
+    asyncio.run(main())
+
+
+def test_cancel_queued_job():
+    """Un job annulé en attente n'est jamais exécuté"""
+    async def main():
+        release = asyncio.Event()
+        orchestrator = StubOrchestrator(release=release)
+        scheduler = make_scheduler(orchestrator)
+        await scheduler.start()
+        running = await scheduler.submit("en cours")
+        await wait_for(lambda: scheduler.get(running.id).status == JobStatus.RUNNING)
+        cancelled = await scheduler.submit("annulé")
+        kept = await scheduler.submit("gardé")
+        scheduler.cancel(cancelled.id)
+        position = scheduler.position(cancelled.id)
+        release.set()
+        await wait_for(lambda: scheduler.get(kept.id).status == JobStatus.COMPLETED)
+        await scheduler.stop()
+        return orchestrator.started, position, scheduler.store.get(cancelled.id)
+    
+    started, position, cancelled = asyncio.run(main())
+    
+    assert started == ["en cours", "gardé"]
+    assert position is None
+    assert cancelled.status == JobStatus.CANCELLED
+    assert cancelled.finished_at is not None
+
+
+def test_cancel_running_job():
+    """Un job annulé en cours d'exécution est interrompu et persisté comme annulé"""
+    async def main():
+        orchestrator = StubOrchestrator(release=asyncio.Event())
+        scheduler = make_scheduler(orchestrator)
+        await scheduler.start()
+        job = await scheduler.submit("long")
+        await wait_for(lambda: scheduler.get(job.id).status == JobStatus.RUNNING)
+        scheduler.cancel(job.id)
+        await wait_for(lambda: not scheduler.stats()["running"])
+        await scheduler.stop()
+        return scheduler.store.get(job.id)
+    
+    job = asyncio.run(main())
+    
+    assert job.status == JobStatus.CANCELLED
+    assert job.report is None
+
+
+def test_running_job_requeued_on_stop_and_restart():
+    """Un job interrompu par l'arrêt repart de zéro au redémarrage"""
+    async def main():
+        store = JobStore(":memory:")
+        first = make_scheduler(StubOrchestrator(release=asyncio.Event()), store)
+        await first.start()
+        job = await first.submit("interrompu")
+        await wait_for(lambda: first.get(job.id).status == JobStatus.RUNNING)
+        await first.stop()
+        stopped = store.get(job.id)
+        
+        second = make_scheduler(StubOrchestrator(), store)
+        await second.start()
+        await wait_for(lambda: second.get(job.id).status == JobStatus.COMPLETED)
+        await second.stop()
+        return stopped, store.get(job.id)
+    
+    stopped, finished = asyncio.run(main())
+    
+    assert stopped.status == JobStatus.QUEUED
+    assert finished.status == JobStatus.COMPLETED
+    assert finished.report["challenger"] == "ok"
+
+
+def test_purge_finished_counts_from_finished_at():
+    """La rétention court depuis la fin du job et non depuis sa création"""
+    store = JobStore(":memory:")
+    now = time.time()
+    day = 86400
+    jobs = {
+        # Créé il y a longtemps mais terminé récemment : conservé
+        "long": Job(id="long", code="", status=JobStatus.COMPLETED, created_at=now - 10 * day, finished_at=now - 3600),
+        "ancien": Job(id="ancien", code="", status=JobStatus.FAILED, created_at=now - 10 * day, finished_at=now - 8 * day),
+        # Sans finished_at (jobs antérieurs) : âge compté depuis la création
+        "legacy": Job(id="legacy", code="", status=JobStatus.CANCELLED, created_at=now - 10 * day),
+        "en_file": Job(id="en_file", code="", status=JobStatus.QUEUED, created_at=now - 10 * day),
+    }
+    for job in jobs.values():
+        store.save(job)
+    
+    store.purge_finished(7 * day)
+    
+    assert {name for name in jobs if store.get(name) is not None} == {"long", "en_file"}
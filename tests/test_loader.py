@@ -0,0 +1,156 @@
+"""
+Tests du chargeur de configuration
+"""
+
+import textwrap
+import pytest
+from src.config.loader import ConfigLoader
+from src.utils.errors import ConfigError
+
+
+ROLES = """
+providers:
+  ollama_local:
+    base_url: http://127.0.0.1:11434
+roles:
+  challenger: {model: "m:latest"}
+  challenger_securite: {model: "m:latest"}
+  reviewer: {model: "m:latest"}
+  arbiter: {model: "m:latest"}
+"""
+
+
+def load(tmp_path, body: str):
+    """Écrit la configuration (rôles communs + body) et la charge"""
+    path = tmp_path / "config.yaml"
+    path.write_text(ROLES + textwrap.dedent(body), encoding="utf-8")
+    return ConfigLoader(str(path)).load()
+
+
+def test_pipeline_is_sorted_topologically(tmp_path):
+    """Les rôles sans dépendance précèdent leurs consommateurs, quel que soit l'ordre déclaré"""
+    config = load(tmp_path, """
+        pipeline:
+          - role: reviewer
+            inputs:
+              CRITIQUES: [challenger, challenger_securite]
+          - challenger
+          - challenger_securite
+        templates:
+          challenger: "{{CODE}}"
+          challenger_securite: "{{CODE}}"
+          reviewer: "{{CODE}} {{CRITIQUES}}"
+    """)
+    
+    assert config.pipeline == ["challenger", "challenger_securite", "reviewer"]
+    assert config.inputs["reviewer"] == {"CRITIQUES": ["challenger", "challenger_securite"]}
+    assert config.inputs["challenger"] == {}
+
+
+def test_default_wiring_for_plain_role_names(tmp_path):
+    """Les noms de rôles simples reprennent le câblage historique"""
+    config = load(tmp_path, """
+        pipeline: [challenger, reviewer, arbiter]
+        templates:
+          challenger: "{{CODE}}"
+          reviewer: "{{CRITIQUES}}"
+          arbiter: "{{CRITIQUES}} {{CODE_AMELIORE}}"
+    """)
+    
+    assert config.pipeline == ["challenger", "reviewer", "arbiter"]
+    assert config.inputs["arbiter"] == {"CRITIQUES": ["challenger"], "CODE_AMELIORE": ["reviewer"]}
+
+
+def test_cycle_is_rejected(tmp_path):
+    """Un cycle de dépendances est refusé au chargement"""
+    with pytest.raises(ConfigError, match="Cycle de dépendances"):
+        load(tmp_path, """
+            pipeline:
+              - role: challenger
+                inputs: {AVIS: reviewer}
+              - role: reviewer
+                inputs: {CRITIQUES: challenger}
+            templates:
+              challenger: "{{AVIS}}"
+              reviewer: "{{CRITIQUES}}"
+        """)
+
+
+def test_upstream_role_outside_pipeline_is_rejected(tmp_path):
+    """Un rôle amont absent du pipeline est refusé au chargement"""
+    with pytest.raises(ConfigError, match="dépend de 'inconnu', absent du pipeline"):
+        load(tmp_path, """
+            pipeline:
+              - challenger
+              - role: reviewer
+                inputs: {CRITIQUES: [challenger, inconnu]}
+            templates:
+              challenger: "{{CODE}}"
+              reviewer: "{{CRITIQUES}}"
+        """)
+
+
+def test_undefined_role_is_rejected(tmp_path):
+    """Un rôle du pipeline absent de la section roles est refusé"""
+    with pytest.raises(ConfigError, match="non défini"):
+        load(tmp_path, """
+            pipeline: [challenger, fantome]
+            templates:
+              challenger: "{{CODE}}"
+              fantome: "{{CODE}}"
+        """)
+
+
+def test_duplicate_role_is_rejected(tmp_path):
+    """Un rôle déclaré deux fois dans le pipeline est refusé"""
+    with pytest.raises(ConfigError, match="plusieurs fois"):
+        load(tmp_path, """
+            pipeline: [challenger, challenger]
+            templates:
+              challenger: "{{CODE}}"
+        """)
+
+
+def test_unknown_placeholder_is_rejected(tmp_path):
+    """Un placeholder ni commun ni alimenté par un rôle amont est refusé au chargement"""
+    with pytest.raises(ConfigError, match=r"Placeholder\(s\) inconnu\(s\).*'reviewer'.*\{\{CRITIQUE\}\}"):
+        load(tmp_path, """
+            pipeline: [challenger, reviewer]
+            templates:
+              challenger: "{{CODE}}"
+              reviewer: "{{CODE}} {{CRITIQUE}}"
+        """)
+
+
+def test_upstream_placeholder_requires_the_input(tmp_path):
+    """Un placeholder amont n'est disponible que pour les rôles qui le consomment"""
+    with pytest.raises(ConfigError, match="'challenger'.*CRITIQUES"):
+        load(tmp_path, """
+            pipeline: [challenger, reviewer]
+            templates:
+              challenger: "{{CRITIQUES}}"
+              reviewer: "{{CRITIQUES}}"
+        """)
+
+
+def test_templates_are_compiled_with_their_placeholders(tmp_path):
+    """Les templates valides sont compilés avec la liste de leurs placeholders"""
+    config = load(tmp_path, """
+        pipeline: [challenger, reviewer]
+        templates:
+          challenger: "{{LANGUAGE}} {{CODE}}"
+          reviewer: "{{CODE}} {{CRITIQUES}}"
+    """)
+    
+    assert config.compiled_templates["challenger"].placeholders == {"LANGUAGE", "CODE"}
+    assert config.compiled_templates["reviewer"].placeholders == {"CODE", "CRITIQUES"}
+
+
+def test_non_string_template_is_rejected(tmp_path):
+    """Un template qui n'est pas une chaîne est refusé"""
+    with pytest.raises(ConfigError, match="doit être une chaîne"):
+        load(tmp_path, """
+            pipeline: [challenger]
+            templates:
+              challenger: [CODE]
+        """)
@@ -0,0 +1,117 @@
+"""
+Tests du disjoncteur du pool d'instances Ollama
+"""
+
+import asyncio
+import time
+import httpx
+import pytest
+from src.core.models import EndpointConfig
+from src.core.ollama_pool import OllamaPool, _is_node_failure
+from src.utils.errors import OllamaError, OllamaTimeoutError
+
+
+def wrap(cause: Exception) -> OllamaError:
+    """Erreur Ollama levée depuis une erreur httpx, comme dans le client"""
+    try:
+        raise OllamaError("échec") from cause
+    except OllamaError as e:
+        return e
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    """Erreur HTTP d'une réponse de statut donné"""
+    request = httpx.Request("POST", "http://ollama/api/chat")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def test_server_errors_count():
+    """Les erreurs 5xx comptent pour le circuit"""
+    assert _is_node_failure(wrap(status_error(500)))
+    assert _is_node_failure(wrap(status_error(503)))
+
+
+def test_client_errors_do_not_count():
+    """Les erreurs 4xx viennent de la requête et ne comptent pas"""
+    assert not _is_node_failure(wrap(status_error(400)))
+    assert not _is_node_failure(wrap(status_error(404)))
+
+
+def test_connection_errors_and_timeouts_count():
+    """Les échecs de connexion et les timeouts comptent pour le circuit"""
+    request = httpx.Request("POST", "http://ollama/api/chat")
+    assert _is_node_failure(wrap(httpx.ConnectError("refusée", request=request)))
+    try:
+        raise OllamaTimeoutError("timeout") from httpx.ReadTimeout("lent", request=request)
+    except OllamaTimeoutError as e:
+        assert _is_node_failure(e)
+
+
+def make_pool(failure_threshold: int = 3) -> OllamaPool:
+    """Pool d'une instance dont /api/tags répond mais dont les appels échouent en 500"""
+    pool = OllamaPool(
+        [EndpointConfig(name="a", base_url="http://a:11434", timeout=5)],
+        failure_threshold=failure_threshold,
+        reset_seconds=30
+    )
+    node = pool.nodes[0]
+    
+    async def complete(**kwargs):
+        raise wrap(status_error(500))
+    
+    async def list_models():
+        return ["m:latest"]
+    
+    async def running_models():
+        return []
+    
+    node.client.complete = complete
+    node.client.list_models = list_models
+    pool.running_models = running_models
+    return pool
+
+
+def test_health_check_keeps_circuit_opened_by_calls():
+    """Un health check réussi ne referme pas le circuit ouvert par des appels en échec"""
+    pool = make_pool(failure_threshold=3)
+    node = pool.nodes[0]
+    
+    async def main():
+        for _ in range(3):
+            with pytest.raises(OllamaError):
+                await pool.complete(model="m", prompt="p")
+        await pool._check_nodes()
+    
+    asyncio.run(main())
+    
+    assert not node.available(time.monotonic())
+    assert node.failures == 3
+
+
+def test_health_check_does_not_reset_failure_count():
+    """Les échecs en dessous du seuil s'additionnent malgré les health checks"""
+    pool = make_pool(failure_threshold=2)
+    node = pool.nodes[0]
+    
+    async def main():
+        with pytest.raises(OllamaError):
+            await pool.complete(model="m", prompt="p")
+        await pool._check_nodes()
+        with pytest.raises(OllamaError):
+            await pool.complete(model="m", prompt="p")
+    
+    asyncio.run(main())
+    
+    assert not node.available(time.monotonic())
+
+
+def test_health_check_closes_its_own_circuit():
+    """Le circuit ouvert par un health check en échec se referme quand l'instance répond"""
+    pool = make_pool()
+    node = pool.nodes[0]
+    pool._open_circuit(node, "health check /api/tags en échec", by_health=True)
+    
+    asyncio.run(pool._check_nodes())
+    
+    assert node.available(time.monotonic())
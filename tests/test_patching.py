@@ -0,0 +1,105 @@
+"""
+Tests de l'application des diffs du Reviewer
+"""
+
+import pytest
+from src.core.patching import Hunk, PatchError, _locate, apply_patch, apply_review, parse_hunks, with_patched_code
+
+
+ORIGINAL = "".join(f"ligne {index}\n" for index in range(1, 21))
+
+
+def test_apply_patch_at_announced_position():
+    """Un hunk à sa position annoncée est appliqué"""
+    patch = "@@ -3,3 +3,3 @@\n ligne 3\n-ligne 4\n+ligne quatre\n ligne 5\n"
+    
+    patched = apply_patch(ORIGINAL, patch)
+    
+    assert "ligne quatre\n" in patched
+    assert "ligne 4\n" not in patched
+    assert patched.count("\n") == ORIGINAL.count("\n")
+
+
+def test_apply_patch_with_offset():
+    """Un hunk dont la position annoncée est décalée est retrouvé à proximité"""
+    patch = "@@ -2,3 +2,3 @@\n ligne 10\n-ligne 11\n+ligne onze\n ligne 12\n"
+    
+    patched = apply_patch(ORIGINAL, patch)
+    
+    assert patched.splitlines()[10] == "ligne onze"
+
+
+def test_apply_patch_ignores_trailing_whitespace():
+    """Les espaces en fin de ligne n'empêchent pas la correspondance (fuzz)"""
+    patch = "@@ -5,2 +5,2 @@\n ligne 5   \n-ligne 6\t\n+ligne six\n"
+    
+    assert apply_patch(ORIGINAL, patch).splitlines()[5] == "ligne six"
+
+
+def test_apply_patch_multiple_hunks_and_pure_addition():
+    """Plusieurs hunks s'appliquent dans l'ordre, y compris un ajout pur"""
+    patch = (
+        "@@ -1,1 +1,1 @@\n-ligne 1\n+ligne un\n"
+        "@@ -10,0 +11,1 @@\n+insertion\n"
+    )
+    
+    lines = apply_patch(ORIGINAL, patch).splitlines()
+    
+    assert lines[0] == "ligne un"
+    assert lines[10] == "insertion"
+    assert len(lines) == 21
+
+
+def test_apply_patch_rejects_unknown_context():
+    """Un hunk absent du code original est refusé"""
+    patch = "@@ -3,2 +3,2 @@\n ligne inconnue\n-ligne 4\n+ligne quatre\n"
+    
+    with pytest.raises(PatchError):
+        apply_patch(ORIGINAL, patch)
+
+
+def test_parse_hunks_rejects_patch_without_hunk():
+    """Un diff sans en-tête @@ est refusé"""
+    with pytest.raises(PatchError):
+        parse_hunks("--- a/f.py\n+++ b/f.py\n")
+
+
+def test_locate_respects_cursor():
+    """Un hunk n'est jamais placé avant la fin du hunk précédent"""
+    lines = ["a", "b", "a", "b"]
+    hunk = Hunk(old_start=1, old_lines=["a", "b"], new_lines=["c"])
+    
+    assert _locate(lines, hunk, 0) == 0
+    assert _locate(lines, hunk, 1) == 2
+    assert _locate(lines, hunk, 3) is None
+
+
+def test_locate_beyond_max_offset():
+    """Au-delà du décalage maximal, le hunk n'est pas retrouvé"""
+    lines = [f"l{index}" for index in range(200)]
+    hunk = Hunk(old_start=1, old_lines=["l150"], new_lines=["x"])
+    
+    assert _locate(lines, hunk, 0) is None
+
+
+def test_apply_review_rejects_invalid_python():
+    """Un diff produisant un code Python invalide est refusé"""
+    original = "def f():\n    return 1\n"
+    output = "```diff\n@@ -2,1 +2,1 @@\n-    return 1\n+    return (\n```"
+    
+    with pytest.raises(PatchError):
+        apply_review(original, output, "python")
+
+
+def test_apply_review_without_diff():
+    """Une réponse en code complet n'est pas traitée comme un diff"""
+    assert apply_review("x = 1\n", "```python\nx = 2\n```", "python") is None
+
+
+def test_with_patched_code_replaces_diff():
+    """Les rôles aval reçoivent le code patché à la place du diff, explications conservées"""
+    output = "Correction :\n```diff\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 2\n```\nExplication"
+    
+    forwarded = with_patched_code(output, "x = 2\n", "python")
+    
+    assert forwarded == "Correction :\n```python\nx = 2\n```\nExplication"
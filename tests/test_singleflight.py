@@ -0,0 +1,104 @@
+"""
+Tests du regroupement des exécutions identiques
+"""
+
+import asyncio
+import pytest
+from src.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """Les appels simultanés reçoivent chacun leur copie d'un même résultat"""
+    calls = []
+    
+    async def factory(emit):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"verdict": "ok", "items": [1]}
+    
+    async def main():
+        flight = SingleFlight("pipeline")
+        return await asyncio.gather(*(flight.do("k", factory) for _ in range(3)))
+    
+    results = asyncio.run(main())
+    
+    assert len(calls) == 1
+    assert all(result == {"verdict": "ok", "items": [1]} for result in results)
+    results[1]["items"].append(2)
+    assert results[0]["items"] == [1] and results[2]["items"] == [1]
+
+
+def test_late_subscriber_receives_past_events():
+    """Un abonné arrivé en cours de route reçoit d'abord les événements déjà émis"""
+    async def factory(emit):
+        emit({"type": "role_start"})
+        await asyncio.sleep(0.02)
+        emit({"type": "role_end"})
+        return "rapport"
+    
+    async def main():
+        flight = SingleFlight("pipeline")
+        first, second = [], []
+        task = asyncio.create_task(flight.do("k", factory, first.append))
+        await asyncio.sleep(0.01)
+        result = await flight.do("k", factory, second.append)
+        await task
+        return first, second, result
+    
+    first, second, result = asyncio.run(main())
+    
+    assert first == second == [{"type": "role_start"}, {"type": "role_end"}]
+    assert result == "rapport"
+
+
+def test_replay_for_non_streamed_execution():
+    """Le résultat d'une exécution non streamée est rejoué à l'abonné qui en attend"""
+    async def factory(emit):
+        await asyncio.sleep(0.01)
+        return "rapport"
+    
+    def replay(result, on_event):
+        on_event({"type": "report", "report": result})
+    
+    async def main():
+        flight = SingleFlight("pipeline")
+        events = []
+        task = asyncio.create_task(flight.do("k", factory))
+        await asyncio.sleep(0)
+        await flight.do("k", factory, events.append, replay)
+        await task
+        return events
+    
+    assert asyncio.run(main()) == [{"type": "report", "report": "rapport"}]
+
+
+def test_exception_is_shared():
+    """L'exception de l'exécution est levée pour chaque appelant"""
+    async def factory(emit):
+        await asyncio.sleep(0.01)
+        raise ValueError("échec")
+    
+    async def main():
+        flight = SingleFlight("pipeline")
+        return await asyncio.gather(flight.do("k", factory), flight.do("k", factory), return_exceptions=True)
+    
+    results = asyncio.run(main())
+    
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_execution_cancelled_when_all_callers_leave():
+    """L'exécution est annulée quand tous ses appelants abandonnent"""
+    async def factory(emit):
+        await asyncio.sleep(10)
+    
+    async def main():
+        flight = SingleFlight("pipeline")
+        task = asyncio.create_task(flight.do("k", factory))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return flight.in_flight
+    
+    assert asyncio.run(main()) == 0